@@ -1,17 +1,40 @@
 """
 Attendance logging endpoint (optional)
 POST /attendance - Directly log attendance record
+POST /attendance/bulk - Ingest an attendance backlog (JSON array or NDJSON)
+GET  /attendance - Query attendance records (keyset pagination)
+GET  /attendance/employees/{employee_id} - Attendance records of one employee
+GET  /attendance/devices/{device_id} - Attendance records of one device
+GET  /attendance/export - Stream attendance records as CSV / NDJSON
+GET  /attendance/summary/daily - Per-employee daily summaries
+GET  /attendance/summary/devices - Per-device daily attempt counts
+GET  /attendance/writer - Write-behind queue / attempt log metrics
+GET  /attendance/state - Today's attendance state cache
+POST /attendance/state/refresh - Reload the state cache from the database
 """
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.base import get_db
+from app.core.config import settings
 from app.schemas.dto import AttendanceRequest, AttendanceResponse
-from app.services import attendance_service
+from app.services import attendance_service, attendance_export, attendance_bulk, summary_service
+from app.utils.dates import work_date
+from app.services.attendance_writer import attendance_writer
+from app.services.attempt_log import attempt_logger
 from app.core.logging import app_logger
 
 router = APIRouter()
 
+# NDJSON 한 줄 최대 크기 (개행 없이 계속 들어오는 본문이 버퍼를 키우지 않게)
+BULK_MAX_LINE_BYTES = 64 * 1024
+
 
 @router.post("/attendance", response_model=AttendanceResponse)
 async def log_attendance(
@@ -37,7 +60,7 @@ async def log_attendance(
     try:
         app_logger.info(f"Attendance log request: {request.employee_id} - {request.type}")
         
-        success = attendance_service.record_success(
+        recorded = attendance_service.record_success_once(
             db=db,
             employee_id=request.employee_id,
             type=request.type,
@@ -47,11 +70,18 @@ async def log_attendance(
             ts_client=request.ts_client
         )
         
-        if success:
+        if recorded:
             return {
                 "success": True,
                 "message": "출퇴근 기록이 저장되었습니다"
             }
+        elif recorded is False:
+            # 오늘 같은 타입 기록이 이미 있음 (uq_attendance_emp_date_type)
+            return {
+                "success": False,
+                "message": "오늘 이미 기록된 출퇴근입니다",
+                "reason": "already_checked_in" if request.type.upper() == "IN" else "already_checked_out"
+            }
         else:
             return {
                 "success": False,
@@ -64,3 +94,390 @@ async def log_attendance(
             "success": False,
             "message": "내부 오류가 발생했습니다"
         }
+
+
+@router.post("/attendance/bulk")
+async def bulk_attendance(request: Request, db: Session = Depends(get_db)):
+    """
+    Ingest many attendance records at once (offline kiosk / badge reader backlog)
+    
+    Body: JSON array of AttendanceRequest objects, or NDJSON
+    (Content-Type: application/x-ndjson, one object per line, streamed).
+    Items are validated, deduplicated against the request and the database,
+    and inserted ATTENDANCE_BULK_CHUNK_SIZE rows per transaction.
+    Bodies over ATTENDANCE_BULK_MAX_BYTES get 413 (BodySizeLimitMiddleware),
+    NDJSON lines over BULK_MAX_LINE_BYTES are reported as invalid items.
+    When ts_client is present it is stored as ts_server too (the event time,
+    capped at the upload time), so summaries, queries and exports use it.
+    
+    Response: per-item results (recorded / duplicate / invalid / error) and throughput
+    """
+    start_time = time.perf_counter()
+    max_items = settings.ATTENDANCE_BULK_MAX_ITEMS
+    chunk_size = max(1, settings.ATTENDANCE_BULK_CHUNK_SIZE)
+    
+    results: List[Dict[str, Any]] = []
+    chunk: List[Dict[str, Any]] = []
+    total = 0
+    truncated = False
+    
+    async def flush_chunk():
+        # DB 작업은 이벤트 루프 밖에서
+        results.extend(await asyncio.to_thread(attendance_bulk.insert_chunk, db, list(chunk)))
+        chunk.clear()
+    
+    def add_item(data: Any):
+        row, error = attendance_bulk.validate_item(total, data)
+        if error is not None:
+            results.append(error)
+        else:
+            chunk.append(row)
+    
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            # NDJSON: 줄 단위로 읽으면서 청크가 차면 바로 저장 (본문 전체를 메모리에 올리지 않음)
+            buffer = b""
+            skipping = False  # 너무 긴 줄의 나머지를 다음 개행까지 버리는 중
+            async for data in request.stream():
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                if skipping:
+                    if lines:
+                        lines[0] = b""  # 긴 줄의 끝부분
+                        skipping = False
+                    else:
+                        buffer = b""
+                if len(buffer) > BULK_MAX_LINE_BYTES:
+                    # 개행 없이 한도를 넘으면 이 줄은 무효 처리하고 다음 개행까지 버림
+                    lines.append(None)
+                    buffer = b""
+                    skipping = True
+                for line in lines:
+                    if line is None or len(line) > BULK_MAX_LINE_BYTES:
+                        if total >= max_items:
+                            truncated = True
+                            break
+                        results.append(attendance_bulk.item_result(
+                            total, "invalid", "line_too_long", f"한 줄은 최대 {BULK_MAX_LINE_BYTES}바이트입니다"
+                        ))
+                        total += 1
+                        continue
+                    if not line.strip():
+                        continue
+                    if total >= max_items:
+                        truncated = True
+                        break
+                    try:
+                        add_item(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        results.append(attendance_bulk.item_result(total, "invalid", "invalid_json", str(e)))
+                    total += 1
+                    if len(chunk) >= chunk_size:
+                        await flush_chunk()
+                if truncated:
+                    break
+            if buffer.strip() and not truncated:
+                if total >= max_items:
+                    truncated = True
+                else:
+                    try:
+                        add_item(json.loads(buffer))
+                    except json.JSONDecodeError as e:
+                        results.append(attendance_bulk.item_result(total, "invalid", "invalid_json", str(e)))
+                    total += 1
+        else:
+            try:
+                items = json.loads(await request.body())
+            except json.JSONDecodeError as e:
+                return {"success": False, "message": f"JSON 파싱 실패: {e}", "reason": "invalid_json"}
+            if not isinstance(items, list):
+                return {"success": False, "message": "JSON 배열이어야 합니다", "reason": "invalid_body"}
+            if len(items) > max_items:
+                return {
+                    "success": False,
+                    "message": f"한 번에 최대 {max_items}건까지 업로드할 수 있습니다",
+                    "reason": "too_many_items"
+                }
+            for data in items:
+                add_item(data)
+                total += 1
+                if len(chunk) >= chunk_size:
+                    await flush_chunk()
+        
+        if chunk:
+            await flush_chunk()
+    
+    except Exception as e:
+        app_logger.error(f"Error in bulk attendance endpoint: {e}")
+        return {"success": False, "message": "내부 오류가 발생했습니다", "reason": "internal_error"}
+    
+    results.sort(key=lambda r: r["index"])
+    counts = {"recorded": 0, "duplicate": 0, "invalid": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    
+    elapsed = time.perf_counter() - start_time
+    app_logger.info(
+        f"Bulk attendance: total={total}, recorded={counts['recorded']}, duplicates={counts['duplicate']}, "
+        f"invalid={counts['invalid']}, errors={counts['error']} in {elapsed * 1000:.0f}ms"
+    )
+    
+    response = {
+        "success": counts["error"] == 0,
+        "total": total,
+        "recorded": counts["recorded"],
+        "duplicates": counts["duplicate"],
+        "invalid": counts["invalid"],
+        "errors": counts["error"],
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_sec": round(total / elapsed, 1) if elapsed > 0 else None,
+        "results": results
+    }
+    if truncated:
+        response["truncated"] = True
+        response["message"] = f"최대 {max_items}건까지만 처리했습니다"
+    return response
+
+@router.get("/attendance/writer")
+async def attendance_writer_metrics():
+    """Write-behind writer and attempt log metrics (queue depth, flush latency)"""
+    return {**attendance_writer.get_metrics(), "attempt_log": attempt_logger.get_metrics()}
+
+
+@router.get("/attendance/state")
+async def attendance_state():
+    """Today's attendance state cache (sizes and counters)"""
+    return attendance_service.daily_state.get_stats()
+
+
+@router.post("/attendance/state/refresh")
+async def refresh_attendance_state(db: Session = Depends(get_db)):
+    """
+    Reload today's attendance state from the database
+    
+    Call after manual DB edits. With multiple workers only the worker that
+    receives the request reloads - the others catch up within ATTENDANCE_STATE_REFRESH_SEC
+    """
+    loaded = attendance_service.daily_state.load(db)
+    return {"success": loaded, **attendance_service.daily_state.get_stats()}
+
+
+def _query_page(
+    db: Session,
+    employee_id: Optional[str],
+    device_id: Optional[str],
+    type: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str]
+) -> dict:
+    """Run a paginated attendance query and build the response"""
+    # 서버 측 페이지 크기 제한
+    limit = min(limit or settings.ATTENDANCE_QUERY_DEFAULT_LIMIT, settings.ATTENDANCE_QUERY_MAX_LIMIT)
+    
+    if type and type.upper() not in ("IN", "OUT"):
+        return {"success": False, "message": "type은 IN 또는 OUT이어야 합니다", "reason": "invalid_type"}
+    if date_from and date_to and date_from > date_to:
+        return {"success": False, "message": "date_from이 date_to보다 늦습니다", "reason": "invalid_range"}
+    
+    try:
+        records, next_cursor = attendance_service.query_attendance(
+            db=db,
+            employee_id=employee_id,
+            device_id=device_id,
+            type=type,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        return {"success": False, "message": "잘못된 cursor입니다", "reason": "invalid_cursor"}
+    except Exception as e:
+        app_logger.error(f"Error querying attendance: {e}")
+        return {"success": False, "message": "내부 오류가 발생했습니다", "reason": "internal_error"}
+    
+    return {
+        "success": True,
+        "count": len(records),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "items": [attendance_service.attendance_to_dict(r) for r in records]
+    }
+
+
+@router.get("/attendance")
+async def list_attendance(
+    employee_id: Optional[str] = Query(None, description="Employee ID"),
+    device_id: Optional[str] = Query(None, description="Device ID"),
+    type: Optional[str] = Query(None, description="IN or OUT"),
+    date_from: Optional[date] = Query(None, description="First day (inclusive, YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, YYYY-MM-DD)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by ATTENDANCE_QUERY_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Query attendance records, newest first
+    
+    Pass next_cursor from the response as cursor to get the next page
+    (keyset pagination on (ts_server, id), no OFFSET)
+    """
+    return _query_page(db, employee_id, device_id, type, date_from, date_to, limit, cursor)
+
+
+@router.get("/attendance/employees/{employee_id}")
+async def list_employee_attendance(
+    employee_id: str,
+    type: Optional[str] = Query(None, description="IN or OUT"),
+    date_from: Optional[date] = Query(None, description="First day (inclusive, YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, YYYY-MM-DD)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Attendance records of one employee, newest first"""
+    return _query_page(db, employee_id, None, type, date_from, date_to, limit, cursor)
+
+
+@router.get("/attendance/devices/{device_id}")
+async def list_device_attendance(
+    device_id: str,
+    type: Optional[str] = Query(None, description="IN or OUT"),
+    date_from: Optional[date] = Query(None, description="First day (inclusive, YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, YYYY-MM-DD)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Attendance records of one device, newest first"""
+    return _query_page(db, None, device_id, type, date_from, date_to, limit, cursor)
+
+
+@router.get("/attendance/export")
+async def export_attendance(
+    format: str = Query("csv", description="csv or ndjson"),
+    gzip: bool = Query(False, description="gzip-compress the stream"),
+    employee_id: Optional[str] = Query(None, description="Employee ID"),
+    device_id: Optional[str] = Query(None, description="Device ID"),
+    type: Optional[str] = Query(None, description="IN or OUT"),
+    date_from: Optional[date] = Query(None, description="First day (inclusive, YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, YYYY-MM-DD)")
+):
+    """
+    Export attendance records (oldest first) for payroll
+    
+    Rows are read through a server-side cursor and streamed chunk by chunk,
+    so memory use does not grow with the size of the range
+    """
+    fmt = format.lower()
+    if fmt not in attendance_export.EXPORT_FORMATS:
+        return {"success": False, "message": "format은 csv 또는 ndjson이어야 합니다", "reason": "invalid_format"}
+    if type and type.upper() not in ("IN", "OUT"):
+        return {"success": False, "message": "type은 IN 또는 OUT이어야 합니다", "reason": "invalid_type"}
+    if date_from and date_to and date_from > date_to:
+        return {"success": False, "message": "date_from이 date_to보다 늦습니다", "reason": "invalid_range"}
+    
+    filename = "attendance"
+    if date_from or date_to:
+        filename += f"_{date_from or ''}_{date_to or ''}"
+    filename += f".{fmt}" + (".gz" if gzip else "")
+    
+    media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+    
+    app_logger.info(f"Attendance export requested: {filename}")
+    return StreamingResponse(
+        attendance_export.stream_export(
+            fmt=fmt,
+            gzip=gzip,
+            employee_id=employee_id,
+            device_id=device_id,
+            type=type,
+            date_from=date_from,
+            date_to=date_to
+        ),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+def _summary_range(date_from: Optional[date], date_to: Optional[date]):
+    """Default to today and validate the summary date range"""
+    date_to = date_to or work_date()
+    date_from = date_from or date_to
+    if date_from > date_to:
+        return None, None, {"success": False, "message": "date_from이 date_to보다 늦습니다", "reason": "invalid_range"}
+    if date_to - date_from > timedelta(days=summary_service.SUMMARY_MAX_DAYS):
+        return None, None, {
+            "success": False,
+            "message": f"조회 기간은 최대 {summary_service.SUMMARY_MAX_DAYS}일입니다",
+            "reason": "range_too_large"
+        }
+    return date_from, date_to, None
+
+
+@router.get("/attendance/summary/daily")
+async def daily_summary(
+    date_from: Optional[date] = Query(None, description="First day (inclusive, default today)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, default today)"),
+    employee_id: Optional[str] = Query(None, description="Employee ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-employee first IN, last OUT and worked duration per day
+    
+    Reads only daily_attendance_summary (maintained on every record)
+    """
+    date_from, date_to, error = _summary_range(date_from, date_to)
+    if error:
+        return error
+    
+    try:
+        items = summary_service.get_employee_summaries(db, date_from, date_to, employee_id=employee_id)
+    except Exception as e:
+        app_logger.error(f"Error querying daily summary: {e}")
+        return {"success": False, "message": "내부 오류가 발생했습니다", "reason": "internal_error"}
+    
+    return {
+        "success": True,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "count": len(items),
+        "items": items
+    }
+
+
+@router.get("/attendance/summary/devices")
+async def device_summary(
+    date_from: Optional[date] = Query(None, description="First day (inclusive, default today)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive, default today)"),
+    device_id: Optional[str] = Query(None, description="Device ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-device success / unknown / failed attempt counts per day
+    
+    Reads only daily_device_summary
+    """
+    date_from, date_to, error = _summary_range(date_from, date_to)
+    if error:
+        return error
+    
+    try:
+        items = summary_service.get_device_summaries(db, date_from, date_to, device_id=device_id)
+    except Exception as e:
+        app_logger.error(f"Error querying device summary: {e}")
+        return {"success": False, "message": "내부 오류가 발생했습니다", "reason": "internal_error"}
+    
+    return {
+        "success": True,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "count": len(items),
+        "items": items
+    }
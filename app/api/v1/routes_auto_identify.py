@@ -0,0 +1,116 @@
+"""
+Auto identify endpoints (MODE_A hands-free)
+GET  /identify/auto        - Auto identify status
+POST /identify/auto        - Enable/disable auto identify, switch IN/OUT
+GET  /identify/events      - Server-Sent Events stream of identify results
+WS   /ws/identify          - WebSocket stream of identify results
+"""
+import asyncio
+import json
+from fastapi import APIRouter, Request, WebSocket
+from fastapi.responses import StreamingResponse
+
+from app.schemas.dto import AutoIdentifyConfigRequest
+from app.services.auto_identify import auto_identifier
+from app.services.camera_worker import camera_worker
+from app.services.event_bus import identify_events
+from app.core.logging import app_logger
+
+router = APIRouter()
+
+# SSE keep-alive 주기 (프록시 idle timeout 방지)
+SSE_KEEPALIVE_SEC = 15.0
+
+
+@router.get("/identify/auto")
+async def get_auto_identify():
+    """Auto identify status and counters"""
+    return auto_identifier.get_status()
+
+
+@router.post("/identify/auto")
+async def configure_auto_identify(request: AutoIdentifyConfigRequest):
+    """
+    Enable/disable auto identify or switch attendance type
+
+    Request body:
+    {
+        "enabled": true,   // optional
+        "type": "IN"       // optional, IN | OUT
+    }
+    """
+    if request.type is not None:
+        if request.type.upper() not in ("IN", "OUT"):
+            return {"success": False, "message": "type은 IN 또는 OUT이어야 합니다"}
+        auto_identifier.set_type(request.type)
+
+    if request.enabled is True:
+        if not camera_worker.is_alive():
+            return {"success": False, "message": "카메라를 사용할 수 없습니다", "reason": "camera_unavailable"}
+        auto_identifier.start()
+    elif request.enabled is False:
+        # join이 이벤트 루프를 막지 않도록 스레드에서 정지
+        await asyncio.to_thread(auto_identifier.stop)
+
+    return {"success": True, **auto_identifier.get_status()}
+
+
+@router.get("/identify/events")
+async def identify_events_sse(request: Request):
+    """
+    Server-Sent Events stream of auto identify results
+
+    Each event: `event: identify` with a JSON payload containing the identify
+    result (or already_checked_in/out rejection) and whether attendance was recorded
+    """
+    queue = identify_events.subscribe()
+
+    async def event_stream():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"event: {event.get('event', 'message')}\ndata: {data}\n\n"
+        finally:
+            identify_events.unsubscribe(queue)
+            app_logger.debug("SSE identify subscriber disconnected")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/identify")
+async def identify_events_ws(websocket: WebSocket):
+    """WebSocket stream of auto identify results (server -> client only)"""
+    await websocket.accept()
+    queue = identify_events.subscribe()
+
+    async def sender():
+        while True:
+            event = await queue.get()
+            await websocket.send_json(event)
+
+    async def receiver():
+        # 클라이언트 메시지는 무시하고 연결 종료만 감지
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(sender()), asyncio.create_task(receiver())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # WebSocketDisconnect 등 태스크 예외 회수
+        await asyncio.gather(*tasks, return_exceptions=True)
+        identify_events.unsubscribe(queue)
+        app_logger.debug("WebSocket identify subscriber disconnected")
@@ -1,15 +1,21 @@
 """
-User enrollment endpoint
-POST /enroll - Register new user with auto-generated employee_id
+User enrollment endpoints
+POST /enroll      - Register new user with auto-generated employee_id
+POST /enroll/bulk - Register many users from a zip or a multipart list
 """
+import asyncio
+import io
+import zipfile
 from fastapi import APIRouter, Depends, File, UploadFile, Form
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
+from app.core.config import settings
 from app.db.base import get_db
-from app.services import inference
+from app.services import inference, enroll_bulk
 from app.core.logging import app_logger
 from app.utils.image_io import validate_image_extension
+from app.utils.upload import read_upload
 
 
 router = APIRouter()
@@ -33,15 +39,10 @@ async def enroll_user(
                 "reason": "invalid_format"
             }
         
-        # Read image bytes
-        file_bytes = await image.read()
-        
-        if len(file_bytes) == 0:
-            return {
-                "success": False,
-                "message": "이미지 파일이 비어있습니다",
-                "reason": "empty_file"
-            }
+        # Read image bytes (크기 제한 + 매직 바이트 검사)
+        file_bytes, upload_error = await read_upload(image, settings.UPLOAD_MAX_BYTES)
+        if upload_error is not None:
+            return upload_error
         
         # Enroll user (employee_id will be auto-generated)
         result = inference.enroll_user_with_image(
@@ -59,3 +60,91 @@ async def enroll_user(
             "message": "내부 오류가 발생했습니다",
             "reason": "internal_error"
         }
+
+
+@router.post("/enroll/bulk")
+async def enroll_bulk_users(
+    archive: Optional[UploadFile] = File(None, description="Zip of images (names from manifest.csv or file names)"),
+    images: Optional[List[UploadFile]] = File(None, description="Profile images"),
+    names: Optional[List[str]] = Form(None, description="User names (same order as images)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk enrollment
+    
+    Either `archive` (zip) or `images` + `names` (same length) must be given.
+    Returns per-entry results in input order
+    """
+    try:
+        if archive is not None:
+            data, upload_error = await read_upload(archive, settings.ENROLL_BULK_MAX_BYTES, check_image=False)
+            if upload_error is not None:
+                return upload_error
+            try:
+                # 항목은 파이프라인에서 하나씩 압축 해제되므로 끝날 때까지 zip을 열어 둠
+                with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+                    entries = enroll_bulk.parse_zip(zip_file)
+                    return await _run_bulk(db, entries)
+            except zipfile.BadZipFile:
+                return {
+                    "success": False,
+                    "message": "zip 파일을 읽을 수 없습니다",
+                    "reason": "invalid_archive"
+                }
+            except enroll_bulk.BulkArchiveError as e:
+                return {"success": False, "message": e.message, "reason": e.reason}
+        elif images:
+            if not names or len(names) != len(images):
+                return {
+                    "success": False,
+                    "message": "images와 names의 개수가 같아야 합니다",
+                    "reason": "invalid_request"
+                }
+            # 파일을 메모리로 읽기 전에 개수부터 확인
+            if len(images) > settings.ENROLL_BULK_MAX_ENTRIES:
+                return _too_many_entries()
+            entries = []
+            for i, (name, image) in enumerate(zip(names, images)):
+                data, upload_error = await read_upload(image, settings.UPLOAD_MAX_BYTES)
+                entry = enroll_bulk.BulkEntry(i, name.strip(), image.filename or "", data)
+                if upload_error is not None:
+                    entry.fail(upload_error["reason"], upload_error["message"])
+                entries.append(entry)
+        else:
+            return {
+                "success": False,
+                "message": "archive 또는 images를 업로드해주세요",
+                "reason": "invalid_request"
+            }
+        
+        return await _run_bulk(db, entries)
+        
+    except Exception as e:
+        app_logger.error(f"Error in bulk enroll endpoint: {e}")
+        return {
+            "success": False,
+            "message": "내부 오류가 발생했습니다",
+            "reason": "internal_error"
+        }
+
+
+async def _run_bulk(db: Session, entries: List[enroll_bulk.BulkEntry]):
+    """Check the entry count and run the pipeline off the event loop"""
+    if not entries:
+        return {"success": False, "message": "등록할 이미지가 없습니다", "reason": "empty_file"}
+    if len(entries) > settings.ENROLL_BULK_MAX_ENTRIES:
+        return _too_many_entries()
+    
+    app_logger.info(f"Bulk enroll request: {len(entries)} entries")
+    
+    # CPU 작업은 스레드에서 실행 (이벤트 루프 차단 방지)
+    return await asyncio.to_thread(enroll_bulk.enroll_entries, db, entries)
+
+
+def _too_many_entries():
+    """Error response for a request over ENROLL_BULK_MAX_ENTRIES"""
+    return {
+        "success": False,
+        "message": f"한 번에 최대 {settings.ENROLL_BULK_MAX_ENTRIES}명까지 등록할 수 있습니다",
+        "reason": "too_many_entries"
+    }
@@ -1,30 +1,51 @@
 """
-Health check endpoint
-GET /health - Returns service status and database connectivity
+Health check endpoints
+GET /health        - Service status (cached background probe, no DB access per request)
+GET /health/live   - Liveness (process responds)
+GET /health/ready  - Readiness (DB, model and gallery loaded), 503 until ready
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
 
-from app.db.base import get_db, check_db_connection
 from app.schemas.dto import HealthResponse
+from app.services.health_prober import health_prober
 
 router = APIRouter()
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
     Health check endpoint
     
-    Returns service status and verifies database connection
+    Returns the latest result of the background prober (see HEALTH_PROBE_INTERVAL_SEC)
     """
-    # Check database connection
-    db_ok = check_db_connection()
-    
-    status = "ok" if db_ok else "degraded"
+    result = health_prober.get_result()
     
     return {
-        "status": status,
-        "timestamp": datetime.utcnow().isoformat() + "Z"
+        "status": "ok" if result["db_ok"] else "degraded",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        **result
     }
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe - only checks that the event loop answers
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe - 503 until the model and gallery are loaded, the DB is
+    reachable and the background probe is current
+    """
+    result = health_prober.readiness()
+    # 예외 원문은 내보내지 않음 (/health의 HealthResponse와 동일)
+    result.pop("db_error", None)
+    result["status"] = "ready" if result["ready"] else "not_ready"
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
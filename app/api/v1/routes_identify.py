@@ -6,12 +6,15 @@ from fastapi import APIRouter, Depends, File, UploadFile, Form, Body
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
+import time
 
 from app.db.base import get_db
 from app.schemas.dto import IdentifyRequestJSON
 from app.services import inference
 from app.services import attendance_service
+from app.core.config import settings
 from app.core.logging import app_logger
+from app.utils.upload import read_upload
 
 router = APIRouter()
 
@@ -27,6 +30,7 @@ async def identify_face(
 ):
 
     try:
+        start_time = time.perf_counter()
         
         if json_body is not None:
             
@@ -37,7 +41,7 @@ async def identify_face(
             ts_client_val = json_body.ts_client
             
             
-            result = inference.identify_from_camera(db)
+            result = inference.identify_from_camera(db, max_frame_age_ms=json_body.max_frame_age_ms)
             
         elif image is not None and type is not None:
             
@@ -54,8 +58,10 @@ async def identify_face(
                 except Exception as e:
                     app_logger.warning(f"Failed to parse ts_client: {e}")
             
-            # Read image file
-            file_bytes = await image.read()
+            # Read image file (크기 제한 + 매직 바이트 검사, 초과 시 끝까지 읽지 않음)
+            file_bytes, upload_error = await read_upload(image, settings.UPLOAD_MAX_BYTES)
+            if upload_error is not None:
+                return upload_error
             
             # Identify from upload
             result = inference.identify_from_upload(db, file_bytes)
@@ -69,47 +75,28 @@ async def identify_face(
         
         # Record attendance if identification succeeded
         if result.success:
-            # 출근(IN) 타입이면 오늘 이미 출근했는지 체크
-            if attendance_type.upper() == 'IN':
-                already_checked_in = attendance_service.check_already_checked_in_today(
-                    db=db,
-                    employee_id=result.employee_id
-                )
-                
-                if already_checked_in:
-                    return {
-                        "success": False,
-                        "message": "이미 출근 처리되었습니다",
-                        "reason": "already_checked_in",
-                        "employee_id": result.employee_id,
-                        "name": result.name
-                    }
-            
-            # 퇴근(OUT) 타입이면 오늘 이미 퇴근했는지 체크
-            elif attendance_type.upper() == 'OUT':
-                already_checked_out = attendance_service.check_already_checked_out_today(
-                    db=db,
-                    employee_id=result.employee_id
-                )
-                
-                if already_checked_out:
-                    return {
-                        "success": False,
-                        "message": "이미 퇴근 처리되었습니다",
-                        "reason": "already_checked_out",
-                        "employee_id": result.employee_id,
-                        "name": result.name
-                    }
-            
-            attendance_service.record_success(
+            rejection = attendance_service.record_identified(
                 db=db,
                 employee_id=result.employee_id,
+                name=result.name,
                 type=attendance_type,
                 device_id=device_id_val,
                 distance=result.distance,
                 ts_client=ts_client_val
             )
-        # 실패 시 기록하지 않음 (attendance 테이블에 남기지 않음)
+            
+            if rejection is not None:
+                return rejection
+        else:
+            # 실패 시도는 attendance가 아닌 recognition_attempts에 배치 기록
+            attendance_service.record_attempt_result(
+                db=db,
+                result=result,
+                type=attendance_type,
+                device_id=device_id_val,
+                ts_client=ts_client_val,
+                latency_ms=round((time.perf_counter() - start_time) * 1000, 1)
+            )
         
         return result.to_dict()
         
@@ -0,0 +1,111 @@
+"""
+User endpoints
+GET /users                          - Enrolled users with versioned thumbnail URLs
+GET /users/{employee_id}/thumbnail  - Profile thumbnail (ETag, LRU cached, ?size= avatars)
+GET /users/thumbnails/cache         - Thumbnail cache statistics
+"""
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.orm import Session
+
+from app.db.base import get_db
+from app.db.models import User
+from app.services.thumbnail_cache import normalize_size, thumbnail_cache, thumbnail_etag, thumbnail_version
+
+router = APIRouter()
+
+USERS_MAX_LIMIT = 500
+
+# ?v=가 현재 버전과 같으면 내용이 바뀌지 않으므로 1년 캐시, 아니면 매번 ETag 재검증
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def thumbnail_url(employee_id: str, thumbnail_path: Optional[str]) -> Optional[str]:
+    """Versioned thumbnail URL (cacheable for a year)"""
+    if not thumbnail_path:
+        return None
+    return f"/users/{employee_id}/thumbnail?v={thumbnail_version(thumbnail_path)}"
+
+
+@router.get("/users")
+async def list_users(
+    limit: int = Query(100, ge=1, le=USERS_MAX_LIMIT, description="Page size"),
+    after: Optional[str] = Query(None, description="Last employee_id of the previous page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Enrolled users ordered by employee_id
+
+    thumbnail_url includes the thumbnail version, so browsers can cache it
+    without revalidating. Pass next_after as after to get the next page
+    """
+    query = db.query(User.employee_id, User.name, User.thumbnail_path)
+    if after:
+        query = query.filter(User.employee_id > after)
+    rows = query.order_by(User.employee_id).limit(limit).all()
+
+    return {
+        "success": True,
+        "count": len(rows),
+        "next_after": rows[-1].employee_id if len(rows) == limit else None,
+        "items": [
+            {
+                "employee_id": row.employee_id,
+                "name": row.name,
+                "thumbnail_url": thumbnail_url(row.employee_id, row.thumbnail_path)
+            }
+            for row in rows
+        ]
+    }
+
+
+@router.get("/users/thumbnails/cache")
+async def thumbnail_cache_stats():
+    """Thumbnail LRU statistics"""
+    return {"success": True, **thumbnail_cache.get_stats()}
+
+
+@router.get("/users/{employee_id}/thumbnail")
+async def get_thumbnail(
+    employee_id: str,
+    request: Request,
+    size: Optional[int] = Query(None, ge=1, description="Edge length in px (rounded up: 32, 48, 64, 96, 128, 192, 256)"),
+    v: Optional[str] = Query(None, description="Version from thumbnail_url"),
+    db: Session = Depends(get_db)
+):
+    """
+    Profile thumbnail of one employee as JPEG
+
+    Strong ETag per (thumbnail file, size); If-None-Match answers 304.
+    Encoded bytes come from an in-memory LRU
+    """
+    thumbnail_path = db.query(User.thumbnail_path).filter(User.employee_id == employee_id).scalar()
+    if not thumbnail_path:
+        return JSONResponse(
+            status_code=404,
+            content={"success": False, "message": "썸네일이 없습니다", "reason": "not_found"}
+        )
+
+    size = normalize_size(size)
+    etag = thumbnail_etag(thumbnail_path, size)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if v == thumbnail_version(thumbnail_path) else REVALIDATE_CACHE_CONTROL
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    # 디스크 읽기 / 리사이즈는 이벤트 루프 밖에서 (캐시 적중 시에는 즉시 반환)
+    data = await asyncio.to_thread(thumbnail_cache.get, thumbnail_path, size)
+    if data is None:
+        return JSONResponse(
+            status_code=404,
+            content={"success": False, "message": "썸네일 파일을 찾을 수 없습니다", "reason": "not_found"}
+        )
+
+    return Response(content=data, media_type="image/jpeg", headers=headers)
@@ -0,0 +1,108 @@
+"""
+Request body size limit
+ASGI middleware that answers 413 for multipart uploads and bulk attendance
+bodies over the limit, from Content-Length when present, otherwise as soon
+as the streamed body passes it (the rest of the body is never read)
+"""
+import json
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import app_logger
+
+# 폼 필드 / multipart 경계 여유분
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def body_limit_for(path: str, content_type: bytes = b"multipart/form-data") -> Optional[int]:
+    """Maximum body size for a path (None = not limited here)"""
+    path = path.rstrip("/")
+    if path == "/attendance/bulk":
+        # JSON 배열 / NDJSON 모두
+        return settings.ATTENDANCE_BULK_MAX_BYTES
+    if not content_type.startswith(b"multipart/form-data"):
+        return None
+    if path == "/enroll/bulk":
+        return settings.ENROLL_BULK_MAX_BYTES
+    return settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+
+
+class BodySizeLimitMiddleware:
+    """
+    요청 본문 크기 제한 (multipart/form-data 업로드, /attendance/bulk)
+
+    - Content-Length가 한도를 넘으면 본문을 읽기 전에 413
+    - 청크 전송 등 길이를 모르는 경우 받은 바이트를 세다가 넘는 순간 중단하고 413
+    - 그 밖의 JSON 요청은 제한하지 않음
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        limit = body_limit_for(scope["path"], headers.get(b"content-type", b""))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            app_logger.warning(f"Rejected {scope['path']}: Content-Length {int(content_length)} > {limit}")
+            await self._reject(send, limit)
+            return
+
+        state = {"received": 0, "exceeded": False, "started": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    state["exceeded"] = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # 한도 초과 후 앱이 만든 응답(본문 파싱 오류 400 등)은 버리고 413으로 대체
+            if state["exceeded"] and not state["started"]:
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if state["started"]:
+                raise
+
+        if state["exceeded"] and not state["started"]:
+            app_logger.warning(f"Rejected {scope['path']}: body exceeded {limit} bytes")
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({
+            "success": False,
+            "message": f"요청이 너무 큽니다 (최대 {limit // (1024 * 1024)}MB)",
+            "reason": "too_large"
+        }, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -14,6 +14,12 @@ load_dotenv()
 class Settings(BaseSettings):
     """Global application settings"""
     
+    # Database URL 직접 지정 (비우면 MYSQL_* 설정으로 MySQL URL 구성)
+    # 예: sqlite:///data/attendance.db, sqlite:// (인메모리, 벤치마크/테스트용)
+    DATABASE_URL_OVERRIDE: str = os.getenv("DATABASE_URL", "")
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "True").lower() == "true"
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
     # MySQL Configuration
     MYSQL_HOST: str = os.getenv("MYSQL_HOST", "127.0.0.1")
     MYSQL_PORT: int = int(os.getenv("MYSQL_PORT", "3306"))
@@ -23,9 +29,60 @@ class Settings(BaseSettings):
     MYSQL_POOL_SIZE: int = int(os.getenv("MYSQL_POOL_SIZE", "5"))
     MYSQL_MAX_OVERFLOW: int = int(os.getenv("MYSQL_MAX_OVERFLOW", "10"))
     
+    # 근무일(work_date) 계산 기준 시간대
+    TIMEZONE: str = os.getenv("TIMEZONE", "Asia/Seoul")
+    
+    # 오늘 출퇴근 상태 메모리 캐시 (중복 체크 시 DB 조회 생략)
+    ATTENDANCE_STATE_CACHE: bool = os.getenv("ATTENDANCE_STATE_CACHE", "True").lower() == "true"
+    ATTENDANCE_STATE_REFRESH_SEC: float = float(os.getenv("ATTENDANCE_STATE_REFRESH_SEC", "60"))  # 0 = 근무일 변경 시에만
+    # 이 프로세스만 출퇴근을 기록할 때(워커 1개) True - 캐시에 없으면 write-behind 경로의 DB 확인 생략
+    ATTENDANCE_STATE_SINGLE_WRITER: bool = os.getenv("ATTENDANCE_STATE_SINGLE_WRITER", "False").lower() == "true"
+    
+    # 출퇴근 조회 API 페이지 크기
+    ATTENDANCE_QUERY_DEFAULT_LIMIT: int = int(os.getenv("ATTENDANCE_QUERY_DEFAULT_LIMIT", "50"))
+    ATTENDANCE_QUERY_MAX_LIMIT: int = int(os.getenv("ATTENDANCE_QUERY_MAX_LIMIT", "500"))
+    
+    # 대량 출퇴근 업로드 (POST /attendance/bulk)
+    ATTENDANCE_BULK_CHUNK_SIZE: int = int(os.getenv("ATTENDANCE_BULK_CHUNK_SIZE", "500"))  # 트랜잭션 1개당 행 수
+    ATTENDANCE_BULK_MAX_ITEMS: int = int(os.getenv("ATTENDANCE_BULK_MAX_ITEMS", "50000"))
+    ATTENDANCE_BULK_MAX_BYTES: int = int(os.getenv("ATTENDANCE_BULK_MAX_BYTES", str(32 * 1024 * 1024)))  # 요청 본문 전체
+    
+    # Attendance write-behind (배치 INSERT + 로컬 스풀)
+    ATTENDANCE_WRITE_BEHIND: bool = os.getenv("ATTENDANCE_WRITE_BEHIND", "False").lower() == "true"
+    ATTENDANCE_FLUSH_INTERVAL_MS: int = int(os.getenv("ATTENDANCE_FLUSH_INTERVAL_MS", "200"))
+    ATTENDANCE_FLUSH_MAX_ROWS: int = int(os.getenv("ATTENDANCE_FLUSH_MAX_ROWS", "200"))
+    ATTENDANCE_SPOOL_PATH: str = os.getenv("ATTENDANCE_SPOOL_PATH", "data/attendance_spool.ndjson")
+    
+    # 인식 실패 시도 로그 (recognition_attempts 배치 INSERT)
+    ATTEMPT_LOG_FLUSH_INTERVAL_MS: int = int(os.getenv("ATTEMPT_LOG_FLUSH_INTERVAL_MS", "1000"))
+    ATTEMPT_LOG_FLUSH_MAX_ROWS: int = int(os.getenv("ATTEMPT_LOG_FLUSH_MAX_ROWS", "500"))
+    ATTEMPT_LOG_MAX_QUEUE: int = int(os.getenv("ATTEMPT_LOG_MAX_QUEUE", "10000"))  # 넘치면 오래된 시도부터 버림
+    
     # Face Recognition Settings
     TOLERANCE: float = float(os.getenv("TOLERANCE", "0.6"))
     
+    # 업로드 크기 제한 (초과 시 본문을 끝까지 받지 않고 413)
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # 이미지 1장
+    ENROLL_BULK_MAX_BYTES: int = int(os.getenv("ENROLL_BULK_MAX_BYTES", str(512 * 1024 * 1024)))  # /enroll/bulk 요청 전체
+    
+    # 등록 시 중복 얼굴 검사 (TOLERANCE보다 엄격하게)
+    ENROLL_DUPLICATE_ACTION: str = os.getenv("ENROLL_DUPLICATE_ACTION", "reject")  # reject | attach | off
+    ENROLL_DUPLICATE_TOLERANCE: float = float(os.getenv("ENROLL_DUPLICATE_TOLERANCE", "0.35"))
+    
+    # 일괄 등록 (POST /enroll/bulk)
+    ENROLL_BULK_WORKERS: int = int(os.getenv("ENROLL_BULK_WORKERS", str(min(4, os.cpu_count() or 1))))  # 디코딩/감지/저장 스레드
+    ENROLL_BULK_EMBED_BATCH: int = int(os.getenv("ENROLL_BULK_EMBED_BATCH", "32"))
+    ENROLL_BULK_CHUNK_SIZE: int = int(os.getenv("ENROLL_BULK_CHUNK_SIZE", "200"))  # 트랜잭션 1개당 사용자 수
+    ENROLL_BULK_MAX_ENTRIES: int = int(os.getenv("ENROLL_BULK_MAX_ENTRIES", "2000"))
+    
+    # 썸네일 응답 캐시 (GET /users/{employee_id}/thumbnail, 인코딩된 JPEG LRU)
+    THUMBNAIL_CACHE_MAX_BYTES: int = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # 등록 산출물(임베딩/썸네일) 백그라운드 기록
+    ARTIFACT_IO_WORKERS: int = int(os.getenv("ARTIFACT_IO_WORKERS", "2"))
+    ARTIFACT_WRITE_TIMEOUT_SEC: float = float(os.getenv("ARTIFACT_WRITE_TIMEOUT_SEC", "10"))  # 커밋 전 임베딩 기록 대기 한도
+    ARTIFACT_GC_GRACE_HOURS: float = float(os.getenv("ARTIFACT_GC_GRACE_HOURS", "24"))  # gc_artifacts.py: 이보다 최근 파일은 남김
+    
     # Storage Paths
     IMAGE_DIR: str = os.getenv("IMAGE_DIR", "app/static/images")
     ENCODING_DIR: str = os.getenv("ENCODING_DIR", "app/static/encodings")
@@ -33,6 +90,27 @@ class Settings(BaseSettings):
     # Camera Settings
     STREAM_FPS: int = int(os.getenv("STREAM_FPS", "20"))
     CAMERA_DEVICE_INDEX: int = int(os.getenv("CAMERA_DEVICE_INDEX", "0"))
+    CAMERA_LOW_LATENCY: bool = os.getenv("CAMERA_LOW_LATENCY", "False").lower() == "true"
+    CAMERA_BUFFER_SIZE: int = int(os.getenv("CAMERA_BUFFER_SIZE", "1"))
+    CAMERA_MAX_FRAME_AGE_MS: float = float(os.getenv("CAMERA_MAX_FRAME_AGE_MS", "0"))  # 0 = 제한 없음
+    CAMERA_FRAME_BUFFER: int = int(os.getenv("CAMERA_FRAME_BUFFER", "5"))  # best-of-N 후보로 보관할 최근 프레임 수
+    CAMERA_IDENTIFY_TOP_K: int = int(os.getenv("CAMERA_IDENTIFY_TOP_K", "2"))  # 임베딩까지 시도할 상위 프레임 수
+    CAMERA_SOURCE: str = os.getenv("CAMERA_SOURCE", "device")  # device | video | images | synthetic
+    CAMERA_SOURCE_PATH: str = os.getenv("CAMERA_SOURCE_PATH", "")  # 영상 파일 / 이미지 폴더 / 합성용 얼굴 이미지
+    CAMERA_SOURCE_REALTIME: bool = os.getenv("CAMERA_SOURCE_REALTIME", "True").lower() == "true"
+    CAMERA_SOURCE_LOOP: bool = os.getenv("CAMERA_SOURCE_LOOP", "True").lower() == "true"
+    
+    # Auto Identify Settings (MODE_A hands-free)
+    AUTO_IDENTIFY_ENABLED: bool = os.getenv("AUTO_IDENTIFY_ENABLED", "False").lower() == "true"
+    AUTO_IDENTIFY_TYPE: str = os.getenv("AUTO_IDENTIFY_TYPE", "IN")
+    AUTO_IDENTIFY_DEVICE_ID: str = os.getenv("AUTO_IDENTIFY_DEVICE_ID", "CAMERA_AUTO")
+    AUTO_IDENTIFY_STABLE_FRAMES: int = int(os.getenv("AUTO_IDENTIFY_STABLE_FRAMES", "5"))
+    AUTO_IDENTIFY_MAX_MOVEMENT: float = float(os.getenv("AUTO_IDENTIFY_MAX_MOVEMENT", "0.05"))  # 프레임 너비 대비 비율
+    AUTO_IDENTIFY_COOLDOWN_SEC: float = float(os.getenv("AUTO_IDENTIFY_COOLDOWN_SEC", "30"))
+    AUTO_IDENTIFY_RETRY_SEC: float = float(os.getenv("AUTO_IDENTIFY_RETRY_SEC", "2"))
+    
+    # 헬스 체크 프로버 주기 (/health는 마지막 결과를 메모리에서 응답)
+    HEALTH_PROBE_INTERVAL_SEC: float = float(os.getenv("HEALTH_PROBE_INTERVAL_SEC", "5"))
     
     # Application Settings
     APP_NAME: str = "Face Attendance API"
@@ -41,8 +119,13 @@ class Settings(BaseSettings):
     
     @property
     def DATABASE_URL(self) -> str:
-        """Construct database URL"""
-        return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+        """Construct database URL (DATABASE_URL env wins over MYSQL_*)"""
+        if self.DATABASE_URL_OVERRIDE:
+            return self.DATABASE_URL_OVERRIDE
+        return (
+            f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
+            f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}?charset=utf8mb4"
+        )
     
     class Config:
         case_sensitive = True
@@ -1,30 +1,77 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine, text
+import os
+from typing import Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, StaticPool
 from contextlib import contextmanager
 
 from app.core.config import settings
 from app.core.logging import app_logger
 
-# Database URL
-DATABASE_URL = (
-    f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}"
-    f"@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
-    f"?charset=utf8mb4"
-)
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """
+    Create the engine for a database URL
+    
+    - MySQL (default): QueuePool sized by MYSQL_POOL_SIZE / MYSQL_MAX_OVERFLOW
+    - SQLite file: WAL journal + busy_timeout so the writer threads and
+      request threads can share one file without "database is locked"
+    - SQLite in-memory (sqlite://): single shared connection (StaticPool),
+      otherwise every pooled connection would see its own empty database
+    
+    Args:
+        url: Database URL (default: settings.DATABASE_URL)
+        
+    Returns:
+        SQLAlchemy engine
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            poolclass=QueuePool,
+            pool_size=settings.MYSQL_POOL_SIZE,
+            max_overflow=settings.MYSQL_MAX_OVERFLOW,
+            pool_pre_ping=True,  # Verify connections before using
+            echo=False
+        )
+    
+    in_memory = url.database in (None, "", ":memory:")
+    if in_memory:
+        sqlite_engine = create_engine(
+            url,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            echo=False
+        )
+    else:
+        db_dir = os.path.dirname(url.database)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        sqlite_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0},
+            echo=False
+        )
+    
+    @event.listens_for(sqlite_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}")
+        if settings.SQLITE_WAL and not in_memory:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")  # WAL에서는 커밋마다 fsync 불필요
+        cursor.close()
+    
+    return sqlite_engine
+
 
 # Create engine with connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=settings.MYSQL_POOL_SIZE,
-    max_overflow=settings.MYSQL_MAX_OVERFLOW,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=False
-)
+engine = create_db_engine()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
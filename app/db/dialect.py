@@ -0,0 +1,92 @@
+"""
+Dialect-specific SQL helpers
+MySQL in production, SQLite for local tests
+"""
+from typing import Any, Callable, Dict, List
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+
+def dialect_name(db: Session) -> str:
+    """
+    Name of the dialect bound to a session (mysql, sqlite, ...)
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Dialect name
+    """
+    return db.get_bind().dialect.name
+
+
+def insert_ignore(db: Session, table: Table) -> Insert:
+    """
+    INSERT that silently skips rows violating a unique/primary key
+    
+    - MySQL: INSERT IGNORE
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO NOTHING
+    
+    The statement's rowcount tells how many rows were actually inserted
+    
+    Args:
+        db: Database session (dialect is taken from its bind)
+        table: Target table
+        
+    Returns:
+        Insert statement (add .values(...) and execute)
+        
+    Raises:
+        NotImplementedError: For dialects without an ignore form
+    """
+    name = dialect_name(db)
+    if name in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table).on_conflict_do_nothing()
+    raise NotImplementedError(f"insert_ignore is not supported for dialect '{name}'")
+
+
+def upsert(
+    db: Session,
+    table: Table,
+    values: Dict[str, Any],
+    key_columns: List[str],
+    set_: Callable[[Any], Dict[str, Any]]
+) -> Insert:
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE
+    
+    Args:
+        db: Database session (dialect is taken from its bind)
+        table: Target table
+        values: Row to insert
+        key_columns: Unique/primary key columns (used by ON CONFLICT)
+        set_: Builds the update assignments from the proposed row
+              (`new.<column>`); reference existing values via table.c
+        
+    Returns:
+        Insert statement ready to execute
+        
+    Raises:
+        NotImplementedError: For dialects without an upsert form
+    """
+    name = dialect_name(db)
+    if name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(**values)
+        return stmt.on_duplicate_key_update(**set_(stmt.inserted))
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table).values(**values)
+        return stmt.on_conflict_do_update(index_elements=key_columns, set_=set_(stmt.excluded))
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        stmt = pg_insert(table).values(**values)
+        return stmt.on_conflict_do_update(index_elements=key_columns, set_=set_(stmt.excluded))
+    raise NotImplementedError(f"upsert is not supported for dialect '{name}'")
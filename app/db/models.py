@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Index, UniqueConstraint, PrimaryKeyConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -12,12 +13,51 @@ class User(Base):
     employee_id = Column(String(50), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     profile_image = Column(String(255), nullable=True)  # 프로필 이미지 경로    
-    created_at = Column(DateTime, nullable=False, server_default=func.now())    
+    thumbnail_path = Column(String(255), nullable=True)  # 등록 사진 썸네일 (임베딩 재생성 원본)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())    
     __table_args__ = (
         Index('idx_employee_id', 'employee_id'),
     )
 
 
+class FaceTemplate(Base):
+    """직원별 추가 얼굴 임베딩 (중복 등록 시 기존 직원에 붙인 템플릿)"""
+    __tablename__ = "face_templates"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(String(50), nullable=False)
+    embedding_path = Column(String(255), nullable=False)  # .npy
+    thumbnail_path = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())
+    
+    __table_args__ = (
+        Index('idx_face_templates_employee_id', 'employee_id'),
+    )
+
+
+class StoredArtifact(Base):
+    """콘텐츠 주소 저장소에 기록된 파일 목록 (썸네일/임베딩, GC가 미참조 항목 정리)"""
+    __tablename__ = "stored_artifacts"
+    
+    path = Column(String(255), primary_key=True)  # 상대 경로 (users / face_templates에 저장되는 값)
+    kind = Column(String(20), nullable=False)     # embedding, thumbnail
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())
+    
+    __table_args__ = (
+        Index('idx_stored_artifacts_created_at', 'created_at'),
+    )
+
+
+class IdSequence(Base):
+    """이름별 번호 카운터 (직원 ID 등 순번 발급, id_allocator가 단일 UPDATE로 증가)"""
+    __tablename__ = "id_sequences"
+    
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False)  # 다음에 발급할 번호
+
+
 class Attendance(Base):
     __tablename__ = "attendance"
     
@@ -26,11 +66,72 @@ class Attendance(Base):
     type = Column(String(10), nullable=False)  # IN, OUT
     device_id = Column(String(50), nullable=True)
     distance = Column(Float, nullable=True)
-    ts_server = Column(DateTime, nullable=False, server_default=func.now())
+    ts_server = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())
     ts_client = Column(DateTime, nullable=True)
     image_ref = Column(String(255), nullable=True)
+    work_date = Column(Date, nullable=True)  # 회사 시간대(TIMEZONE) 기준 근무일
     
     __table_args__ = (
         Index('idx_attendance_employee_id', 'employee_id'),
-        Index('idx_attendance_ts_server', 'ts_server'),
-    )
\ No newline at end of file
+        # 조회 API keyset pagination (ts_server DESC, id DESC)용
+        Index('idx_attendance_ts_id', 'ts_server', 'id'),
+        Index('idx_attendance_emp_ts_id', 'employee_id', 'ts_server', 'id'),
+        Index('idx_attendance_device_ts_id', 'device_id', 'ts_server', 'id'),
+        # 직원별 하루 IN/OUT 1건
+        UniqueConstraint('employee_id', 'work_date', 'type', name='uq_attendance_emp_date_type'),
+        # 오늘 상태 캐시 로드용 (근무일 기준 커버링 인덱스)
+        Index('idx_attendance_date_type_emp', 'work_date', 'type', 'employee_id'),
+    )
+
+
+class RecognitionAttempt(Base):
+    """미등록/실패 인식 시도 감사 로그 (append-only, attendance와 분리)"""
+    __tablename__ = "recognition_attempts"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts_server = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())
+    outcome = Column(String(20), nullable=False)   # unknown | failed
+    reason = Column(String(50), nullable=False)    # unknown, no_face, multi_face, bad_quality, ...
+    type = Column(String(10), nullable=True)       # 시도한 IN / OUT
+    device_id = Column(String(50), nullable=True)
+    min_distance = Column(Float, nullable=True)    # 가장 가까운 등록 얼굴과의 거리
+    latency_ms = Column(Float, nullable=True)      # 인식 처리 시간
+    image_ref = Column(String(255), nullable=True)
+    ts_client = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_attempts_ts', 'ts_server'),
+        Index('idx_attempts_device_ts', 'device_id', 'ts_server'),
+    )
+
+
+class DailyAttendanceSummary(Base):
+    """직원별 일간 요약 (출퇴근 기록 시 증분 갱신, rebuild_summaries.py로 재계산)"""
+    __tablename__ = "daily_attendance_summary"
+    
+    work_date = Column(Date, nullable=False)
+    employee_id = Column(String(50), nullable=False)
+    first_in = Column(DateTime, nullable=True)   # 가장 이른 IN
+    last_out = Column(DateTime, nullable=True)   # 가장 늦은 OUT
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now(), onupdate=datetime.now)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('work_date', 'employee_id'),
+        Index('idx_daily_summary_emp_date', 'employee_id', 'work_date'),
+    )
+
+
+class DailyDeviceSummary(Base):
+    """디바이스별 일간 시도 건수 (성공 / 미등록 / 실패)"""
+    __tablename__ = "daily_device_summary"
+    
+    work_date = Column(Date, nullable=False)
+    device_id = Column(String(50), nullable=False)  # 디바이스 미지정은 ''
+    success_count = Column(Integer, nullable=False, default=0)
+    unknown_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now(), onupdate=datetime.now)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('work_date', 'device_id'),
+    )
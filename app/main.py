@@ -11,12 +11,23 @@ import logging
 
 from app.core.config import settings
 from app.core.cors import get_cors_origins, CORS_CONFIG
+from app.core.body_limit import BodySizeLimitMiddleware
 from app.core.logging import setup_logging, app_logger
-from app.db.base import init_db
+from app.db.base import init_db, SessionLocal
 from app.services.camera_worker import camera_worker
+from app.services.auto_identify import auto_identifier
+from app.services.attendance_writer import attendance_writer
+from app.services.attendance_service import daily_state
+from app.services.attempt_log import attempt_logger
+from app.services.gallery import gallery
+from app.services.health_prober import health_prober
+from app.services.artifact_writer import artifact_writer
 
 # Import routers
-from app.api.v1 import routes_health, routes_stream, routes_identify, routes_enroll, routes_attendance, routes_capture
+from app.api.v1 import (
+    routes_health, routes_stream, routes_identify, routes_enroll, routes_attendance, routes_capture,
+    routes_auto_identify, routes_users
+)
 
 
 # Health 체크 로그 필터
@@ -48,6 +59,23 @@ async def lifespan(app: FastAPI):
         app_logger.error(f"Failed to initialize database: {e}")
         # Don't fail startup - allow app to run even if DB init fails
     
+    # Load today's attendance state cache and the embedding gallery
+    db = SessionLocal()
+    try:
+        if daily_state.enabled:
+            daily_state.load(db)
+        gallery.load(db)
+    finally:
+        db.close()
+    
+    # Start batched recognition attempt log
+    attempt_logger.start()
+    
+    # Start attendance write-behind writer (replays spooled rows from a previous run)
+    if settings.ATTENDANCE_WRITE_BEHIND:
+        if not attendance_writer.start():
+            app_logger.warning("Attendance writer failed to start - recording synchronously")
+    
     # Start camera worker (MODE_A)
     # Note: Camera may not be available - app should still work in upload mode
     camera_started = camera_worker.start()
@@ -57,6 +85,16 @@ async def lifespan(app: FastAPI):
         app_logger.warning("Camera worker failed to start - MODE_A (camera) features will be unavailable")
         app_logger.warning("Server will operate in MODE_B (upload) only")
     
+    # Start auto identify (MODE_A hands-free)
+    if settings.AUTO_IDENTIFY_ENABLED:
+        if camera_started:
+            auto_identifier.start()
+        else:
+            app_logger.warning("Auto identify enabled but camera is unavailable - not started")
+    
+    # Start background health prober (/health, /health/ready answer from its cache)
+    health_prober.start()
+    
     app_logger.info("Application startup complete")
     
     yield
@@ -64,11 +102,23 @@ async def lifespan(app: FastAPI):
     # Shutdown
     app_logger.info("Shutting down application...")
     
+    health_prober.stop()
+    
+    # Stop auto identify before the camera it reads from
+    auto_identifier.stop()
+    
     # Stop camera worker
     if camera_worker.is_alive():
         camera_worker.stop()
         app_logger.info("Camera worker stopped")
     
+    # Flush queued attendance rows / attempts last (identify may still enqueue until here)
+    attendance_writer.stop()
+    attempt_logger.stop()
+    
+    # Finish background thumbnail/embedding writes
+    artifact_writer.shutdown()
+    
     app_logger.info("Application shutdown complete")
 
 
@@ -88,6 +138,9 @@ app.add_middleware(
     **CORS_CONFIG
 )
 
+# 업로드 본문 크기 제한 (UPLOAD_MAX_BYTES, ENROLL_BULK_MAX_BYTES)
+app.add_middleware(BodySizeLimitMiddleware)
+
 # Mount static files
 if os.path.exists(settings.IMAGE_DIR):
     app.mount("/static/images", StaticFiles(directory=settings.IMAGE_DIR), name="images")
@@ -97,8 +150,10 @@ app.include_router(routes_health.router, tags=["Health"])
 app.include_router(routes_stream.router, tags=["Stream"])
 app.include_router(routes_capture.router, tags=["Capture"])
 app.include_router(routes_identify.router, tags=["Identify"])
+app.include_router(routes_auto_identify.router, tags=["Auto Identify"])
 app.include_router(routes_enroll.router, tags=["Enroll"])
 app.include_router(routes_attendance.router, tags=["Attendance"])
+app.include_router(routes_users.router, tags=["Users"])
 
 
 @app.get("/")
@@ -112,7 +167,9 @@ async def root():
             "health": "/health",
             "stream": "/stream.mjpeg",
             "identify": "/identify (POST)",
+            "identify_events": "/identify/events (SSE), /ws/identify (WebSocket)",
             "enroll": "/enroll (POST)",
+            "users": "/users, /users/{employee_id}/thumbnail",
             "attendance": "/attendance (POST)",
             "docs": "/docs",
             "redoc": "/redoc"
@@ -12,6 +12,14 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str = Field(..., description="Service status")
     timestamp: str = Field(..., description="Current timestamp (ISO format)")
+    camera_alive: bool = Field(False, description="Camera capture thread running")
+    frame_age_ms: Optional[float] = Field(None, description="Age of the latest camera frame (ms)")
+    db_ok: bool = Field(False, description="Database reachable at the last probe")
+    model_ready: bool = Field(False, description="Embedding model loaded")
+    gallery_size: int = Field(0, description="Number of loaded embeddings")
+    gallery_failed: int = Field(0, description="Embeddings that failed to load")
+    checked_at: Optional[str] = Field(None, description="Time of the last background probe")
+    check_age_ms: Optional[float] = Field(None, description="Age of the cached probe result (ms)")
 
 
 # ===== Identify =====
@@ -21,6 +29,13 @@ class IdentifyRequestJSON(BaseModel):
     type: str = Field(..., description="Attendance type: IN or OUT")
     device_id: Optional[str] = Field(None, description="Device identifier")
     ts_client: Optional[datetime] = Field(None, description="Client timestamp")
+    max_frame_age_ms: Optional[float] = Field(None, description="Reject camera frames older than this (ms)")
+
+
+class AutoIdentifyConfigRequest(BaseModel):
+    """Auto identify configuration request (MODE_A hands-free)"""
+    enabled: Optional[bool] = Field(None, description="Start or stop auto identify")
+    type: Optional[str] = Field(None, description="Attendance type recorded by auto identify: IN or OUT")
 
 
 class IdentifyResponseSuccess(BaseModel):
@@ -32,6 +47,7 @@ class IdentifyResponseSuccess(BaseModel):
     distance: float = Field(..., description="Face recognition distance")
     decided_threshold: float = Field(..., description="Decision threshold used")
     message: str = Field(..., description="Success message")
+    frame_age_ms: Optional[float] = Field(None, description="Camera frame age at identify time (MODE_A)")
 
 
 class IdentifyResponseFailure(BaseModel):
@@ -40,6 +56,7 @@ class IdentifyResponseFailure(BaseModel):
     message: str = Field(..., description="Error message")
     reason: Optional[str] = Field(None, description="Failure reason code")
     min_distance: Optional[float] = Field(None, description="Minimum distance to known faces")
+    frame_age_ms: Optional[float] = Field(None, description="Camera frame age at identify time (MODE_A)")
 
 
 # ===== Enroll =====
@@ -74,6 +91,7 @@ class AttendanceResponse(BaseModel):
     """Attendance logging response"""
     success: bool = Field(..., description="Operation success")
     message: str = Field(..., description="Response message")
+    reason: Optional[str] = Field(None, description="Failure reason code")
 
 
 # ===== Error Response =====
@@ -0,0 +1,226 @@
+"""
+Artifact store
+Content-addressed storage for thumbnails and embeddings: files are named by
+the SHA-256 of their bytes, sharded two levels deep, and listed in the
+stored_artifacts table so unreferenced files can be garbage collected
+"""
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.dialect import insert_ignore
+from app.db.models import FaceTemplate, StoredArtifact, User
+from app.utils.atomic_io import atomic_write_bytes
+from app.utils.image_io import create_thumbnail, encode_jpeg
+from app.utils.paths import get_content_path, get_relative_path
+
+KIND_EMBEDDING = "embedding"
+KIND_THUMBNAIL = "thumbnail"
+
+THUMBNAIL_SIZE = (300, 300)
+
+
+class Artifact:
+    """저장할 파일 1개 (인코딩된 바이트 + 콘텐츠 해시로 정해진 경로)"""
+
+    def __init__(self, kind: str, data: bytes, extension: str):
+        self.kind = kind
+        self.data = data
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        base_dir = settings.ENCODING_DIR if kind == KIND_EMBEDDING else settings.IMAGE_DIR
+        self.path = get_content_path(base_dir, self.sha256, extension)
+        self.relative_path = get_relative_path(self.path)
+
+    def manifest_row(self) -> Dict[str, Any]:
+        return {
+            "path": self.relative_path,
+            "kind": self.kind,
+            "sha256": self.sha256,
+            "size_bytes": len(self.data)
+        }
+
+
+def prepare_embedding(embedding: np.ndarray) -> Artifact:
+    """Serialize an embedding to .npy bytes and name it by content"""
+    buffer = io.BytesIO()
+    np.save(buffer, embedding)
+    return Artifact(KIND_EMBEDDING, buffer.getvalue(), "npy")
+
+
+def prepare_thumbnail(bgr_image: np.ndarray) -> Optional[Artifact]:
+    """Shrink and JPEG-encode a thumbnail and name it by content"""
+    data = encode_jpeg(create_thumbnail(bgr_image, max_size=THUMBNAIL_SIZE))
+    if data is None:
+        return None
+    return Artifact(KIND_THUMBNAIL, data, "jpg")
+
+
+def prepare_file(path: str, kind: str) -> Artifact:
+    """Existing file -> artifact with the same bytes (migration / re-embedding)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return Artifact(kind, data, os.path.splitext(path)[1] or ".bin")
+
+
+def write(artifact: Artifact) -> bool:
+    """
+    Write an artifact atomically (skipped if the same content already exists)
+
+    Args:
+        artifact: Prepared artifact
+
+    Returns:
+        True once the file is durable
+    """
+    try:
+        if os.path.exists(artifact.path) and os.path.getsize(artifact.path) == len(artifact.data):
+            # 같은 내용 = 같은 파일, 재사용 시각을 남겨 GC 유예 시간 동안 보호
+            os.utime(artifact.path)
+            return True
+        atomic_write_bytes(artifact.path, artifact.data)
+        return True
+    except Exception as e:
+        app_logger.error(f"Error writing {artifact.kind} {artifact.path}: {e}")
+        return False
+
+
+def register(db: Session, artifacts: Iterable[Optional[Artifact]]):
+    """
+    Add artifacts to the manifest in the caller's transaction
+
+    Args:
+        db: Database session (not committed here)
+        artifacts: Artifacts (None entries are skipped)
+    """
+    register_rows(db, [a.manifest_row() for a in artifacts if a is not None])
+
+
+def register_rows(db: Session, rows: List[Dict[str, Any]]):
+    """Insert manifest rows, skipping paths already listed (caller commits)"""
+    rows = list({row["path"]: row for row in rows}.values())
+    if rows:
+        db.execute(insert_ignore(db, StoredArtifact.__table__), rows)
+
+
+def stored_manifest_row(relative_path: str, kind: str) -> Dict[str, Any]:
+    """Manifest row for a file already written by this store (hash = file name)"""
+    return {
+        "path": relative_path,
+        "kind": kind,
+        "sha256": os.path.splitext(os.path.basename(relative_path))[0],
+        "size_bytes": os.path.getsize(relative_path)
+    }
+
+
+def referenced_paths(db: Session) -> Set[str]:
+    """Every path users / face_templates point at (normalized)"""
+    columns = [User.profile_image, User.thumbnail_path, FaceTemplate.embedding_path, FaceTemplate.thumbnail_path]
+    paths = set()
+    for column in columns:
+        for (path,) in db.query(column).filter(column.isnot(None)):
+            paths.add(os.path.normpath(path))
+    return paths
+
+
+def _remove_file(path: str) -> bool:
+    """Delete a file and its emptied shard directories"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    # 비게 된 샤드 디렉터리(xx/yy)만 정리, 기본 디렉터리는 건드리지 않음
+    directory = os.path.dirname(path)
+    for _ in range(2):
+        if len(os.path.basename(directory)) != 2:
+            break
+        try:
+            os.rmdir(directory)  # 비어 있을 때만 성공
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+    return True
+
+
+def collect_garbage(
+    db: Session,
+    grace: timedelta,
+    dry_run: bool = False,
+    include_untracked: bool = False,
+    protected: Optional[Set[str]] = None
+) -> Dict[str, Any]:
+    """
+    Remove thumbnails / embeddings that no user or face template references
+
+    Only files older than `grace` (manifest time and file mtime) are touched,
+    so artifacts of an enrollment that has written or reused a file but not
+    committed yet are kept
+
+    Args:
+        db: Database session
+        grace: Minimum age of a removable file
+        dry_run: Only count, delete nothing
+        include_untracked: Also scan IMAGE_DIR / ENCODING_DIR for files that
+            are not in the manifest (legacy flat files, leftover temp files)
+        protected: Extra paths to keep (e.g. an unfinished re-embedding)
+
+    Returns:
+        Counts of removed manifest rows / files and freed bytes
+    """
+    keep = referenced_paths(db) | {os.path.normpath(p) for p in (protected or ())}
+    cutoff = datetime.now() - grace
+    stats = {"manifest_removed": 0, "untracked_removed": 0, "bytes_freed": 0, "kept": 0}
+
+    cutoff_ts = cutoff.timestamp()
+
+    def recently_used(path: str) -> bool:
+        try:
+            return os.path.getmtime(path) >= cutoff_ts
+        except OSError:
+            return False
+
+    # 1. 매니페스트에 있으나 참조되지 않는 파일
+    orphans: List[StoredArtifact] = []
+    for artifact in db.query(StoredArtifact).filter(StoredArtifact.created_at < cutoff).yield_per(1000):
+        if os.path.normpath(artifact.path) in keep or recently_used(artifact.path):
+            stats["kept"] += 1
+        else:
+            orphans.append(artifact)
+
+    for artifact in orphans:
+        if not dry_run:
+            _remove_file(artifact.path)
+            db.delete(artifact)
+        stats["manifest_removed"] += 1
+        stats["bytes_freed"] += artifact.size_bytes
+    if not dry_run:
+        db.commit()
+
+    # 2. 매니페스트 밖의 파일 (이전 평면 구조, 중단된 기록의 임시 파일)
+    if include_untracked:
+        tracked = {os.path.normpath(path) for (path,) in db.query(StoredArtifact.path)}
+        for base_dir in (settings.IMAGE_DIR, settings.ENCODING_DIR):
+            for root, _, files in os.walk(base_dir):
+                for filename in files:
+                    path = os.path.normpath(get_relative_path(os.path.join(root, filename)))
+                    if path in keep or path in tracked:
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if stat.st_mtime >= cutoff_ts:
+                        continue
+                    if not dry_run:
+                        _remove_file(path)
+                    stats["untracked_removed"] += 1
+                    stats["bytes_freed"] += stat.st_size
+
+    app_logger.info(f"Artifact GC{' (dry run)' if dry_run else ''}: {stats}")
+    return stats
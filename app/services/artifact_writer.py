@@ -0,0 +1,94 @@
+"""
+Artifact writer
+Background I/O executor for enrollment files (embeddings, thumbnails)
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.services import artifact_store
+from app.services.artifact_store import Artifact
+
+
+class ArtifactWriter:
+    """
+    등록 산출물 백그라운드 기록
+
+    - write_embedding(): Future 반환, 호출자는 DB 커밋 직전에만 결과를 기다림
+    - write_thumbnail(): 기다리지 않음 (응답 후 기록)
+    - 경로는 호출 전에 콘텐츠 해시로 정해짐 (artifact_store.prepare_*), 여기서는 기록만
+    - 모든 파일은 임시 파일 + fsync + rename (artifact_store.write)
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.written = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.ARTIFACT_IO_WORKERS),
+                    thread_name_prefix="artifact-io"
+                )
+            return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            self.pending += 1
+        future = self._get_executor().submit(fn, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        ok = not future.cancelled() and future.exception() is None and future.result()
+        with self._lock:
+            self.pending -= 1
+            if ok:
+                self.written += 1
+            else:
+                self.failed += 1
+
+    def write_embedding(self, artifact: Artifact) -> Future:
+        """
+        Start writing an embedding file
+
+        Returns:
+            Future resolving to True once the file is durable
+        """
+        return self._submit(artifact_store.write, artifact)
+
+    def write_thumbnail(self, artifact: Optional[Artifact]) -> Optional[Future]:
+        """Write a thumbnail in the background (fire and forget)"""
+        if artifact is None:
+            return None
+        future = self._submit(artifact_store.write, artifact)
+        future.add_done_callback(lambda f: _log_failure(f, artifact.path))
+        return future
+
+    def shutdown(self):
+        """Finish pending writes and stop the executor"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+            app_logger.info(f"Artifact writer stopped (written={self.written}, failed={self.failed})")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pending": self.pending, "written": self.written, "failed": self.failed}
+
+
+def _log_failure(future: Future, filepath: str):
+    if future.exception() is not None or not future.result():
+        app_logger.warning(f"Artifact write failed: {filepath}")
+
+
+# Global artifact writer instance
+artifact_writer = ArtifactWriter()
@@ -0,0 +1,188 @@
+"""
+Recognition attempt log
+Batches unknown/failed identify attempts into the recognition_attempts table
+"""
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.base import SessionLocal
+from app.db.models import RecognitionAttempt
+from app.services import summary_service
+from app.utils.dates import work_date
+
+
+class AttemptLogger:
+    """
+    인식 실패 시도 배치 기록
+
+    - log(): 메모리 큐에 추가만 하고 바로 반환 (요청 경로에서 커밋 없음)
+    - 백그라운드 스레드가 FLUSH_INTERVAL_MS 또는 FLUSH_MAX_ROWS마다 multi-row INSERT
+    - 감사 로그이므로 큐가 넘치면 가장 오래된 시도부터 버림 (dropped로 집계)
+    - 스레드가 돌지 않을 때(스크립트 등)는 바로 기록
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.ATTEMPT_LOG_FLUSH_INTERVAL_MS / 1000.0
+        self.flush_max_rows = max(1, settings.ATTEMPT_LOG_FLUSH_MAX_ROWS)
+
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.last_error: Optional[str] = None
+
+        self._cond = threading.Condition()
+        self._queue: deque = deque(maxlen=max(self.flush_max_rows, settings.ATTEMPT_LOG_MAX_QUEUE))
+
+        self.logged = 0
+        self.flushed_rows = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        self.last_flush_ms: Optional[float] = None
+
+    def start(self) -> bool:
+        """Start the flush thread"""
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="attempt-log")
+        self.thread.start()
+        app_logger.info(f"Attempt logger started (interval={self.flush_interval * 1000:.0f}ms)")
+        return True
+
+    def stop(self):
+        """Flush what is queued and stop the thread"""
+        if not self.running:
+            return
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+        app_logger.info("Attempt logger stopped")
+
+    def is_alive(self) -> bool:
+        """기록 스레드 정상 동작 확인"""
+        return bool(self.running and self.thread and self.thread.is_alive())
+
+    def log(
+        self,
+        outcome: str,
+        reason: str,
+        type: Optional[str] = None,
+        device_id: Optional[str] = None,
+        min_distance: Optional[float] = None,
+        latency_ms: Optional[float] = None,
+        image_ref: Optional[str] = None,
+        ts_client: Optional[datetime] = None
+    ) -> bool:
+        """
+        Record one unknown/failed attempt
+
+        Args:
+            outcome: 'unknown' or 'failed'
+            reason: Reason code (unknown, no_face, bad_quality, ...)
+            type: Attempted type ('IN' or 'OUT')
+            device_id: Optional device identifier
+            min_distance: Optional minimum distance to known faces
+            latency_ms: Optional identify latency
+            image_ref: Optional reference to saved image
+            ts_client: Optional client timestamp
+
+        Returns:
+            True if queued (or written)
+        """
+        row = {
+            "ts_server": datetime.now(),
+            "outcome": outcome,
+            "reason": reason.lower(),
+            "type": type.upper() if type else None,
+            "device_id": device_id,
+            "min_distance": min_distance,
+            "latency_ms": latency_ms,
+            "image_ref": image_ref,
+            "ts_client": ts_client
+        }
+
+        if not self.is_alive():
+            return self._flush([row])
+
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(row)
+            self.logged += 1
+            if len(self._queue) >= self.flush_max_rows:
+                self._cond.notify_all()
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and counters"""
+        with self._cond:
+            queue_depth = len(self._queue)
+        return {
+            "running": self.is_alive(),
+            "queue_depth": queue_depth,
+            "logged": self.logged,
+            "flushed_rows": self.flushed_rows,
+            "dropped": self.dropped,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error
+        }
+
+    def _loop(self):
+        """Flush loop (runs in background thread)"""
+        while True:
+            with self._cond:
+                if self.running and len(self._queue) < self.flush_max_rows:
+                    self._cond.wait(timeout=self.flush_interval)
+                if not self._queue:
+                    if not self.running:
+                        break
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.flush_max_rows, len(self._queue)))]
+
+            if not self._flush(batch):
+                if not self.running:
+                    break
+                # 다음 주기에 재시도 (큐가 넘치면 오래된 것부터 버려짐)
+                with self._cond:
+                    free = self._queue.maxlen - len(self._queue)
+                    if len(batch) > free:
+                        self.dropped += len(batch) - free
+                        batch = batch[len(batch) - free:]
+                    self._queue.extendleft(reversed(batch))
+                time.sleep(1.0)
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> bool:
+        """Insert a batch and bump the per-device daily counters in one transaction"""
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(RecognitionAttempt.__table__.insert(), batch)
+
+            counts = Counter((work_date(row["ts_server"]), row["device_id"], row["outcome"]) for row in batch)
+            for (day, device_id, outcome), amount in counts.items():
+                summary_service.apply_attempt(db, device_id, outcome, day=day, amount=amount)
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.flush_errors += 1
+            self.last_error = f"Attempt log flush failed: {e}"
+            app_logger.error(self.last_error)
+            return False
+        finally:
+            db.close()
+
+        self.flushed_rows += len(batch)
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+        return True
+
+
+# Global attempt logger instance
+attempt_logger = AttemptLogger()
@@ -0,0 +1,171 @@
+"""
+Bulk attendance ingestion
+Validates, dedups and inserts attendance backlogs (offline kiosks, badge readers)
+in chunked multi-row statements
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.logging import app_logger
+from app.db.dialect import insert_ignore
+from app.db.models import Attendance
+from app.schemas.dto import AttendanceRequest
+from app.services import summary_service
+from app.services.attendance_service import daily_state
+from app.utils.dates import to_server_local, work_date
+
+AttendanceKey = Tuple[str, date, str]  # (employee_id, work_date, type)
+
+
+def validate_item(index: int, data: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Validate one raw bulk item
+
+    Args:
+        index: Position in the request
+        data: Parsed JSON value
+
+    Returns:
+        (row, None) if valid, (None, result) with the error otherwise
+    """
+    try:
+        item = AttendanceRequest.model_validate(data)
+    except ValidationError as e:
+        first = e.errors()[0]
+        field = ".".join(str(p) for p in first.get("loc", ()))
+        return None, item_result(index, "invalid", "invalid_item", f"{field}: {first.get('msg')}")
+
+    attendance_type = item.type.upper()
+    if attendance_type not in ("IN", "OUT"):
+        return None, item_result(index, "invalid", "invalid_type", "type은 IN 또는 OUT이어야 합니다")
+
+    # 오프라인 백로그는 실제 발생 시각(ts_client)을 ts_server로 기록
+    # (요약의 first_in/last_out, 조회/내보내기 정렬, 요약 재계산이 모두 ts_server 기준)
+    # 클라이언트 시계가 앞서 있으면 업로드 시각으로 제한
+    now = datetime.now()
+    event_time = min(to_server_local(item.ts_client), now) if item.ts_client else now
+    return {
+        "index": index,
+        "employee_id": item.employee_id,
+        "type": attendance_type,
+        "device_id": item.device_id,
+        "distance": item.distance,
+        "image_ref": item.image_ref,
+        "ts_server": event_time,
+        "ts_client": item.ts_client,
+        "work_date": work_date(event_time)
+    }, None
+
+
+def insert_chunk(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Dedup and insert one chunk of validated rows in a single transaction
+
+    1. duplicates inside the chunk are dropped
+    2. one SELECT finds keys that already exist in the database
+    3. the rest go in with one multi-row INSERT IGNORE (row by row only if
+       another writer raced us between the SELECT and the INSERT)
+
+    Args:
+        db: Database session
+        rows: Rows from validate_item
+
+    Returns:
+        Per-item results (same order as rows)
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+
+    # 1. 요청 내 중복
+    candidates: Dict[AttendanceKey, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["employee_id"], row["work_date"], row["type"])
+        if key in candidates:
+            results[row["index"]] = _duplicate(row)
+        else:
+            candidates[key] = row
+
+    try:
+        # 2. 이미 DB에 있는 기록 (employee/work_date IN 목록으로 조회 후 정확한 키는 Python에서 비교)
+        existing = set()
+        if candidates:
+            employee_ids = {k[0] for k in candidates}
+            work_dates = {k[1] for k in candidates}
+            existing = {
+                tuple(r) for r in db.query(Attendance.employee_id, Attendance.work_date, Attendance.type)
+                .filter(
+                    Attendance.employee_id.in_(employee_ids),
+                    Attendance.work_date.in_(work_dates)
+                ).all()
+            }
+
+        new_rows = []
+        for key, row in candidates.items():
+            if key in existing:
+                results[row["index"]] = _duplicate(row)
+            else:
+                new_rows.append(row)
+
+        # 3. multi-row INSERT IGNORE
+        inserted_rows = new_rows
+        if new_rows:
+            values = [_db_values(row) for row in new_rows]
+            inserted = db.execute(insert_ignore(db, Attendance.__table__).values(values)).rowcount
+            if inserted != len(new_rows):
+                db.rollback()
+                inserted_rows = [
+                    row for row in new_rows
+                    if db.execute(insert_ignore(db, Attendance.__table__).values(_db_values(row))).rowcount
+                ]
+
+            for row in inserted_rows:
+                summary_service.apply_success(
+                    db, row["employee_id"], row["type"], row["device_id"], row["ts_server"], row["work_date"]
+                )
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        app_logger.error(f"Bulk attendance chunk failed: {e}")
+        for row in candidates.values():
+            results.setdefault(row["index"], item_result(row["index"], "error", "internal_error", "저장 실패"))
+        return [results[row["index"]] for row in rows]
+
+    inserted_keys = {(r["employee_id"], r["work_date"], r["type"]) for r in inserted_rows}
+    for key, row in candidates.items():
+        daily_state.mark(row["employee_id"], row["type"], row["work_date"])
+        if key in inserted_keys:
+            results[row["index"]] = item_result(row["index"], "recorded", employee_id=row["employee_id"])
+        else:
+            results.setdefault(row["index"], _duplicate(row))
+
+    return [results[row["index"]] for row in rows]
+
+
+def _db_values(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in row.items() if k != "index"}
+
+
+def _duplicate(row: Dict[str, Any]) -> Dict[str, Any]:
+    reason = "already_checked_in" if row["type"] == "IN" else "already_checked_out"
+    return item_result(row["index"], "duplicate", reason, employee_id=row["employee_id"])
+
+
+def item_result(
+    index: int,
+    status: str,
+    reason: Optional[str] = None,
+    message: Optional[str] = None,
+    employee_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Per-item result entry (status: recorded | duplicate | invalid | error)"""
+    result = {"index": index, "success": status == "recorded", "status": status}
+    if employee_id is not None:
+        result["employee_id"] = employee_id
+    if reason:
+        result["reason"] = reason
+    if message:
+        result["message"] = message
+    return result
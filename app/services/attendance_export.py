@@ -0,0 +1,146 @@
+"""
+Attendance export service
+Streams attendance rows as CSV or NDJSON in constant memory
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from app.core.logging import app_logger
+from app.db.base import SessionLocal
+from app.db.models import Attendance
+from app.services.attendance_service import apply_attendance_filters
+
+EXPORT_COLUMNS = ["id", "employee_id", "type", "device_id", "distance", "ts_server", "ts_client", "work_date", "image_ref"]
+
+# 서버 측 커서에서 한 번에 가져올 행 수
+EXPORT_FETCH_SIZE = 2000
+
+# 이 크기만큼 모이면 청크로 내보냄
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def _format_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(
+    employee_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Iterator[tuple]:
+    """
+    Iterate attendance rows (oldest first) through a server-side cursor
+
+    Uses its own session because the response body is produced after the
+    request's session has been closed
+
+    Yields:
+        Tuples in EXPORT_COLUMNS order
+    """
+    db = SessionLocal()
+    try:
+        query = apply_attendance_filters(
+            db.query(*[getattr(Attendance, c) for c in EXPORT_COLUMNS]),
+            employee_id=employee_id,
+            device_id=device_id,
+            type=type,
+            date_from=date_from,
+            date_to=date_to
+        ).order_by(Attendance.ts_server, Attendance.id)
+
+        # stream_results: MySQL SSCursor로 결과를 나눠 받음 (전체를 메모리에 올리지 않음)
+        query = query.execution_options(stream_results=True, yield_per=EXPORT_FETCH_SIZE)
+        for row in query:
+            yield tuple(row)
+    finally:
+        db.close()
+
+
+def _encode_chunks(rows: Iterator[tuple], fmt: str) -> Iterator[bytes]:
+    """Serialize rows into ~EXPORT_CHUNK_BYTES text chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    if writer is not None:
+        writer.writerow(EXPORT_COLUMNS)
+
+    for row in rows:
+        values = [_format_value(v) for v in row]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+            buffer.write("\n")
+
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Gzip-compress a chunk stream (wbits=31 -> gzip container)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(
+    fmt: str = "csv",
+    gzip: bool = False,
+    employee_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Iterator[bytes]:
+    """
+    Byte stream of the export body (sync generator - Starlette runs it in a thread)
+
+    Args:
+        fmt: csv | ndjson
+        gzip: Compress the stream with gzip
+        employee_id, device_id, type, date_from, date_to: Filters
+
+    Yields:
+        Body chunks
+    """
+    rows = iter_rows(
+        employee_id=employee_id,
+        device_id=device_id,
+        type=type,
+        date_from=date_from,
+        date_to=date_to
+    )
+    chunks = _encode_chunks(rows, fmt)
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    except Exception as e:
+        # 헤더는 이미 나갔으므로 로그만 남기고 스트림 종료
+        app_logger.error(f"Attendance export failed after {sent} bytes: {e}")
+        raise
+    finally:
+        rows.close()
+    app_logger.info(f"Attendance export finished: {fmt}{'.gz' if gzip else ''}, {sent} bytes")
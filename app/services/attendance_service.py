@@ -2,44 +2,211 @@
 Attendance service
 Handles attendance logging to database
 """
-from datetime import datetime, date
-from typing import Optional
+import base64
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import and_, or_
 from app.db.models import Attendance
+from app.db.dialect import insert_ignore
+from app.services.attendance_writer import attendance_writer
+from app.services import summary_service
+from app.services.attempt_log import attempt_logger
+from app.core.config import settings
 from app.core.logging import app_logger
+from app.utils.dates import work_date
 
 
-def check_already_checked_in_today(db: Session, employee_id: str) -> bool:
+class DailyAttendanceState:
     """
-    Check if employee already checked in today
+    오늘(work_date) 출근/퇴근한 직원 집합 (메모리 캐시)
+    
+    - 시작 시 / 근무일이 바뀌면(TIMEZONE 기준 자정) DB에서 다시 로드
+    - 기록 성공 시 갱신
+    - 멀티 워커 배포에서는 다른 워커의 기록을 모르므로 ATTENDANCE_STATE_REFRESH_SEC마다
+      다시 로드하고, refresh()로 즉시 무효화 가능. 캐시에 없으면 DB 유니크 키가 최종 판단
+    """
+    
+    def __init__(self):
+        self.enabled = settings.ATTENDANCE_STATE_CACHE
+        self.refresh_sec = settings.ATTENDANCE_STATE_REFRESH_SEC
+        self.single_writer = settings.ATTENDANCE_STATE_SINGLE_WRITER
+        self._lock = threading.Lock()
+        self._date: Optional[date] = None
+        self._checked: Dict[str, set] = {'IN': set(), 'OUT': set()}
+        self._loaded_at = 0.0
+        self.hits = 0
+        self.loads = 0
+    
+    def load(self, db: Session) -> bool:
+        """
+        Load today's IN/OUT state from the database
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            True if loaded
+        """
+        today = work_date()
+        try:
+            rows = db.query(Attendance.employee_id, Attendance.type)\
+                .filter(
+                    and_(
+                        Attendance.work_date == today,
+                        Attendance.type.in_(('IN', 'OUT'))
+                    )
+                )\
+                .distinct()\
+                .all()
+        except Exception as e:
+            app_logger.error(f"Error loading daily attendance state: {e}")
+            return False
+        
+        checked = {'IN': set(), 'OUT': set()}
+        for employee_id, attendance_type in rows:
+            checked[attendance_type].add(employee_id)
+        
+        with self._lock:
+            self._date = today
+            self._checked = checked
+            self._loaded_at = time.time()
+            self.loads += 1
+        
+        app_logger.info(
+            f"Daily attendance state loaded for {today}: "
+            f"IN={len(checked['IN'])}, OUT={len(checked['OUT'])}"
+        )
+        return True
+    
+    def invalidate(self):
+        """Drop the cached state (reloaded on next use)"""
+        with self._lock:
+            self._date = None
+    
+    def contains(self, db: Session, employee_id: str, type: str) -> bool:
+        """
+        True if the employee already has a record of this type today
+        
+        Reloads first on day rollover or when the refresh interval elapsed.
+        False means "not known here" - the caller still relies on the unique key
+        
+        Args:
+            db: Database session (used only for reloads)
+            employee_id: Employee ID
+            type: Attendance type ('IN' or 'OUT')
+        """
+        if not self.enabled:
+            return False
+        
+        today = work_date()
+        with self._lock:
+            stale = self._date != today or \
+                (self.refresh_sec > 0 and time.time() - self._loaded_at >= self.refresh_sec)
+        if stale and not self.load(db):
+            return False
+        
+        with self._lock:
+            if self._date != today:
+                return False
+            found = employee_id in self._checked.get(type.upper(), ())
+            if found:
+                self.hits += 1
+            return found
+    
+    def is_authoritative(self, day: date) -> bool:
+        """
+        True if a miss in contains() means "not recorded" rather than "not known"
+        
+        Requires a successful load for `day` within the refresh interval and
+        ATTENDANCE_STATE_SINGLE_WRITER (no other worker writes attendance
+        that this cache would not see)
+        """
+        if not self.enabled or not self.single_writer:
+            return False
+        with self._lock:
+            if self._date != day:
+                return False
+            return self.refresh_sec <= 0 or time.time() - self._loaded_at < self.refresh_sec
+    
+    def mark(self, employee_id: str, type: str, day: Optional[date] = None):
+        """Remember a successful record (ignored if it belongs to another day)"""
+        day = day or work_date()
+        with self._lock:
+            if self._date == day and type.upper() in self._checked:
+                self._checked[type.upper()].add(employee_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "work_date": self._date.isoformat() if self._date else None,
+                "checked_in": len(self._checked['IN']),
+                "checked_out": len(self._checked['OUT']),
+                "loaded_at": datetime.fromtimestamp(self._loaded_at).isoformat() if self._loaded_at else None,
+                "refresh_sec": self.refresh_sec,
+                "single_writer": self.single_writer,
+                "loads": self.loads,
+                "hits": self.hits
+            }
+
+
+# 오늘 출퇴근 상태 캐시
+daily_state = DailyAttendanceState()
+
+
+def get_today_status(db: Session, employee_id: str) -> Dict[str, bool]:
+    """
+    Today's IN/OUT status for an employee in one indexed lookup
+    
+    Uses uq_attendance_emp_date_type (employee_id, work_date, type), so only
+    today's rows for the employee are touched instead of their whole history
     
     Args:
         db: Database session
         employee_id: Employee ID
         
     Returns:
-        True if already checked in today
+        {"checked_in": bool, "checked_out": bool}
     """
+    status = {"checked_in": False, "checked_out": False}
     try:
-        today = date.today()
-        
-        # 오늘 날짜의 IN 기록 조회
-        existing = db.query(Attendance)\
+        rows = db.query(Attendance.type)\
             .filter(
                 and_(
                     Attendance.employee_id == employee_id,
-                    Attendance.type == 'IN',
-                    func.date(Attendance.ts_server) == today
+                    Attendance.work_date == work_date(),
+                    Attendance.type.in_(('IN', 'OUT'))
                 )
             )\
-            .first()
+            .distinct()\
+            .all()
         
-        return existing is not None
+        types = {row[0] for row in rows}
+        status["checked_in"] = 'IN' in types
+        status["checked_out"] = 'OUT' in types
         
     except Exception as e:
         app_logger.error(f"Error checking attendance: {e}")
-        return False
+    
+    return status
+
+
+def check_already_checked_in_today(db: Session, employee_id: str) -> bool:
+    """
+    Check if employee already checked in today
+    
+    Args:
+        db: Database session
+        employee_id: Employee ID
+        
+    Returns:
+        True if already checked in today
+    """
+    return get_today_status(db, employee_id)["checked_in"]
 
 
 def check_already_checked_out_today(db: Session, employee_id: str) -> bool:
@@ -53,28 +220,10 @@ def check_already_checked_out_today(db: Session, employee_id: str) -> bool:
     Returns:
         True if already checked out today
     """
-    try:
-        today = date.today()
-        
-        # 오늘 날짜의 OUT 기록 조회
-        existing = db.query(Attendance)\
-            .filter(
-                and_(
-                    Attendance.employee_id == employee_id,
-                    Attendance.type == 'OUT',
-                    func.date(Attendance.ts_server) == today
-                )
-            )\
-            .first()
-        
-        return existing is not None
-        
-    except Exception as e:
-        app_logger.error(f"Error checking attendance: {e}")
-        return False
+    return get_today_status(db, employee_id)["checked_out"]
 
 
-def record_success(
+def record_success_once(
     db: Session,
     employee_id: str,
     type: str,
@@ -82,9 +231,13 @@ def record_success(
     distance: Optional[float] = None,
     image_ref: Optional[str] = None,
     ts_client: Optional[datetime] = None
-) -> bool:
+) -> Optional[bool]:
     """
-    Record successful attendance (check-in/check-out)
+    Record attendance at most once per employee/work date/type in one statement
+    
+    INSERT IGNORE (MySQL) / ON CONFLICT DO NOTHING (SQLite) against
+    uq_attendance_emp_date_type, so concurrent kiosks cannot double-record
+    and no SELECT is needed beforehand
     
     Args:
         db: Database session
@@ -96,28 +249,156 @@ def record_success(
         ts_client: Optional client timestamp
         
     Returns:
-        True if recorded successfully
+        True if newly recorded, False if already recorded today, None on error
     """
     try:
-        attendance = Attendance(
+        now = datetime.now()
+        today = work_date()
+        stmt = insert_ignore(db, Attendance.__table__).values(
             employee_id=employee_id,
             type=type.upper(),
             device_id=device_id,
             distance=distance,
             image_ref=image_ref,
-            ts_client=ts_client
+            ts_server=now,
+            ts_client=ts_client,
+            work_date=today
         )
-        
-        db.add(attendance)
+        result = db.execute(stmt)
+        if result.rowcount:
+            # 새로 기록된 경우에만 일간 요약 갱신 (같은 트랜잭션)
+            summary_service.apply_success(db, employee_id, type, device_id, now, today)
         db.commit()
         
+        # 새로 기록했거나 이미 있던 기록 모두 오늘 상태 캐시에 반영
+        daily_state.mark(employee_id, type, today)
+        
+        if result.rowcount == 0:
+            app_logger.debug(f"Attendance already recorded today: {employee_id} - {type}")
+            return False
+        
         app_logger.info(f"Attendance recorded: {employee_id} - {type} (distance: {distance})")
         return True
         
     except Exception as e:
         app_logger.error(f"Error recording attendance: {e}")
         db.rollback()
+        return None
+
+
+def record_identified(
+    db: Session,
+    employee_id: str,
+    name: Optional[str],
+    type: str,
+    device_id: Optional[str] = None,
+    distance: Optional[float] = None,
+    ts_client: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Record attendance for an identified employee, once per day per type
+    
+    Args:
+        db: Database session
+        employee_id: Identified employee ID
+        name: Identified employee name
+        type: Attendance type ('IN' or 'OUT')
+        device_id: Optional device identifier
+        distance: Optional face recognition distance
+        ts_client: Optional client timestamp
+        
+    Returns:
+        Rejection payload if already checked in/out today, None if recorded
+    """
+    attendance_type = type.upper()
+    
+    # 오늘 상태 캐시에 있으면 DB 없이 바로 거절
+    if daily_state.contains(db, employee_id, attendance_type):
+        recorded = False
+    
+    elif attendance_writer.is_alive():
+        # write-behind: 중복 판단 후 큐에 넣고 바로 응답 (DB 쓰기는 백그라운드 배치)
+        recorded = _enqueue_once(
+            db=db,
+            employee_id=employee_id,
+            type=attendance_type,
+            device_id=device_id,
+            distance=distance,
+            ts_client=ts_client
+        )
+    else:
+        # 체크와 기록을 한 번의 INSERT로 처리 (유니크 제약이 중복을 걸러냄)
+        recorded = record_success_once(
+            db=db,
+            employee_id=employee_id,
+            type=attendance_type,
+            device_id=device_id,
+            distance=distance,
+            ts_client=ts_client
+        )
+    
+    if recorded is False:
+        if attendance_type == 'IN':
+            return {
+                "success": False,
+                "message": "이미 출근 처리되었습니다",
+                "reason": "already_checked_in",
+                "employee_id": employee_id,
+                "name": name
+            }
+        return {
+            "success": False,
+            "message": "이미 퇴근 처리되었습니다",
+            "reason": "already_checked_out",
+            "employee_id": employee_id,
+            "name": name
+        }
+    
+    return None
+
+
+def _enqueue_once(
+    db: Session,
+    employee_id: str,
+    type: str,
+    device_id: Optional[str] = None,
+    distance: Optional[float] = None,
+    ts_client: Optional[datetime] = None
+) -> Optional[bool]:
+    """
+    Dedup against the database and the write-behind queue, then enqueue
+    
+    Returns:
+        True if queued, False if already recorded/queued today, None on error
+    """
+    today = work_date()
+    if attendance_writer.is_pending(employee_id, today, type):
         return False
+    
+    # 캐시에 없다는 것이 "기록 없음"으로 확실할 때만 DB 확인 생략
+    # (로드 실패 / 오래된 캐시 / 다른 워커의 기록이면 INSERT IGNORE에서 조용히 버려지므로 DB로 확인)
+    if not daily_state.is_authoritative(today):
+        status = get_today_status(db=db, employee_id=employee_id)
+        if status["checked_in" if type == 'IN' else "checked_out"]:
+            return False
+    
+    try:
+        queued = attendance_writer.enqueue(
+            employee_id=employee_id,
+            type=type,
+            work_date=today,
+            device_id=device_id,
+            distance=distance,
+            ts_client=ts_client
+        )
+    except Exception as e:
+        app_logger.error(f"Error queueing attendance: {e}")
+        return None
+    
+    daily_state.mark(employee_id, type, today)
+    if queued:
+        app_logger.info(f"Attendance queued: {employee_id} - {type} (distance: {distance})")
+    return queued
 
 
 def record_unknown(
@@ -126,43 +407,37 @@ def record_unknown(
     device_id: Optional[str] = None,
     distance: Optional[float] = None,
     image_ref: Optional[str] = None,
-    ts_client: Optional[datetime] = None
+    ts_client: Optional[datetime] = None,
+    latency_ms: Optional[float] = None
 ) -> bool:
     """
     Record unknown face attempt
-    Stores with employee_id='UNKNOWN' for audit trail
+    Stored in recognition_attempts (outcome='unknown') through the batched attempt log
     
     Args:
-        db: Database session
+        db: Database session (unused, kept for call compatibility)
         type: Attempted type ('IN' or 'OUT')
         device_id: Optional device identifier
         distance: Optional minimum distance to known faces
         image_ref: Optional reference to saved image
         ts_client: Optional client timestamp
+        latency_ms: Optional identify latency
         
     Returns:
         True if recorded successfully
     """
-    try:
-        attendance = Attendance(
-            employee_id="UNKNOWN",
-            type=type.upper(),
-            device_id=device_id,
-            distance=distance,
-            image_ref=image_ref,
-            ts_client=ts_client
-        )
-        
-        db.add(attendance)
-        db.commit()
-        
-        app_logger.warning(f"Unknown face attempt recorded - {type} (distance: {distance})")
-        return True
-        
-    except Exception as e:
-        app_logger.error(f"Error recording unknown attempt: {e}")
-        db.rollback()
-        return False
+    queued = attempt_logger.log(
+        outcome="unknown",
+        reason="unknown",
+        type=type,
+        device_id=device_id,
+        min_distance=distance,
+        latency_ms=latency_ms,
+        image_ref=image_ref,
+        ts_client=ts_client
+    )
+    app_logger.warning(f"Unknown face attempt recorded - {type} (distance: {distance})")
+    return queued
 
 
 def record_fail(
@@ -170,40 +445,70 @@ def record_fail(
     reason: str,
     type: str,
     device_id: Optional[str] = None,
-    ts_client: Optional[datetime] = None
+    ts_client: Optional[datetime] = None,
+    distance: Optional[float] = None,
+    latency_ms: Optional[float] = None
 ) -> bool:
     """
     Record failed attendance attempt
-    Stores with employee_id='FAILED_{reason}' for audit trail
+    Stored in recognition_attempts (outcome='failed') through the batched attempt log
     
     Args:
-        db: Database session
+        db: Database session (unused, kept for call compatibility)
         reason: Failure reason (no_face, multi_face, bad_quality, etc.)
         type: Attempted type ('IN' or 'OUT')
         device_id: Optional device identifier
         ts_client: Optional client timestamp
+        distance: Optional minimum distance to known faces
+        latency_ms: Optional identify latency
         
     Returns:
         True if recorded successfully
     """
-    try:
-        attendance = Attendance(
-            employee_id=f"FAILED_{reason.upper()}",
-            type=type.upper(),
-            device_id=device_id,
-            ts_client=ts_client
-        )
-        
-        db.add(attendance)
-        db.commit()
-        
-        app_logger.warning(f"Failed attendance recorded: {reason} - {type}")
-        return True
+    queued = attempt_logger.log(
+        outcome="failed",
+        reason=reason,
+        type=type,
+        device_id=device_id,
+        min_distance=distance,
+        latency_ms=latency_ms,
+        ts_client=ts_client
+    )
+    app_logger.warning(f"Failed attendance recorded: {reason} - {type}")
+    return queued
+
+
+def record_attempt_result(
+    db: Session,
+    result,
+    type: str,
+    device_id: Optional[str] = None,
+    ts_client: Optional[datetime] = None,
+    latency_ms: Optional[float] = None
+) -> bool:
+    """
+    Log a failed IdentifyResult as an unknown or failed attempt
+    
+    Args:
+        db: Database session
+        result: inference.IdentifyResult with success=False
+        type: Attempted type ('IN' or 'OUT')
+        device_id: Optional device identifier
+        ts_client: Optional client timestamp
+        latency_ms: Optional identify latency
         
-    except Exception as e:
-        app_logger.error(f"Error recording failed attempt: {e}")
-        db.rollback()
-        return False
+    Returns:
+        True if recorded
+    """
+    if result.reason == "unknown":
+        return record_unknown(
+            db=db, type=type, device_id=device_id, distance=result.distance,
+            ts_client=ts_client, latency_ms=latency_ms
+        )
+    return record_fail(
+        db=db, reason=result.reason or "error", type=type, device_id=device_id,
+        ts_client=ts_client, distance=result.distance, latency_ms=latency_ms
+    )
 
 
 def get_recent_attendance(
@@ -233,3 +538,157 @@ def get_recent_attendance(
     except Exception as e:
         app_logger.error(f"Error querying attendance: {e}")
         return []
+
+
+def encode_cursor(ts_server: datetime, record_id: int) -> str:
+    """
+    Opaque keyset cursor for (ts_server, id)
+    
+    Args:
+        ts_server: ts_server of the last returned row
+        record_id: id of the last returned row
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{ts_server.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts_part), int(id_part)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_attendance_filters(
+    query,
+    employee_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """
+    Apply common attendance filters to a query
+    
+    Date bounds are turned into a half-open ts_server range so the
+    (employee_id|device_id, ts_server, id) indexes stay usable
+    
+    Args:
+        query: SQLAlchemy query over Attendance columns
+        employee_id: Optional employee filter
+        device_id: Optional device filter
+        type: Optional type filter (IN / OUT)
+        date_from: Optional first day (inclusive)
+        date_to: Optional last day (inclusive)
+        
+    Returns:
+        Filtered query
+    """
+    if employee_id:
+        query = query.filter(Attendance.employee_id == employee_id)
+    if device_id:
+        query = query.filter(Attendance.device_id == device_id)
+    if type:
+        query = query.filter(Attendance.type == type.upper())
+    if date_from:
+        query = query.filter(Attendance.ts_server >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.filter(Attendance.ts_server < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def query_attendance(
+    db: Session,
+    employee_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[Attendance], Optional[str]]:
+    """
+    Page through attendance records, newest first, with keyset pagination
+    
+    Two steps (deferred join): the page of ids is found from the
+    (filter, ts_server, id) index alone, then only those rows are fetched
+    by primary key - no OFFSET scans regardless of how deep the page is
+    
+    Args:
+        db: Database session
+        employee_id: Optional employee filter
+        device_id: Optional device filter
+        type: Optional type filter (IN / OUT)
+        date_from: Optional first day (inclusive)
+        date_to: Optional last day (inclusive)
+        limit: Page size (already capped by the caller)
+        cursor: Cursor from the previous page
+        
+    Returns:
+        (records, next_cursor) - next_cursor is None on the last page
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    id_query = apply_attendance_filters(
+        db.query(Attendance.ts_server, Attendance.id),
+        employee_id=employee_id,
+        device_id=device_id,
+        type=type,
+        date_from=date_from,
+        date_to=date_to
+    )
+    
+    if cursor:
+        last_ts, last_id = decode_cursor(cursor)
+        id_query = id_query.filter(
+            or_(
+                Attendance.ts_server < last_ts,
+                and_(Attendance.ts_server == last_ts, Attendance.id < last_id)
+            )
+        )
+    
+    # limit + 1 로 다음 페이지 존재 여부 확인
+    keys = id_query\
+        .order_by(Attendance.ts_server.desc(), Attendance.id.desc())\
+        .limit(limit + 1)\
+        .all()
+    
+    has_more = len(keys) > limit
+    keys = keys[:limit]
+    if not keys:
+        return [], None
+    
+    records = db.query(Attendance)\
+        .filter(Attendance.id.in_([k.id for k in keys]))\
+        .order_by(Attendance.ts_server.desc(), Attendance.id.desc())\
+        .all()
+    
+    next_cursor = encode_cursor(keys[-1].ts_server, keys[-1].id) if has_more else None
+    return records, next_cursor
+
+
+def attendance_to_dict(record: Attendance) -> Dict[str, Any]:
+    """Convert an Attendance row to a JSON-friendly dict"""
+    return {
+        "id": record.id,
+        "employee_id": record.employee_id,
+        "type": record.type,
+        "device_id": record.device_id,
+        "distance": record.distance,
+        "ts_server": record.ts_server.isoformat() if record.ts_server else None,
+        "ts_client": record.ts_client.isoformat() if record.ts_client else None,
+        "work_date": record.work_date.isoformat() if record.work_date else None,
+        "image_ref": record.image_ref
+    }
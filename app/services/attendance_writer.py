@@ -0,0 +1,470 @@
+"""
+Write-behind attendance writer
+Queues successful attendance rows in memory and flushes them to the database
+with multi-row INSERT IGNORE, backed by per-process NDJSON spool segments for
+durability
+"""
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.base import SessionLocal
+from app.db.dialect import insert_ignore
+from app.db.models import Attendance
+from app.services import summary_service
+
+try:
+    import fcntl
+except ImportError:  # Windows: 워커 1개 기준 (스풀 잠금 없음)
+    fcntl = None
+
+# flush 실패 시 재시도 간격
+RETRY_BACKOFF_SEC = 1.0
+
+AttendanceKey = Tuple[str, date, str]  # (employee_id, work_date, type)
+
+
+class SpoolSegment:
+    """
+    스풀 파일 1개 (프로세스별 `<spool>.<pid>.<seq>.ndjson`)
+
+    파일을 연 채로 배타 잠금을 유지해 소유 중임을 표시하고,
+    아직 DB에 저장되지 않은 행 수(rows)가 0이 되면 삭제
+    """
+
+    def __init__(self, path: str, handle):
+        self.path = path
+        self.handle = handle
+        self.rows = 0
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()  # 잠금도 함께 해제
+            self.handle = None
+
+
+class AttendanceWriter:
+    """
+    출퇴근 기록 write-behind 큐
+
+    - enqueue: 현재 스풀 세그먼트에 append + fsync 후 메모리 큐에 추가 (응답 전에 로컬 디스크에 남음)
+    - 백그라운드 스레드가 FLUSH_INTERVAL_MS 또는 FLUSH_MAX_ROWS마다 multi-row INSERT IGNORE
+    - 세그먼트는 프로세스(워커)별 파일이라 다른 워커의 미저장 기록을 건드리지 않음
+    - flush 성공마다 세그먼트를 교체하고, 행이 모두 저장된 세그먼트는 삭제 (스풀이 계속 커지지 않음)
+    - 시작 시 잠금 아래에서 소유자가 없는(종료된 워커의) 세그먼트를 가져와 다시 flush (유니크 키로 멱등)
+    """
+
+    def __init__(self):
+        self.enabled = settings.ATTENDANCE_WRITE_BEHIND
+        self.flush_interval = settings.ATTENDANCE_FLUSH_INTERVAL_MS / 1000.0
+        self.flush_max_rows = max(1, settings.ATTENDANCE_FLUSH_MAX_ROWS)
+        self.spool_path = settings.ATTENDANCE_SPOOL_PATH
+        self._spool_base, self._spool_ext = os.path.splitext(self.spool_path)
+        self._spool_ext = self._spool_ext or ".ndjson"
+
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.last_error: Optional[str] = None
+
+        self._cond = threading.Condition()
+        self._queue: deque = deque()        # (SpoolSegment, row)
+        self._inflight = 0                  # flush 중인 행 수
+        self._pending: set = set()          # 큐/flush 중인 (employee_id, work_date, type)
+        self._spool: Optional[SpoolSegment] = None       # append 중인 세그먼트
+        self._segments: List[SpoolSegment] = []          # 저장 대기 행이 남은 이전 세그먼트
+        self._segment_seq = 0
+
+        # metrics
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.duplicate_rows = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self) -> bool:
+        """Replay the spool and start the flush thread"""
+        if self.running:
+            return True
+
+        try:
+            spool_dir = os.path.dirname(self.spool_path)
+            if spool_dir:
+                os.makedirs(spool_dir, exist_ok=True)
+            with self._spool_lock():
+                replayed = self._load_spool()
+                self._spool = self._open_segment()
+        except Exception as e:
+            self.last_error = f"Failed to open attendance spool: {e}"
+            app_logger.error(self.last_error)
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="attendance-writer")
+        self.thread.start()
+        app_logger.info(
+            f"Attendance writer started (interval={self.flush_interval * 1000:.0f}ms, "
+            f"max_rows={self.flush_max_rows}, replayed={replayed})"
+        )
+        return True
+
+    def stop(self):
+        """Flush what is queued and stop the thread"""
+        if not self.running:
+            return
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=10.0)
+
+        with self._cond:
+            # 저장이 끝난 세그먼트는 삭제, 남은 행이 있으면 닫기만 함 (다음 시작 시 어느 워커든 재전송)
+            for segment in self._segments + ([self._spool] if self._spool else []):
+                segment.close()
+                if segment.rows == 0:
+                    try:
+                        os.remove(segment.path)
+                    except OSError:
+                        pass
+            self._segments = []
+            self._spool = None
+        app_logger.info(f"Attendance writer stopped (unflushed={len(self._queue)})")
+
+    def is_alive(self) -> bool:
+        """쓰기 스레드 정상 동작 확인"""
+        return bool(self.running and self.thread and self.thread.is_alive())
+
+    def is_pending(self, employee_id: str, work_date: date, type: str) -> bool:
+        """True if the row is queued but not yet in the database"""
+        with self._cond:
+            return (employee_id, work_date, type.upper()) in self._pending
+
+    def enqueue(
+        self,
+        employee_id: str,
+        type: str,
+        work_date: date,
+        device_id: Optional[str] = None,
+        distance: Optional[float] = None,
+        image_ref: Optional[str] = None,
+        ts_client: Optional[datetime] = None
+    ) -> bool:
+        """
+        Queue an attendance row (durable once this returns True)
+
+        Args:
+            employee_id: Employee ID
+            type: Attendance type ('IN' or 'OUT')
+            work_date: Work date of the record
+            device_id: Optional device identifier
+            distance: Optional face recognition distance
+            image_ref: Optional reference to saved image
+            ts_client: Optional client timestamp
+
+        Returns:
+            True if queued, False if already queued for the same day/type
+        """
+        row = {
+            "employee_id": employee_id,
+            "type": type.upper(),
+            "device_id": device_id,
+            "distance": distance,
+            "image_ref": image_ref,
+            "ts_server": datetime.now(),  # flush 시각이 아닌 인식 시각
+            "ts_client": ts_client,
+            "work_date": work_date
+        }
+        key = (employee_id, work_date, row["type"])
+
+        with self._cond:
+            if key in self._pending:
+                return False
+            if self._spool is None:
+                raise RuntimeError("Attendance writer is not running")
+
+            # 응답 전에 로컬 디스크에 기록 (크래시 시 재시작하면 재전송)
+            segment = self._spool
+            segment.handle.write(json.dumps(_encode_row(row), ensure_ascii=False) + "\n")
+            segment.handle.flush()
+            os.fsync(segment.handle.fileno())
+            segment.rows += 1
+
+            self._queue.append((segment, row))
+            self._pending.add(key)
+            self.enqueued += 1
+            if len(self._queue) >= self.flush_max_rows:
+                self._cond.notify_all()
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and flush latency metrics"""
+        with self._cond:
+            queue_depth = len(self._queue)
+            inflight = self._inflight
+            segments = self._segments + ([self._spool] if self._spool else [])
+            spool_paths = [segment.path for segment in segments]
+        spool_bytes = 0
+        for path in spool_paths:
+            try:
+                spool_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+
+        return {
+            "enabled": self.enabled,
+            "running": self.is_alive(),
+            "queue_depth": queue_depth,
+            "inflight": inflight,
+            "enqueued": self.enqueued,
+            "flushed_rows": self.flushed_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else None,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "spool_segments": len(spool_paths),
+            "spool_bytes": spool_bytes,
+            "last_error": self.last_error
+        }
+
+    def _loop(self):
+        """Flush loop (runs in background thread)"""
+        while True:
+            with self._cond:
+                if self.running and len(self._queue) < self.flush_max_rows:
+                    self._cond.wait(timeout=self.flush_interval)
+                if not self._queue:
+                    if not self.running:
+                        break
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.flush_max_rows, len(self._queue)))]
+                self._inflight = len(batch)
+
+            ok = self._flush([row for _, row in batch])
+
+            with self._cond:
+                self._inflight = 0
+                if ok:
+                    for segment, row in batch:
+                        self._pending.discard((row["employee_id"], row["work_date"], row["type"]))
+                        segment.rows -= 1
+                    self._rotate_spool()
+                else:
+                    # 순서 유지하며 큐 앞에 되돌림
+                    self._queue.extendleft(reversed(batch))
+
+            if not ok:
+                if not self.running:
+                    # 종료 중 DB 불가 - 스풀에 남아 있으므로 다음 시작 시 재전송
+                    break
+                time.sleep(RETRY_BACKOFF_SEC)
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> bool:
+        """
+        Write one batch with a single multi-row INSERT IGNORE
+
+        Daily summaries are updated in the same transaction. If some rows were
+        duplicates the batch is redone row by row, since a multi-row rowcount
+        does not say which rows were new
+        """
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            inserted = db.execute(insert_ignore(db, Attendance.__table__).values(batch)).rowcount
+            if inserted == len(batch):
+                new_rows = batch
+            else:
+                db.rollback()
+                new_rows = [
+                    row for row in batch
+                    if db.execute(insert_ignore(db, Attendance.__table__).values(row)).rowcount
+                ]
+                inserted = len(new_rows)
+
+            for row in new_rows:
+                summary_service.apply_success(
+                    db, row["employee_id"], row["type"], row["device_id"], row["ts_server"], row["work_date"]
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.flush_errors += 1
+            self.last_error = f"Attendance flush failed: {e}"
+            app_logger.error(self.last_error)
+            return False
+        finally:
+            db.close()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.flushed_rows += inserted
+        self.duplicate_rows += len(batch) - inserted
+        self.last_flush_ms = round(elapsed_ms, 2)
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        app_logger.debug(f"Attendance flush: {inserted}/{len(batch)} rows in {elapsed_ms:.1f}ms")
+        return True
+
+    def _rotate_spool(self):
+        """
+        Drop segments whose rows are all in the database after a flush and
+        start a new segment if the current one still has queued rows
+        (caller holds _cond)
+        """
+        if self._spool is None:
+            return
+        if self._spool.rows > 0:
+            try:
+                with self._spool_lock():
+                    new_segment = self._open_segment()
+            except OSError as e:
+                # 교체 실패 시 현재 세그먼트에 계속 기록 (다음 flush 때 재시도)
+                app_logger.error(f"Failed to rotate attendance spool: {e}")
+            else:
+                self._segments.append(self._spool)
+                self._spool = new_segment
+        elif self._spool.handle.tell() > 0:
+            # 모두 저장됨 - 파일을 새로 만들지 않고 비움
+            self._spool.handle.seek(0)
+            self._spool.handle.truncate()
+            self._spool.handle.flush()
+            os.fsync(self._spool.handle.fileno())
+
+        remaining = []
+        for segment in self._segments:
+            if segment.rows > 0:
+                remaining.append(segment)
+                continue
+            try:
+                os.remove(segment.path)
+            except OSError as e:
+                app_logger.warning(f"Failed to remove attendance spool segment {segment.path}: {e}")
+            segment.close()
+        self._segments = remaining
+
+    def _segment_path(self, seq: int) -> str:
+        return f"{self._spool_base}.{os.getpid()}.{seq}{self._spool_ext}"
+
+    def _open_segment(self) -> SpoolSegment:
+        """Create and lock a new segment of this process (caller holds _spool_lock)"""
+        while True:
+            self._segment_seq += 1
+            path = self._segment_path(self._segment_seq)
+            if not os.path.exists(path):  # 같은 pid를 쓰던 이전 프로세스의 파일은 건너뜀
+                break
+        handle = open(path, "a", encoding="utf-8")
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return SpoolSegment(path, handle)
+
+    @contextmanager
+    def _spool_lock(self):
+        """
+        Inter-process lock around segment creation and replay, so a starting
+        worker never takes a segment another worker has just created
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self._spool_base}.lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _claim_segment(self, path: str) -> Optional[SpoolSegment]:
+        """
+        Take over a segment nobody owns (its worker exited or crashed)
+        by locking it and renaming it to a segment of this process
+        (caller holds _spool_lock)
+        """
+        try:
+            handle = open(path, "r+", encoding="utf-8")
+        except FileNotFoundError:
+            return None  # 소유 워커가 방금 삭제
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return None  # 실행 중인 워커의 세그먼트
+        if not os.path.exists(path):
+            handle.close()
+            return None
+
+        # 내 세그먼트 이름으로 옮김 (열린 핸들과 잠금은 그대로 유지)
+        while True:
+            self._segment_seq += 1
+            new_path = self._segment_path(self._segment_seq)
+            if not os.path.exists(new_path):
+                break
+        os.replace(path, new_path)
+        return SpoolSegment(new_path, handle)
+
+    def _load_spool(self) -> int:
+        """
+        Queue rows left in unowned spool segments by previous runs
+        (any worker's, plus the single-file spool of older versions)
+        """
+        pattern = f"{glob.escape(self._spool_base)}*{self._spool_ext}"
+        count = 0
+        for path in sorted(glob.glob(pattern)):
+            segment = self._claim_segment(path)
+            if segment is None:
+                continue
+
+            for line in segment.handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = _decode_row(json.loads(line))
+                except Exception as e:
+                    # 크래시 중 잘린 마지막 줄 등
+                    app_logger.warning(f"Skipping corrupt attendance spool line: {e}")
+                    continue
+                self._queue.append((segment, row))
+                self._pending.add((row["employee_id"], row["work_date"], row["type"]))
+                segment.rows += 1
+                count += 1
+
+            if segment.rows:
+                self._segments.append(segment)
+            else:
+                os.remove(segment.path)
+                segment.close()
+
+        if count:
+            app_logger.warning(f"Replaying {count} spooled attendance rows")
+        return count
+
+
+def _encode_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Row -> JSON-safe dict"""
+    return {k: v.isoformat() if isinstance(v, (date, datetime)) else v for k, v in row.items()}
+
+
+def _decode_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON dict -> row"""
+    row = dict(data)
+    row["ts_server"] = datetime.fromisoformat(row["ts_server"])
+    row["ts_client"] = datetime.fromisoformat(row["ts_client"]) if row.get("ts_client") else None
+    row["work_date"] = date.fromisoformat(row["work_date"])
+    return row
+
+
+# Global attendance writer instance
+attendance_writer = AttendanceWriter()
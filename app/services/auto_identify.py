@@ -0,0 +1,232 @@
+"""
+Auto identify worker for MODE_A (hands-free kiosk)
+Runs identification server-side once a single face has been stable inside the
+guide ellipse, and pushes results to WebSocket/SSE subscribers
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.base import SessionLocal
+from app.services import attendance_service, face_service, inference, stream_overlay
+from app.services.camera_worker import camera_worker
+from app.services.event_bus import identify_events
+
+
+class AutoIdentifier:
+    """
+    카메라 프레임을 지켜보다가 얼굴이 가이드 안에서 N 프레임 동안 안정되면 인식 실행
+
+    - 같은 사람이 프레임에 머무는 동안에는 다시 인식하지 않음 (얼굴이 사라지면 해제)
+    - 인식된 직원은 cooldown 동안 다시 기록하지 않음
+    - 실패 시 retry 간격 후 재시도
+    """
+
+    def __init__(self):
+        self.type = settings.AUTO_IDENTIFY_TYPE.upper()  # IN / OUT
+        self.device_id = settings.AUTO_IDENTIFY_DEVICE_ID
+        self.stable_frames = settings.AUTO_IDENTIFY_STABLE_FRAMES
+        self.max_movement = settings.AUTO_IDENTIFY_MAX_MOVEMENT
+        self.cooldown_sec = settings.AUTO_IDENTIFY_COOLDOWN_SEC
+        self.retry_sec = settings.AUTO_IDENTIFY_RETRY_SEC
+
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.last_error: Optional[str] = None
+
+        # 추적 상태 (워커 스레드 전용)
+        self._stable_count = 0
+        self._last_center: Optional[Tuple[float, float]] = None
+        self._missing_count = 0
+        self._consumed = False  # 현재 머물러 있는 얼굴은 이미 처리됨
+        self._retry_after = 0.0
+        self._last_seen: Dict[str, float] = {}  # employee_id -> 마지막 인식 시각
+
+        self.attempts = 0
+        self.recorded = 0
+
+    def start(self) -> bool:
+        """Start the auto identify thread"""
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="auto-identify")
+        self.thread.start()
+        app_logger.info(
+            f"Auto identify started (type={self.type}, stable_frames={self.stable_frames}, "
+            f"cooldown={self.cooldown_sec}s)"
+        )
+        return True
+
+    def stop(self):
+        """Stop the auto identify thread"""
+        if not self.running:
+            return
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        app_logger.info("Auto identify stopped")
+
+    def is_alive(self) -> bool:
+        """자동 인식 스레드 정상 동작 확인"""
+        return bool(self.running and self.thread and self.thread.is_alive())
+
+    def set_type(self, attendance_type: str):
+        """Switch the kiosk between IN and OUT"""
+        self.type = attendance_type.upper()
+
+    def get_status(self) -> dict:
+        """Current configuration and counters"""
+        return {
+            "enabled": self.is_alive(),
+            "type": self.type,
+            "device_id": self.device_id,
+            "stable_frames": self.stable_frames,
+            "cooldown_sec": self.cooldown_sec,
+            "attempts": self.attempts,
+            "recorded": self.recorded,
+            "subscribers": identify_events.subscriber_count(),
+            "last_error": self.last_error
+        }
+
+    def _loop(self):
+        """Main loop (runs in background thread)"""
+        last_seq = -1
+        while self.running:
+            try:
+                seq = camera_worker.wait_for_frame_blocking(last_seq, timeout=1.0)
+                if seq is None:
+                    continue
+
+                frame, seq, captured_at = camera_worker.get_latest_frame_with_meta()
+                if frame is None:
+                    continue
+                last_seq = seq
+
+                # 스트림 렌더링과 같은 프레임이면 분석 결과 공유
+                analysis = stream_overlay.analyze_guide_cached(frame, seq)
+                if self._update_tracking(frame, analysis):
+                    self._identify(frame, captured_at)
+
+            except Exception as e:
+                self.last_error = f"Auto identify error: {e}"
+                app_logger.error(self.last_error)
+                time.sleep(0.5)
+
+    def _update_tracking(self, frame: np.ndarray, analysis: stream_overlay.GuideAnalysis) -> bool:
+        """
+        Update stability tracking with one analyzed frame
+
+        Returns:
+            True if identification should run on this frame
+        """
+        if analysis.status != "good" or not _face_quality_ok(frame, analysis.valid_faces[0]):
+            self._stable_count = 0
+            self._last_center = None
+            self._missing_count += 1
+            # 얼굴이 잠시 사라진 정도가 아니라 자리를 떠났으면 다음 사람을 받을 준비
+            if self._missing_count >= self.stable_frames:
+                self._consumed = False
+            return False
+
+        self._missing_count = 0
+        x, y, w_face, h_face = analysis.valid_faces[0]
+        center = (x + w_face / 2.0, y + h_face / 2.0)
+
+        max_shift = self.max_movement * frame.shape[1]
+        if self._last_center is not None and \
+                abs(center[0] - self._last_center[0]) <= max_shift and \
+                abs(center[1] - self._last_center[1]) <= max_shift:
+            self._stable_count += 1
+        else:
+            self._stable_count = 1
+        self._last_center = center
+
+        if self._consumed or time.time() < self._retry_after:
+            return False
+        return self._stable_count >= self.stable_frames
+
+    def _identify(self, frame: np.ndarray, captured_at: float):
+        """Run identification and attendance recording, then publish the outcome"""
+        self.attempts += 1
+        frame_age_ms = round((time.time() - captured_at) * 1000, 1)
+        attendance_type = self.type
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            result = inference.identify_from_image(db, frame)
+            result.frame_age_ms = frame_age_ms
+
+            if not result.success:
+                attendance_service.record_attempt_result(
+                    db=db,
+                    result=result,
+                    type=attendance_type,
+                    device_id=self.device_id,
+                    latency_ms=round((time.perf_counter() - start) * 1000, 1)
+                )
+                self._stable_count = 0
+                self._retry_after = time.time() + self.retry_sec
+                self._publish(attendance_type, result.to_dict(), recorded=False)
+                return
+
+            # 같은 사람이 프레임에 머무는 동안 재인식하지 않음
+            self._consumed = True
+
+            now = time.time()
+            last_seen = self._last_seen.get(result.employee_id)
+            if last_seen is not None and now - last_seen < self.cooldown_sec:
+                app_logger.debug(f"Auto identify cooldown: {result.employee_id}")
+                return
+            self._last_seen[result.employee_id] = now
+            self._prune_cooldowns(now)
+
+            rejection = attendance_service.record_identified(
+                db=db,
+                employee_id=result.employee_id,
+                name=result.name,
+                type=attendance_type,
+                device_id=self.device_id
+            )
+            if rejection is None:
+                self.recorded += 1
+            self._publish(attendance_type, rejection or result.to_dict(), recorded=rejection is None)
+
+        finally:
+            db.close()
+
+    def _prune_cooldowns(self, now: float):
+        """Forget employees whose cooldown has expired"""
+        expired = [emp for emp, ts in self._last_seen.items() if now - ts >= self.cooldown_sec]
+        for emp in expired:
+            del self._last_seen[emp]
+
+    def _publish(self, attendance_type: str, payload: dict, recorded: bool):
+        identify_events.publish({
+            "event": "identify",
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "device_id": self.device_id,
+            "type": attendance_type,
+            "recorded": recorded,
+            "result": payload
+        })
+
+
+def _face_quality_ok(frame: np.ndarray, box: Tuple[int, int, int, int]) -> bool:
+    """Cheap brightness/contrast check on the face box (same limits as face_service)"""
+    x, y, w_face, h_face = box
+    roi = frame[max(0, y):y + h_face, max(0, x):x + w_face]
+    if roi.size == 0:
+        return False
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    return np.mean(gray) >= face_service.FACE_MIN_BRIGHTNESS and np.std(gray) >= face_service.FACE_MIN_STD
+
+
+# Global auto identify instance
+auto_identifier = AutoIdentifier()
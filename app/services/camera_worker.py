@@ -2,39 +2,55 @@
 Camera worker for MODE_A (server-side camera)
 Manages single camera capture in background thread for MJPEG streaming
 """
+import asyncio
 import cv2
 import threading
 import time
 import numpy as np
 import os
-from typing import Optional
+from collections import deque
+from typing import List, Optional, Tuple
 from app.core.config import settings
 from app.core.logging import app_logger
+from app.services.frame_sources import FrameSource, create_frame_source
 
 # OpenCV 경고 메시지 완전히 숨기기
 os.environ["OPENCV_LOG_LEVEL"] = "SILENT"
 cv2.setLogLevel(0)
 
 
-
 class CameraWorker:
     """
     서버 측 카메라를 백그라운드 스레드로 계속 캡처하고, 최신 프레임을 MJPEG 스트리밍에 제공
-    OpenCV 카메라 -> frame read -> latest_frame
+    FrameSource (카메라/영상 파일/이미지/합성) -> frame read -> latest_frame
     """
     
-    def __init__(self, device_index: int = None, fps: int = None):        
+    def __init__(
+        self,
+        device_index: int = None,
+        fps: int = None,
+        low_latency: bool = None,
+        source: Optional[FrameSource] = None
+    ):        
         self.device_index = device_index or settings.CAMERA_DEVICE_INDEX # 사용할 카메라 장치 번호
         self.target_fps = fps or settings.STREAM_FPS # 목표 fps
         self.frame_interval = 1.0 / self.target_fps # 프레임 간격 (1/FPS)
+        self.low_latency = settings.CAMERA_LOW_LATENCY if low_latency is None else low_latency # 드라이버 버퍼 비우기 모드
         
-        self.cap: Optional[cv2.VideoCapture] = None # OpenCV VideoCapture 객체
+        self.source_override = source # 지정 시 CAMERA_SOURCE 설정 대신 사용 (벤치마크/테스트)
+        self.source: Optional[FrameSource] = None # 현재 프레임 소스
+        self.frames_captured = 0 # start 이후 캡처한 프레임 수
+        self.started_at: float = 0 # start 시각
         self.latest_frame: Optional[np.ndarray] = None # 최신 프레임 (numpy array)
         self.latest_frame_time: float = 0  # 프레임 캡처 시간
+        self.frame_seq: int = 0 # 프레임 일련번호 (새 프레임마다 증가)
+        self.recent_frames: deque = deque(maxlen=max(1, settings.CAMERA_FRAME_BUFFER)) # (frame, seq, 캡처 시각) 최근 프레임
         self.thread: Optional[threading.Thread] = None # 캡처 스레드
         self.running = False # 스레드 동작 여부
         self.lock = threading.Lock() # 프레임 lock
+        self.frame_cond = threading.Condition(self.lock) # 새 프레임 알림 (스레드 대기자)
         self.last_error: Optional[str] = None # 에러 메세지
+        self._async_waiters: dict = {} # asyncio future -> event loop (새 프레임 대기자)
         
     def start(self) -> bool:
         """
@@ -45,25 +61,30 @@ class CameraWorker:
             return True
         
         try:
-            # Open camera
-            self.cap = cv2.VideoCapture(self.device_index)
+            # Open frame source
+            self.source = self.source_override or create_frame_source(
+                device_index=self.device_index,
+                fps=self.target_fps,
+                low_latency=self.low_latency
+            )
             
-            if not self.cap.isOpened():
-                self.last_error = f"Failed to open camera device {self.device_index}"
+            if not self.source.open():
+                self.last_error = f"Failed to open frame source ({self.source.describe()})"
                 app_logger.error(self.last_error)
+                self.source.release()
+                self.source = None
                 return False
             
-            # Set camera properties
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
-            
             # Start capture thread
             self.running = True
+            self.frames_captured = 0
+            self.started_at = time.time()
             self.thread = threading.Thread(target=self._capture_loop, daemon=True)
             self.thread.start()
             
-            app_logger.info(f"Camera worker started (device={self.device_index}, fps={self.target_fps})")
+            app_logger.info(
+                f"Camera worker started ({self.source.describe()}, fps={self.target_fps})"
+            )
             return True
             
         except Exception as e:
@@ -73,7 +94,7 @@ class CameraWorker:
     
     def stop(self):
         """Stop camera capture thread"""
-        if not self.running:
+        if not self.running and self.source is None:
             return
         
         app_logger.info("Stopping camera worker...")
@@ -83,13 +104,14 @@ class CameraWorker:
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2.0)
         
-        # Release camera
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        # Release frame source
+        if self.source:
+            self.source.release()
+            self.source = None
         
         with self.lock:
             self.latest_frame = None
+            self.recent_frames.clear()
         
         app_logger.info("Camera worker stopped")
     
@@ -106,6 +128,117 @@ class CameraWorker:
                 return self.latest_frame.copy()
             return None
     
+    def get_latest_frame_with_meta(self) -> Tuple[Optional[np.ndarray], int, float]:
+        """
+        캡처된 프레임과 일련번호, 캡처 시각을 함께 반환
+
+        Returns:
+            (frame copy or None, frame_seq, latest_frame_time)
+        """
+        with self.lock:
+            frame = self.latest_frame.copy() if self.latest_frame is not None else None
+            return frame, self.frame_seq, self.latest_frame_time
+    
+    def get_recent_frames(self, n: Optional[int] = None) -> List[Tuple[np.ndarray, int, float]]:
+        """
+        최근 캡처된 프레임들 (최신순)
+
+        Frames are shared, not copied - callers must treat them as read-only.
+
+        Args:
+            n: Maximum number of frames (None -> whole buffer)
+
+        Returns:
+            List of (frame, frame_seq, capture timestamp), newest first
+        """
+        with self.lock:
+            frames = list(self.recent_frames)
+        frames.reverse()
+        return frames[:n] if n else frames
+    
+    def get_frame_age(self) -> Optional[float]:
+        """
+        최신 프레임의 캡처 후 경과 시간 (초)
+
+        Returns:
+            time.time() - latest_frame_time, or None if no frame
+        """
+        with self.lock:
+            if self.latest_frame is None or self.latest_frame_time == 0:
+                return None
+            return time.time() - self.latest_frame_time
+    
+    async def wait_for_frame(self, last_seq: int, timeout: float = 1.0) -> Optional[int]:
+        """
+        Await a frame newer than last_seq without blocking the event loop
+
+        Args:
+            last_seq: Last frame sequence number the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            New frame_seq, or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.latest_frame is not None and self.frame_seq != last_seq:
+                return self.frame_seq
+            future = loop.create_future()
+            self._async_waiters[future] = loop
+        
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self.lock:
+                self._async_waiters.pop(future, None)
+    
+    def wait_for_frame_blocking(self, last_seq: int, timeout: float = 1.0) -> Optional[int]:
+        """
+        Block the calling thread until a frame newer than last_seq arrives
+
+        Args:
+            last_seq: Last frame sequence number the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            New frame_seq, or None on timeout
+        """
+        with self.frame_cond:
+            self.frame_cond.wait_for(
+                lambda: self.latest_frame is not None and self.frame_seq != last_seq,
+                timeout=timeout
+            )
+            if self.latest_frame is not None and self.frame_seq != last_seq:
+                return self.frame_seq
+            return None
+    
+    def _notify_async_waiters(self, seq: int):
+        """캡처 스레드에서 호출 - 대기 중인 asyncio future 깨우기 (lock 보유 상태)"""
+        for future, loop in self._async_waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future, seq)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+        self._async_waiters.clear()
+    
+    def get_stats(self) -> dict:
+        """
+        캡처 처리량 통계 (벤치마크/모니터링용)
+
+        Returns:
+            Dict with source, frames_captured, elapsed_sec, capture_fps
+        """
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            "source": self.source.describe() if self.source else None,
+            "frames_captured": self.frames_captured,
+            "elapsed_sec": round(elapsed, 3),
+            "capture_fps": round(self.frames_captured / elapsed, 2) if elapsed > 0 else 0.0
+        }
+    
     def _capture_loop(self):
         """
         Main capture loop (runs in background thread)
@@ -113,30 +246,49 @@ class CameraWorker:
         """
         app_logger.debug("Camera capture loop started")
         
+        source = self.source
+        # realtime 소스는 소스 고유 fps(없으면 target_fps)로 페이싱, 아니면 최대 속도
+        if source.realtime:
+            frame_interval = 1.0 / source.fps if source.fps else self.frame_interval
+        else:
+            frame_interval = 0
+        
         while self.running:
             try:
                 start_time = time.time()
                 
                 # Capture frame
-                ret, frame = self.cap.read()
+                ret, frame, captured_at = source.read()
                 
                 if not ret or frame is None:
+                    if source.exhausted:
+                        # 루프하지 않는 파일 소스 끝
+                        self.last_error = "Frame source exhausted"
+                        app_logger.info(self.last_error)
+                        self.running = False
+                        break
                     self.last_error = "Failed to capture frame"                    
                     # 프레임 캡처 실패 시 latest_frame 무효화
                     with self.lock:
                         self.latest_frame = None
                         self.latest_frame_time = 0
+                        self.recent_frames.clear()
                     time.sleep(0.1)
                     continue
                 
                 # Update latest frame with timestamp
                 with self.lock:
                     self.latest_frame = frame
-                    self.latest_frame_time = time.time()
+                    self.latest_frame_time = captured_at
+                    self.frame_seq += 1
+                    self.frames_captured += 1
+                    self.recent_frames.append((frame, self.frame_seq, captured_at))
+                    self._notify_async_waiters(self.frame_seq)
+                    self.frame_cond.notify_all()
                 
                 # Maintain target FPS
                 elapsed = time.time() - start_time
-                sleep_time = max(0, self.frame_interval - elapsed)
+                sleep_time = max(0, frame_interval - elapsed)
                 if sleep_time > 0:
                     time.sleep(sleep_time)
                     
@@ -152,5 +304,11 @@ class CameraWorker:
         return self.last_error
 
 
+def _resolve_future(future: asyncio.Future, value):
+    """Set a future result from the owning loop, ignoring cancelled waiters"""
+    if not future.done():
+        future.set_result(value)
+
+
 # Global camera worker instance
 camera_worker = CameraWorker()
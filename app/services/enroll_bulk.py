@@ -0,0 +1,386 @@
+"""
+Bulk enrollment
+Enrolls many (name, image) entries in stages: parallel decode/detect,
+batched embedding, parallel artifact writes, chunked user inserts
+"""
+import csv
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.models import FaceTemplate, User
+from app.services import artifact_store, face_dedup, face_service, id_allocator
+from app.services.gallery import gallery, mark_changed as mark_gallery_changed
+from app.utils.image_io import (
+    check_image_header, sniff_image_format, validate_image_extension, validate_image_size, resize_image
+)
+from app.utils.upload import too_large_message
+
+# zip 안의 이름 매핑 파일 (filename,name). 없으면 파일명(확장자 제외)을 이름으로 사용
+ZIP_MANIFEST = "manifest.csv"
+
+
+class BulkEntry:
+    """일괄 등록 항목 1건 (단계별 중간 결과 포함)"""
+
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        filename: str,
+        data: Optional[bytes],
+        member: Optional[Tuple[zipfile.ZipFile, zipfile.ZipInfo]] = None
+    ):
+        self.index = index
+        self.name = name
+        self.filename = filename
+        self.data: Optional[bytes] = data
+        # zip 항목은 _prepare에서 하나씩 압축 해제 (요청 전체를 한 번에 풀지 않음)
+        self.member = member
+
+        self.image: Optional[np.ndarray] = None
+        self.face: Optional[np.ndarray] = None
+        self.embedding: Optional[np.ndarray] = None
+        self.employee_id: Optional[str] = None
+        self.embedding_path: Optional[str] = None
+        self.thumbnail_path: Optional[str] = None
+        # 기록한 파일의 목록 행 - 성공하면 INSERT와 같은 트랜잭션에서, 실패해도 마지막에 등록 (GC 대상)
+        self.artifact_rows: List[Dict[str, Any]] = []
+        # 중복 얼굴(attach 모드): 기존 직원 employee_id 또는 같은 요청의 앞선 항목
+        self.attach_to: Optional[str] = None
+        self.attach_parent: Optional["BulkEntry"] = None
+        self.attach_name: Optional[str] = None
+
+        self.success = False
+        self.reason: Optional[str] = None
+        self.message: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.reason is None
+
+    @property
+    def attached(self) -> bool:
+        return self.attach_to is not None or self.attach_parent is not None
+
+    def fail(self, reason: str, message: str):
+        self.reason = reason
+        self.message = message
+        # 실패 항목은 이미지 메모리를 바로 반환 (이미 기록된 파일은 목록에 등록되어 GC가 정리)
+        self.data = self.image = self.face = self.member = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"index": self.index, "name": self.name, "filename": self.filename, "success": self.success}
+        if self.success:
+            result["employee_id"] = self.employee_id
+            if self.attached:
+                result["attached"] = True
+        else:
+            result["reason"] = self.reason
+            result["message"] = self.message
+        return result
+
+
+class BulkArchiveError(Exception):
+    """zip 전체를 거부하는 경우 (항목 수 / 압축 해제 크기 초과)"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def parse_zip(archive: zipfile.ZipFile) -> List[BulkEntry]:
+    """
+    Entries from a zip archive, checked against the limits from the central
+    directory only (no member is decompressed here)
+
+    Names come from manifest.csv (filename,name) when present, otherwise
+    from each image's file name without extension. Members are inflated one
+    at a time in _prepare, so the archive must stay open until
+    enroll_entries returns
+
+    Args:
+        archive: Open zip archive
+
+    Returns:
+        Entries in archive order
+
+    Raises:
+        BulkArchiveError: Too many images or total uncompressed size over
+            ENROLL_BULK_MAX_BYTES
+    """
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename != ZIP_MANIFEST and not os.path.basename(info.filename).startswith(".")
+    ]
+    if len(members) > settings.ENROLL_BULK_MAX_ENTRIES:
+        raise BulkArchiveError(
+            "too_many_entries", f"한 번에 최대 {settings.ENROLL_BULK_MAX_ENTRIES}명까지 등록할 수 있습니다"
+        )
+    # 항목별 한도를 넘는 파일은 어차피 풀지 않으므로 합계에서 제외 (file_size는 헤더 값이지만 압축 해제 시 이 크기에서 잘림)
+    total_size = sum(info.file_size for info in members if info.file_size <= settings.UPLOAD_MAX_BYTES)
+    if total_size > settings.ENROLL_BULK_MAX_BYTES:
+        raise BulkArchiveError(
+            "too_large",
+            f"압축 해제 크기가 너무 큽니다 (최대 {settings.ENROLL_BULK_MAX_BYTES // (1024 * 1024)}MB)"
+        )
+
+    names = {}
+    if ZIP_MANIFEST in archive.namelist():
+        with archive.open(ZIP_MANIFEST) as f:
+            for row in csv.DictReader(io.TextIOWrapper(f, encoding="utf-8-sig")):
+                if row.get("filename") and row.get("name"):
+                    names[row["filename"].strip()] = row["name"].strip()
+
+    entries = []
+    for info in members:
+        stem = os.path.splitext(os.path.basename(info.filename))[0]
+        name = names.get(info.filename) or names.get(os.path.basename(info.filename)) or stem
+        entry = BulkEntry(len(entries), name, info.filename, None, member=(archive, info))
+        # 압축 해제 크기가 한도를 넘는 항목은 풀지 않음
+        if info.file_size > settings.UPLOAD_MAX_BYTES:
+            entry.fail("too_large", too_large_message(settings.UPLOAD_MAX_BYTES))
+        entries.append(entry)
+    return entries
+
+
+def _read_member(entry: BulkEntry):
+    """Inflate one zip member (worker thread; ZipFile serializes reads of the shared file)"""
+    archive, info = entry.member
+    entry.member = None
+    try:
+        entry.data = archive.read(info)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError, OSError) as e:
+        # CRC 오류, 지원하지 않는 압축 방식, 암호화된 항목 등
+        app_logger.warning(f"Failed to extract {info.filename}: {e}")
+        entry.fail("invalid_format", "zip 항목을 읽을 수 없습니다")
+
+
+def _prepare(entry: BulkEntry):
+    """Stage 1 (worker thread): validate, decode, resize, detect"""
+    if not entry.ok:
+        return  # 업로드 단계에서 이미 거부됨
+    if not validate_image_extension(entry.filename):
+        return entry.fail("invalid_format", "지원하지 않는 이미지 형식입니다")
+    if not entry.name:
+        return entry.fail("missing_name", "이름이 필요합니다")
+    if entry.member is not None:
+        _read_member(entry)
+        if not entry.ok:
+            return
+    if not entry.data:
+        return entry.fail("empty_file", "이미지 파일이 비어있습니다")
+    if sniff_image_format(entry.data) is None:
+        return entry.fail("invalid_format", "지원하지 않는 이미지 형식입니다")
+
+    rejection = check_image_header(entry.data)
+    if rejection:
+        return entry.fail("bad_quality", rejection)
+    image = face_service.decode_image(entry.data)
+    entry.data = None
+    if image is None:
+        return entry.fail("bad_quality", "이미지를 디코딩할 수 없습니다")
+    if not validate_image_size(image):
+        return entry.fail("bad_quality", "이미지가 너무 작습니다")
+    entry.image = resize_image(image)
+
+    face_result = face_service.detect_single_face(entry.image)
+    if face_result is None:
+        return entry.fail("no_face", "얼굴을 감지할 수 없습니다. 정면 사진을 사용해주세요.")
+    entry.face = face_result[1]
+
+
+def _write_artifacts(entry: BulkEntry):
+    """Stage 4 (worker thread): thumbnail + embedding file (content-addressed)"""
+    thumbnail = artifact_store.prepare_thumbnail(entry.image)
+    if thumbnail is None or not artifact_store.write(thumbnail):
+        return entry.fail("internal_error", "프로필 이미지 저장 실패")
+    entry.artifact_rows.append(thumbnail.manifest_row())
+    embedding = artifact_store.prepare_embedding(entry.embedding)
+    if not artifact_store.write(embedding):
+        return entry.fail("internal_error", "임베딩 저장 실패")
+    entry.artifact_rows.append(embedding.manifest_row())
+    entry.thumbnail_path = thumbnail.relative_path
+    entry.embedding_path = embedding.relative_path
+    entry.image = entry.face = None
+
+
+def enroll_entries(db: Session, entries: List[BulkEntry]) -> Dict[str, Any]:
+    """
+    Run the bulk enrollment pipeline
+
+    1. decode / validate / detect in ENROLL_BULK_WORKERS threads
+    2. embed in batches of ENROLL_BULK_EMBED_BATCH
+    3. duplicate check (gallery + within the batch), then reserve one
+       employee_id block for the new faces only
+    4. write thumbnails and .npy files in parallel
+    5. insert users ENROLL_BULK_CHUNK_SIZE rows per transaction, then the
+       extra face_templates of attached duplicates
+    6. add all new embeddings to the gallery at once
+
+    Args:
+        db: Database session
+        entries: Parsed entries
+
+    Returns:
+        Summary with per-entry results
+    """
+    start = time.perf_counter()
+    timings = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.ENROLL_BULK_WORKERS), thread_name_prefix="enroll-bulk") as pool:
+        # 1. 디코딩/감지 (병렬)
+        t = time.perf_counter()
+        list(pool.map(_prepare, entries))
+        timings["detect_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        # 2. 배치 임베딩
+        t = time.perf_counter()
+        ready = [e for e in entries if e.ok]
+        batch_size = max(1, settings.ENROLL_BULK_EMBED_BATCH)
+        for i in range(0, len(ready), batch_size):
+            batch = ready[i:i + batch_size]
+            for entry, embedding in zip(batch, face_service.embed_batch([e.face for e in batch])):
+                if embedding is None:
+                    entry.fail("bad_quality", "얼굴 임베딩 생성 실패")
+                else:
+                    entry.embedding = embedding
+        timings["embed_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        # 3. 중복 얼굴 검사 후 새 얼굴에만 ID 블록 예약
+        t = time.perf_counter()
+        ready = [e for e in ready if e.ok]
+        attach = face_dedup.duplicate_action() == "attach"
+        checks = face_dedup.find_duplicates(db, [e.embedding for e in ready])
+        for entry, (match, earlier) in zip(ready, checks):
+            if match is not None:
+                if attach:
+                    entry.attach_to, entry.attach_name = match[0], match[1]
+                else:
+                    entry.fail("duplicate_face", f"이미 등록된 얼굴입니다 ({match[0]})")
+            elif earlier is not None:
+                if attach:
+                    entry.attach_parent = ready[earlier]
+                else:
+                    entry.fail("duplicate_face", f"같은 요청의 {ready[earlier].index}번 항목과 같은 얼굴입니다")
+        timings["dedup_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        ready = [e for e in ready if e.ok]
+        new_faces = [e for e in ready if not e.attached]
+        if new_faces:
+            for entry, employee_id in zip(new_faces, id_allocator.reserve_employee_ids(db, len(new_faces))):
+                entry.employee_id = employee_id
+        for entry in ready:
+            if entry.attach_to:
+                entry.employee_id = entry.attach_to
+            elif entry.attach_parent is not None:
+                entry.employee_id = entry.attach_parent.employee_id
+                entry.attach_name = entry.attach_parent.name
+
+        # 4. 썸네일 / 임베딩 파일 저장 (병렬)
+        t = time.perf_counter()
+        list(pool.map(_write_artifacts, ready))
+        timings["write_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    # 5. 청크 단위 INSERT (새 사용자 먼저, 이어서 추가 템플릿)
+    t = time.perf_counter()
+    chunk_size = max(1, settings.ENROLL_BULK_CHUNK_SIZE)
+    enrolled: List[BulkEntry] = []
+    new_faces = [e for e in ready if e.ok and not e.attached]
+    for i in range(0, len(new_faces), chunk_size):
+        chunk = new_faces[i:i + chunk_size]
+        try:
+            db.execute(User.__table__.insert(), [
+                {
+                    "employee_id": e.employee_id,
+                    "name": e.name,
+                    "profile_image": e.embedding_path,
+                    "thumbnail_path": e.thumbnail_path
+                }
+                for e in chunk
+            ])
+            artifact_store.register_rows(db, [row for e in chunk for row in e.artifact_rows])
+            mark_gallery_changed(db)
+            db.commit()
+        except Exception as ex:
+            db.rollback()
+            app_logger.error(f"Bulk enroll chunk failed: {ex}")
+            for entry in chunk:
+                entry.fail("internal_error", "등록 중 오류가 발생했습니다")
+            continue
+        for entry in chunk:
+            entry.success = True
+        enrolled.extend(chunk)
+
+    # 앞선 항목에 붙는 템플릿은 그 항목이 등록된 경우에만
+    templates = []
+    for entry in ready:
+        if not entry.ok or not entry.attached:
+            continue
+        if entry.attach_parent is not None and not entry.attach_parent.success:
+            entry.fail(entry.attach_parent.reason or "internal_error", "같은 얼굴의 앞선 항목 등록에 실패했습니다")
+            continue
+        templates.append(entry)
+    for i in range(0, len(templates), chunk_size):
+        chunk = templates[i:i + chunk_size]
+        try:
+            db.execute(FaceTemplate.__table__.insert(), [
+                {
+                    "employee_id": e.employee_id,
+                    "embedding_path": e.embedding_path,
+                    "thumbnail_path": e.thumbnail_path
+                }
+                for e in chunk
+            ])
+            artifact_store.register_rows(db, [row for e in chunk for row in e.artifact_rows])
+            mark_gallery_changed(db)
+            db.commit()
+        except Exception as ex:
+            db.rollback()
+            app_logger.error(f"Bulk enroll template chunk failed: {ex}")
+            for entry in chunk:
+                entry.fail("internal_error", "등록 중 오류가 발생했습니다")
+            continue
+        for entry in chunk:
+            entry.success = True
+        enrolled.extend(chunk)
+
+    # 파일 기록 후 실패한 항목의 파일도 목록에 등록 (참조가 없으므로 유예 시간 뒤 GC가 삭제)
+    orphaned = [row for e in entries if not e.success for row in e.artifact_rows]
+    if orphaned:
+        try:
+            artifact_store.register_rows(db, orphaned)
+            db.commit()
+        except Exception as ex:
+            db.rollback()
+            app_logger.error(f"Failed to register {len(orphaned)} orphaned bulk enroll artifacts: {ex}")
+    timings["insert_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    # 6. 갤러리 1회 갱신 (추가 템플릿은 파일 경로를 행 키로)
+    gallery.add_many([
+        (e.employee_id, e.attach_name or e.name, e.embedding, e.embedding_path if e.attached else None)
+        for e in enrolled
+    ])
+
+    elapsed = time.perf_counter() - start
+    app_logger.info(
+        f"Bulk enroll: {len(enrolled)}/{len(entries)} enrolled in {elapsed:.1f}s ({timings})"
+    )
+    return {
+        "success": True,
+        "total": len(entries),
+        "enrolled": len(enrolled),
+        "failed": len(entries) - len(enrolled),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "timings": timings,
+        "results": [e.to_dict() for e in entries]
+    }
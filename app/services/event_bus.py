@@ -0,0 +1,71 @@
+"""
+Event broadcaster
+Fans out events published from worker threads to asyncio subscribers (WebSocket / SSE)
+"""
+import asyncio
+import threading
+from typing import Any, Dict
+from app.core.logging import app_logger
+
+
+class EventBroadcaster:
+    """
+    스레드에서 publish -> 각 구독자의 asyncio.Queue로 전달
+
+    느린 구독자는 가장 오래된 이벤트부터 버려서 publish가 막히지 않게 한다
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber queue (call from the event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue"""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        Publish an event to all subscribers (thread-safe)
+
+        Args:
+            event: JSON-serializable event payload
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_drop_oldest, queue, event)
+            except RuntimeError:
+                # Event loop closed - drop subscriber
+                self.unsubscribe(queue)
+            except Exception as e:
+                app_logger.warning(f"Failed to publish event: {e}")
+
+
+def _put_drop_oldest(queue: asyncio.Queue, event: Dict[str, Any]):
+    """Enqueue on the owning loop, discarding the oldest event when full"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(event)
+
+
+# 자동 인식 결과 이벤트
+identify_events = EventBroadcaster()
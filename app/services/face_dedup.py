@@ -0,0 +1,92 @@
+"""
+Duplicate face check for enrollment
+Searches the gallery with a new embedding before a user is created
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.gallery import gallery
+
+# 중복 얼굴 처리 방식
+#   reject: 등록 거부 (reason=duplicate_face)
+#   attach: 기존 직원의 추가 얼굴 템플릿으로 저장 (face_templates)
+#   off:    검사 안 함
+DUPLICATE_ACTIONS = ("reject", "attach", "off")
+
+
+def duplicate_action() -> str:
+    """Configured action (unknown values fall back to reject)"""
+    action = settings.ENROLL_DUPLICATE_ACTION.lower()
+    return action if action in DUPLICATE_ACTIONS else "reject"
+
+
+def find_duplicate(db: Session, embedding: np.ndarray) -> Optional[Tuple[str, str, float]]:
+    """
+    Enrolled user whose face is within ENROLL_DUPLICATE_TOLERANCE of a new embedding
+
+    Args:
+        db: Database session (used only if the gallery is not loaded yet)
+        embedding: New user's embedding
+
+    Returns:
+        (employee_id, name, distance) or None
+    """
+    if duplicate_action() == "off":
+        return None
+    if not gallery.loaded:
+        gallery.load(db)
+
+    match = gallery.search(embedding)
+    if match is not None and match[2] <= settings.ENROLL_DUPLICATE_TOLERANCE:
+        return match
+    return None
+
+
+def find_duplicates(
+    db: Session,
+    embeddings: List[np.ndarray]
+) -> List[Tuple[Optional[Tuple[str, str, float]], Optional[int]]]:
+    """
+    Duplicate check for a whole batch (bulk enrollment)
+
+    One GEMM against the gallery plus one pairwise pass inside the batch, so
+    two photos of the same new person in one upload are caught as well
+
+    Args:
+        db: Database session (used only if the gallery is not loaded yet)
+        embeddings: New embeddings in input order
+
+    Returns:
+        Per embedding: (gallery match or None, index of an earlier new
+        embedding of the same face or None)
+    """
+    results = [(None, None)] * len(embeddings)
+    if duplicate_action() == "off" or not embeddings:
+        return results
+    if not gallery.loaded:
+        gallery.load(db)
+
+    tolerance = settings.ENROLL_DUPLICATE_TOLERANCE
+    queries = np.vstack([np.asarray(e, dtype=np.float32).ravel() for e in embeddings])
+    matches = gallery.search_many(queries)
+
+    # 배치 내부 쌍별 거리 (앞선 '새 얼굴'과만 비교)
+    squared_norms = np.sum(queries ** 2, axis=1)
+    pairwise = np.sqrt(np.maximum(
+        squared_norms[:, np.newaxis] + squared_norms[np.newaxis, :] - 2.0 * queries @ queries.T, 0.0
+    ))
+
+    results = []
+    new_faces: List[int] = []
+    for j, match in enumerate(matches):
+        if match is not None and match[2] <= tolerance:
+            results.append((match, None))
+            continue
+        earlier = next((i for i in new_faces if pairwise[i, j] <= tolerance), None)
+        if earlier is None:
+            new_faces.append(j)
+        results.append((None, earlier))
+    return results
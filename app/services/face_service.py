@@ -3,12 +3,11 @@ Face recognition service
 Handles face detection, embedding generation, and comparison
 """
 import cv2
+import threading
 import numpy as np
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from app.core.config import settings
 from app.core.logging import app_logger
-from app.utils.image_io import save_image, create_thumbnail
-from app.utils.paths import get_encoding_path, get_thumbnail_path, get_relative_path
 
 """
 얼굴 인식에 필요한 모든 핵심 기능
@@ -16,10 +15,25 @@ from app.utils.paths import get_encoding_path, get_thumbnail_path, get_relative_
 얼굴 감지 (DeepFace → SSD → fallback Haar)
 임베딩 생성 (DeepFace Facenet → fallback HOG)
 L2 거리 기반 사용자 매칭
-임베딩 저장/로딩
-썸네일 저장
+임베딩 로딩 (저장은 artifact_store)
 """
 
+# 품질 기준 (평균 밝기, 표준편차)
+IMAGE_MIN_BRIGHTNESS = 40
+IMAGE_MIN_STD = 20
+FACE_MIN_BRIGHTNESS = 30
+FACE_MIN_STD = 15
+
+# 프레임 품질 점수 기준 (best-of-N 선택)
+SHARPNESS_REF = 300.0      # 이 이상의 Laplacian 분산은 충분히 선명한 것으로 간주
+GOOD_FACE_RATIO = 0.10     # 이 이상의 얼굴 면적 비율은 충분히 큰 것으로 간주
+
+# CascadeClassifier는 스레드 간 공유가 안전하지 않으므로 스레드별로 1회 로드
+_haar_local = threading.local()
+
+# 임베딩 모델 준비 여부 (readiness 체크용)
+MODEL_READY = False
+
 try:
     # 서버 시작 시 Facenet 모델 미리 로드 (첫 인식 속도 개선)
     from deepface import DeepFace
@@ -28,15 +42,45 @@ try:
     try:
         app_logger.info("Pre-loading Facenet model...")
         DeepFace.build_model("Facenet")
+        MODEL_READY = True
         app_logger.info("Facenet model pre-loaded successfully")
     except Exception as e:
         app_logger.warning(f"Failed to pre-load Facenet model: {e}")
         
 except ImportError:
     DEEPFACE_AVAILABLE = False
+    MODEL_READY = True  # fallback(HOG) 임베딩은 모델 로드 불필요
     app_logger.warning("DeepFace library not available, using fallback embedding method")
 
 
+def ensure_model() -> bool:
+    """
+    임베딩 모델 준비 확인 (시작 시 미리 로드에 실패했으면 다시 시도)
+    
+    Returns:
+        True if embeddings can be generated
+    """
+    global MODEL_READY
+    if MODEL_READY:
+        return True
+    try:
+        DeepFace.build_model("Facenet")
+        MODEL_READY = True
+        app_logger.info("Facenet model loaded")
+    except Exception as e:
+        app_logger.warning(f"Facenet model still not loadable: {e}")
+    return MODEL_READY
+
+
+def get_haar_cascade() -> cv2.CascadeClassifier:
+    """Haar Cascade 분류기 (스레드별 최초 1회 로드 후 재사용)"""
+    cascade = getattr(_haar_local, "cascade", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        _haar_local.cascade = cascade
+    return cascade
+
+
 def decode_image(file_bytes: bytes) -> Optional[np.ndarray]:
     """
     byte -> OpenCV BGR 이미지 전환
@@ -60,7 +104,7 @@ def detect_single_face(bgr_image: np.ndarray) -> Optional[Tuple[Tuple[int, int,
                 app_logger.debug(f"Image quality: mean_brightness={mean_brightness:.1f}, std={std_brightness:.1f}")
                 
                 # 너무 어둡거나 변화가 없는 이미지는 거부 (임계값 완화)
-                if mean_brightness < 40 or std_brightness < 20:
+                if mean_brightness < IMAGE_MIN_BRIGHTNESS or std_brightness < IMAGE_MIN_STD:
                     app_logger.warning(f"Image rejected: too dark or uniform (mean={mean_brightness:.1f}, std={std_brightness:.1f})")
                     return None
                 
@@ -106,7 +150,7 @@ def detect_single_face(bgr_image: np.ndarray) -> Optional[Tuple[Tuple[int, int,
                 app_logger.debug(f"Face quality: brightness={face_brightness:.1f}, std={face_std:.1f}")
                 
                 # 얼굴 영역이 너무 어둡거나 변화가 없으면 거부 (임계값 완화)
-                if face_brightness < 30 or face_std < 15:
+                if face_brightness < FACE_MIN_BRIGHTNESS or face_std < FACE_MIN_STD:
                     app_logger.warning(f"Face rejected: too dark or uniform (brightness={face_brightness:.1f}, std={face_std:.1f})")
                     return None
                 
@@ -118,9 +162,7 @@ def detect_single_face(bgr_image: np.ndarray) -> Optional[Tuple[Tuple[int, int,
         
         # Fallback: OpenCV Haar Cascade
         gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        faces = get_haar_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
         
         if len(faces) == 0:
             app_logger.warning("No face detected (Haar Cascade)")
@@ -140,6 +182,51 @@ def detect_single_face(bgr_image: np.ndarray) -> Optional[Tuple[Tuple[int, int,
         app_logger.error(f"Error detecting face: {e}", exc_info=True)
         return None
 
+def score_frame_quality(bgr_image: np.ndarray) -> float:
+    """
+    Cheap quality score for choosing the best camera frame before embedding
+    
+    Haar detection on a half-size frame, then Laplacian sharpness, face size and
+    brightness on the largest face. Frames failing the detect_single_face
+    brightness/contrast limits score 0.
+    
+    Args:
+        bgr_image: Input image in BGR format
+        
+    Returns:
+        Score in [0, 1], 0 if no usable face
+    """
+    try:
+        gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
+        if np.mean(gray) < IMAGE_MIN_BRIGHTNESS or np.std(gray) < IMAGE_MIN_STD:
+            return 0.0
+        
+        # 절반 크기에서 빠르게 감지
+        small = cv2.resize(gray, (gray.shape[1] // 2, gray.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        faces = get_haar_cascade().detectMultiScale(small, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))
+        if len(faces) == 0:
+            return 0.0
+        
+        x, y, w, h = [int(v) * 2 for v in max(faces, key=lambda f: f[2] * f[3])]
+        face_gray = gray[y:y+h, x:x+w]
+        if face_gray.size == 0:
+            return 0.0
+        
+        face_brightness = np.mean(face_gray)
+        if face_brightness < FACE_MIN_BRIGHTNESS or np.std(face_gray) < FACE_MIN_STD:
+            return 0.0
+        
+        # 선명도 (모션 블러/초점), 얼굴 크기, 적정 밝기
+        sharpness = min(cv2.Laplacian(face_gray, cv2.CV_64F).var() / SHARPNESS_REF, 1.0)
+        size = min((w * h) / (gray.shape[0] * gray.shape[1]) / GOOD_FACE_RATIO, 1.0)
+        lighting = 1.0 - min(abs(face_brightness - 128.0) / 128.0, 1.0)
+        
+        return 0.6 * sharpness + 0.25 * size + 0.15 * lighting
+    except Exception as e:
+        app_logger.error(f"Error scoring frame quality: {e}")
+        return 0.0
+
+
 # 이미지 -> 벡터로 임베딩
 def embed(face_bgr: np.ndarray) -> Optional[np.ndarray]:
     """
@@ -226,58 +313,56 @@ def embed(face_bgr: np.ndarray) -> Optional[np.ndarray]:
         return None
 
 
-def l2_distance(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
-    """
-
-    """
-    try:
-        distance = np.linalg.norm(embedding1 - embedding2)
-        return float(distance)
-    except Exception as e:
-        app_logger.error(f"Error calculating distance: {e}")
-        return float('inf')
-
-
-def save_thumbnail(bgr_image: np.ndarray, employee_id: str) -> Optional[str]:
+def embed_batch(faces_bgr: List[np.ndarray]) -> List[Optional[np.ndarray]]:
     """
-    Save thumbnail image
+    여러 얼굴 이미지를 한 번에 임베딩 (일괄 등록용)
+    
+    DeepFace가 목록 입력을 지원하면 한 번의 배치 추론, 아니면 embed()를 하나씩 호출
     
     Args:
-        bgr_image: Input image in BGR format
-        employee_id: Employee ID
+        faces_bgr: Cropped face images (BGR)
         
     Returns:
-        Relative path to saved thumbnail, or None if failed
+        Normalized embeddings (None for faces that failed), same order
     """
-    try:
-        thumbnail = create_thumbnail(bgr_image, max_size=(300, 300))
-        filepath = get_thumbnail_path(employee_id)
-        
-        if save_image(thumbnail, filepath):
-            relative_path = get_relative_path(filepath)
-            app_logger.debug(f"Saved thumbnail: {relative_path}")
-            return relative_path
-        
-        return None
-    except Exception as e:
-        app_logger.error(f"Error saving thumbnail: {e}")
-        return None
+    if not faces_bgr:
+        return []
+    
+    if DEEPFACE_AVAILABLE and len(faces_bgr) > 1:
+        try:
+            results = DeepFace.represent(
+                img_path=[cv2.cvtColor(face, cv2.COLOR_BGR2RGB) for face in faces_bgr],
+                model_name="Facenet",
+                enforce_detection=False,
+                detector_backend="skip"
+            )
+            # 배치 입력이면 이미지마다 결과 목록이 하나씩
+            if len(results) == len(faces_bgr) and all(isinstance(r, list) for r in results):
+                embeddings = []
+                for r in results:
+                    if not r:
+                        embeddings.append(None)
+                        continue
+                    embedding = np.array(r[0]["embedding"])
+                    norm = np.linalg.norm(embedding)
+                    embeddings.append(embedding / norm if norm > 0 else embedding)
+                return embeddings
+        except Exception as e:
+            app_logger.warning(f"Batched embedding failed, embedding one by one: {e}")
+    
+    return [embed(face) for face in faces_bgr]
 
 
-def save_embedding(employee_id: str, embedding: np.ndarray) -> Optional[str]:
+def l2_distance(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
     """
 
     """
     try:
-        filepath = get_encoding_path(employee_id)
-        np.save(filepath, embedding)
-        
-        relative_path = get_relative_path(filepath)
-        app_logger.debug(f"Saved embedding: {relative_path}")
-        return relative_path
+        distance = np.linalg.norm(embedding1 - embedding2)
+        return float(distance)
     except Exception as e:
-        app_logger.error(f"Error saving embedding: {e}")
-        return None
+        app_logger.error(f"Error calculating distance: {e}")
+        return float('inf')
 
 
 def load_embedding(filepath: str) -> Optional[np.ndarray]:
@@ -0,0 +1,332 @@
+"""
+Frame sources for the camera worker
+Live device, looping video file, image directory and synthetic generator backends
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.utils.image_io import SUPPORTED_FORMATS
+
+# 이 시간보다 빨리 반환되는 grab()은 드라이버 버퍼에 쌓여 있던 프레임으로 간주
+BUFFERED_GRAB_SEC = 0.005
+# 저지연 모드에서 한 번에 버릴 수 있는 최대 프레임 수
+MAX_DRAIN_GRABS = 8
+
+# read() 반환값: (ret, frame, capture timestamp)
+FrameRead = Tuple[bool, Optional[np.ndarray], float]
+
+
+class FrameSource(ABC):
+    """
+    프레임 소스 기본 클래스
+
+    realtime=True 이면 CameraWorker가 fps에 맞춰 페이싱하고,
+    False 이면 가능한 한 빠르게 읽는다 (벤치마크용)
+    """
+    kind = "base"
+
+    def __init__(self, realtime: bool = True, fps: Optional[float] = None):
+        self.realtime = realtime
+        self.fps = fps  # 소스 고유 fps (None -> CameraWorker target_fps 사용)
+        self.exhausted = False  # 더 이상 읽을 프레임이 없음 (루프하지 않는 파일 소스)
+
+    @abstractmethod
+    def open(self) -> bool:
+        """Open the source, returns True on success"""
+
+    @abstractmethod
+    def read(self) -> FrameRead:
+        """Read the next frame"""
+
+    def release(self):
+        """Release underlying resources"""
+        pass
+
+    def describe(self) -> str:
+        """Short description for logs"""
+        return self.kind
+
+
+class DeviceFrameSource(FrameSource):
+    """Live camera device via cv2.VideoCapture"""
+    kind = "device"
+
+    def __init__(
+        self,
+        device_index: int,
+        fps: float,
+        width: int = 640,
+        height: int = 480,
+        low_latency: bool = False,
+        buffer_size: int = 1
+    ):
+        # 장치는 드라이버가 페이싱하므로 CameraWorker target_fps 사용
+        super().__init__(realtime=True, fps=None)
+        self.device_index = device_index
+        self.requested_fps = fps
+        self.width = width
+        self.height = height
+        self.low_latency = low_latency
+        self.buffer_size = buffer_size
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        self.cap = cv2.VideoCapture(self.device_index)
+        if not self.cap.isOpened():
+            return False
+
+        # Set camera properties
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.requested_fps)
+        if self.low_latency:
+            # V4L2 등 드라이버 측 큐 최소화 (지원하지 않는 백엔드는 무시)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return True
+
+    def read(self) -> FrameRead:
+        """
+        In low-latency mode, frames already queued in the driver buffer are
+        discarded with grab() and only the newest one is decoded with retrieve().
+        """
+        if not self.low_latency:
+            ret, frame = self.cap.read()
+            return ret, frame, time.time()
+
+        # 버퍼에 쌓인 프레임은 즉시 반환되므로, grab이 대기할 때까지 계속 버림
+        grabbed_at = 0
+        for _ in range(MAX_DRAIN_GRABS):
+            t0 = time.time()
+            if not self.cap.grab():
+                break
+            grabbed_at = time.time()
+            if grabbed_at - t0 >= BUFFERED_GRAB_SEC:
+                # 새로 도착한 프레임을 기다렸음 -> 최신 프레임
+                break
+
+        if grabbed_at == 0:
+            return False, None, 0
+
+        ret, frame = self.cap.retrieve()
+        return ret, frame, grabbed_at
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> str:
+        return f"device={self.device_index}, low_latency={self.low_latency}"
+
+
+class VideoFileFrameSource(FrameSource):
+    """Recorded footage replayed from a video file, optionally looping"""
+    kind = "video"
+
+    def __init__(self, path: str, loop: bool = True, realtime: bool = True):
+        super().__init__(realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        if not os.path.isfile(self.path):
+            return False
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+
+        # 녹화 파일 고유 fps로 재생
+        native_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = native_fps if native_fps and native_fps > 0 else None
+        return True
+
+    def read(self) -> FrameRead:
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            # 파일 끝 -> 처음으로
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            self.exhausted = not self.loop
+            return False, None, 0
+        return True, frame, time.time()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> str:
+        return f"video={self.path}, loop={self.loop}, realtime={self.realtime}"
+
+
+class ImageDirFrameSource(FrameSource):
+    """Directory of still images played back in name order"""
+    kind = "images"
+
+    def __init__(self, directory: str, loop: bool = True, realtime: bool = True, fps: Optional[float] = None):
+        super().__init__(realtime=realtime, fps=fps)
+        self.directory = directory
+        self.loop = loop
+        self.files: List[str] = []
+        self.index = 0
+
+    def open(self) -> bool:
+        if not os.path.isdir(self.directory):
+            return False
+        self.files = sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if os.path.splitext(name.lower())[1] in SUPPORTED_FORMATS
+        )
+        self.index = 0
+        return len(self.files) > 0
+
+    def read(self) -> FrameRead:
+        if self.index >= len(self.files):
+            if not self.loop:
+                self.exhausted = True
+                return False, None, 0
+            self.index = 0
+
+        path = self.files[self.index]
+        self.index += 1
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            app_logger.warning(f"Failed to read frame image: {path}")
+            return False, None, 0
+        return True, frame, time.time()
+
+    def describe(self) -> str:
+        return f"images={self.directory} ({len(self.files)} files), loop={self.loop}, realtime={self.realtime}"
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Deterministic generated frames
+
+    Without face_image, draws a moving face-like blob on a gradient (capture/stream
+    throughput). With face_image, pastes that photo centered in the guide ellipse
+    with a small drift so the identify path has a real face to match.
+    """
+    kind = "synthetic"
+
+    def __init__(
+        self,
+        width: int = 640,
+        height: int = 480,
+        fps: Optional[float] = None,
+        realtime: bool = True,
+        face_image: Optional[str] = None,
+        seed: int = 0
+    ):
+        super().__init__(realtime=realtime, fps=fps)
+        self.width = width
+        self.height = height
+        self.face_image = face_image
+        self.rng = np.random.default_rng(seed)
+        self.background: Optional[np.ndarray] = None
+        self.face: Optional[np.ndarray] = None
+        self.frame_index = 0
+
+    def open(self) -> bool:
+        # 배경 그라디언트는 한 번만 생성
+        xs = np.linspace(40, 200, self.width, dtype=np.float32)
+        ys = np.linspace(60, 160, self.height, dtype=np.float32)
+        gray = (xs[None, :] * 0.6 + ys[:, None] * 0.4).astype(np.uint8)
+        self.background = cv2.merge([gray, gray, gray])
+
+        if self.face_image:
+            face = cv2.imread(self.face_image, cv2.IMREAD_COLOR)
+            if face is None:
+                return False
+            # 얼굴 높이가 프레임 높이의 45%가 되도록 크기 조정 (가이드 적정 크기)
+            target_h = int(self.height * 0.45)
+            scale = target_h / face.shape[0]
+            target_w = min(self.width, max(1, int(face.shape[1] * scale)))
+            self.face = cv2.resize(face, (target_w, target_h), interpolation=cv2.INTER_AREA)
+
+        self.frame_index = 0
+        return True
+
+    def read(self) -> FrameRead:
+        frame = self.background.copy()
+        t = self.frame_index
+        self.frame_index += 1
+
+        # 중앙 근처에서 천천히 흔들리는 위치
+        cx = self.width // 2 + int(12 * np.sin(t / 15.0))
+        cy = self.height // 2 + int(8 * np.cos(t / 20.0))
+
+        if self.face is not None:
+            fh, fw = self.face.shape[:2]
+            x0 = max(0, min(self.width - fw, cx - fw // 2))
+            y0 = max(0, min(self.height - fh, cy - fh // 2))
+            frame[y0:y0 + fh, x0:x0 + fw] = self.face
+        else:
+            axes = (int(self.width * 0.12), int(self.height * 0.22))
+            cv2.ellipse(frame, (cx, cy), axes, 0, 0, 360, (140, 170, 210), -1)
+            cv2.circle(frame, (cx - axes[0] // 2, cy - axes[1] // 4), 6, (40, 40, 40), -1)
+            cv2.circle(frame, (cx + axes[0] // 2, cy - axes[1] // 4), 6, (40, 40, 40), -1)
+
+        # 센서 노이즈 흉내 (인코딩 비용이 실제 영상과 비슷하도록)
+        noise = self.rng.integers(0, 8, size=frame.shape[:2], dtype=np.uint8)
+        frame = cv2.add(frame, cv2.merge([noise, noise, noise]))
+        cv2.putText(frame, f"#{t}", (self.width - 90, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        return True, frame, time.time()
+
+    def describe(self) -> str:
+        return f"synthetic {self.width}x{self.height}, face_image={self.face_image}, realtime={self.realtime}"
+
+
+def create_frame_source(
+    kind: Optional[str] = None,
+    path: Optional[str] = None,
+    realtime: Optional[bool] = None,
+    loop: Optional[bool] = None,
+    device_index: Optional[int] = None,
+    fps: Optional[float] = None,
+    low_latency: Optional[bool] = None
+) -> FrameSource:
+    """
+    Build a frame source from arguments, falling back to CAMERA_SOURCE* settings
+
+    Args:
+        kind: device | video | images | synthetic
+        path: Video file, image directory, or face image (synthetic)
+        realtime: Pace to fps (True) or read as fast as possible (False)
+        loop: Restart file sources at the end
+        device_index: Camera device index (device)
+        fps: Target fps
+        low_latency: Drain driver buffers (device)
+
+    Returns:
+        FrameSource (not opened yet)
+    """
+    kind = (kind or settings.CAMERA_SOURCE).lower()
+    path = path if path is not None else settings.CAMERA_SOURCE_PATH
+    realtime = settings.CAMERA_SOURCE_REALTIME if realtime is None else realtime
+    loop = settings.CAMERA_SOURCE_LOOP if loop is None else loop
+    fps = fps or settings.STREAM_FPS
+
+    if kind == "device":
+        return DeviceFrameSource(
+            device_index=settings.CAMERA_DEVICE_INDEX if device_index is None else device_index,
+            fps=fps,
+            low_latency=settings.CAMERA_LOW_LATENCY if low_latency is None else low_latency,
+            buffer_size=settings.CAMERA_BUFFER_SIZE
+        )
+    if kind == "video":
+        return VideoFileFrameSource(path, loop=loop, realtime=realtime)
+    if kind == "images":
+        return ImageDirFrameSource(path, loop=loop, realtime=realtime, fps=fps)
+    if kind == "synthetic":
+        return SyntheticFrameSource(fps=fps, realtime=realtime, face_image=path or None)
+
+    raise ValueError(f"Unknown frame source: {kind}")
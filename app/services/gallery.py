@@ -0,0 +1,259 @@
+"""
+Embedding gallery
+Keeps every enrolled embedding in one in-memory matrix so identify compares
+against all users in a single vectorized distance computation
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.logging import app_logger
+from app.db.models import FaceTemplate, User
+from app.services import face_service, id_allocator
+
+
+class EmbeddingGallery:
+    """
+    등록 임베딩 메모리 갤러리
+
+    - load(): profile_image(.npy)가 있는 모든 사용자 + face_templates를 읽어 (N, D) 행렬 구성
+      (한 직원이 여러 행을 가질 수 있음, 행 키: 대표 임베딩은 employee_id, 추가 템플릿은 파일 경로)
+    - refresh(): users / face_templates 지문이 바뀐 경우에만 다시 로드
+      (다른 워커 프로세스의 등록, 재등록, 임베딩 재생성 반영 - mark_changed()가 올린 버전 포함)
+    - add(): 이 프로세스에서 등록한 사용자/템플릿을 바로 반영
+    - 행렬은 교체 방식(copy-on-write)이라 search()는 잠금 없이 스냅샷 사용
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (keys, employee_ids, names, matrix) - 항상 통째로 교체
+        self._snapshot: Tuple[List[str], List[str], List[str], Optional[np.ndarray]] = ([], [], [], None)
+
+        self.loaded = False
+        self.fingerprint: Optional[tuple] = None
+        self.failed = 0                     # 로드 실패 / 차원 불일치 임베딩 수
+        self.loaded_at: Optional[datetime] = None
+        self.last_load_ms: Optional[float] = None
+
+    @property
+    def size(self) -> int:
+        """Number of embedding rows (users + extra templates)"""
+        return len(self._snapshot[0])
+
+    def compute_fingerprint(self, db: Session) -> tuple:
+        """
+        Cheap change detector for users / face_templates (aggregate queries only)
+
+        Counts and max ids catch inserts and deletes; the gallery version
+        counter catches path changes of existing rows (re-enroll, re-embed),
+        which leave the aggregates unchanged
+        """
+        users = db.query(
+            func.count(User.profile_image), func.max(User.id), func.max(User.profile_image)
+        ).one()
+        templates = db.query(func.count(FaceTemplate.id), func.max(FaceTemplate.id)).one()
+        version = id_allocator.current_value(db, id_allocator.GALLERY_VERSION)
+        return tuple(users) + tuple(templates) + (version,)
+
+    def load(self, db: Session) -> bool:
+        """
+        Load all enrolled embeddings from disk
+
+        Args:
+            db: Database session
+
+        Returns:
+            True if loaded
+        """
+        start = time.perf_counter()
+        try:
+            fingerprint = self.compute_fingerprint(db)
+            users = db.query(User.employee_id, User.name, User.profile_image)\
+                .filter(User.profile_image.isnot(None))\
+                .all()
+            templates = db.query(User.employee_id, User.name, FaceTemplate.embedding_path)\
+                .join(User, User.employee_id == FaceTemplate.employee_id)\
+                .all()
+        except Exception as e:
+            app_logger.error(f"Error loading embedding gallery: {e}")
+            return False
+
+        entries = []
+        failed = 0
+        # 행 키: 대표 임베딩은 employee_id, 추가 템플릿은 파일 경로
+        rows = [(emp, emp, name, path) for emp, name, path in users]
+        rows += [(path, emp, name, path) for emp, name, path in templates]
+        for key, employee_id, name, path in rows:
+            embedding = face_service.load_embedding(path)
+            if embedding is None:
+                app_logger.warning(f"Failed to load embedding from {path} for user {employee_id}")
+                failed += 1
+                continue
+            entries.append((key, employee_id, name, np.asarray(embedding, dtype=np.float32).ravel()))
+
+        # 모델 변경 전후 임베딩이 섞여 있으면 가장 많은 차원만 사용
+        matrix = None
+        if entries:
+            dim = Counter(e[3].shape[0] for e in entries).most_common(1)[0][0]
+            mismatched = [e[1] for e in entries if e[3].shape[0] != dim]
+            if mismatched:
+                app_logger.warning(f"Skipping {len(mismatched)} embeddings with dimension != {dim}: {mismatched[:10]}")
+                failed += len(mismatched)
+                entries = [e for e in entries if e[3].shape[0] == dim]
+            matrix = np.vstack([e[3] for e in entries])
+
+        with self._lock:
+            self._snapshot = ([e[0] for e in entries], [e[1] for e in entries], [e[2] for e in entries], matrix)
+            self.fingerprint = fingerprint
+            self.failed = failed
+            self.loaded = True
+            self.loaded_at = datetime.now()
+            self.last_load_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        app_logger.info(f"Embedding gallery loaded: {len(entries)} users, {failed} failed ({self.last_load_ms}ms)")
+        return True
+
+    def refresh(self, db: Session) -> bool:
+        """
+        Reload only if the users table changed since the last load
+
+        Returns:
+            True if a reload happened
+        """
+        if self.loaded and self.compute_fingerprint(db) == self.fingerprint:
+            return False
+        return self.load(db)
+
+    def add(self, employee_id: str, name: str, embedding: np.ndarray, key: Optional[str] = None):
+        """
+        Add or replace one embedding row (after the enroll commit)
+
+        Args:
+            employee_id: Employee ID
+            name: User name
+            embedding: Normalized embedding
+            key: Row key (default employee_id = the user's main embedding,
+                 pass the file path for an extra template)
+        """
+        self.add_many([(employee_id, name, embedding, key)])
+
+    def add_many(self, entries: List[Tuple[str, str, np.ndarray, Optional[str]]]):
+        """
+        Add or replace several rows at once (one matrix copy)
+
+        Args:
+            entries: (employee_id, name, embedding, key) tuples
+        """
+        if not entries:
+            return
+        with self._lock:
+            if not self.loaded:
+                return  # 첫 load() 때 DB에서 읽힘
+
+            keys, employee_ids, names, matrix = self._snapshot
+            keys, employee_ids, names = list(keys), list(employee_ids), list(names)
+            positions = {key: i for i, key in enumerate(keys)}
+            rows = [] if matrix is None else list(matrix)
+
+            for employee_id, name, embedding, key in entries:
+                key = key or employee_id
+                vector = np.asarray(embedding, dtype=np.float32).ravel()
+                if rows and rows[0].shape[0] != vector.shape[0]:
+                    app_logger.warning(f"Gallery dimension mismatch for {employee_id}: {vector.shape[0]}")
+                    continue
+                if key in positions:
+                    rows[positions[key]] = vector
+                    names[positions[key]] = name
+                else:
+                    positions[key] = len(keys)
+                    keys.append(key)
+                    employee_ids.append(employee_id)
+                    names.append(name)
+                    rows.append(vector)
+
+            self._snapshot = (keys, employee_ids, names, np.vstack(rows) if rows else None)
+
+    def search(self, embedding: np.ndarray) -> Optional[Tuple[str, str, float]]:
+        """
+        Closest enrolled user by L2 distance
+
+        Args:
+            embedding: Query embedding (normalized)
+
+        Returns:
+            (employee_id, name, distance) or None if the gallery is empty
+        """
+        _, employee_ids, names, matrix = self._snapshot
+        if matrix is None or not employee_ids:
+            app_logger.warning("No users with embeddings in gallery")
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        if query.shape[0] != matrix.shape[1]:
+            app_logger.error(f"Query embedding dimension {query.shape[0]} != gallery dimension {matrix.shape[1]}")
+            return None
+
+        distances = np.linalg.norm(matrix - query, axis=1)
+        idx = int(np.argmin(distances))
+        return employee_ids[idx], names[idx], float(distances[idx])
+
+    def search_many(self, embeddings: np.ndarray) -> List[Optional[Tuple[str, str, float]]]:
+        """
+        Closest enrolled user for each of several queries in one matrix product
+
+        ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b, so M queries cost one (M, D) x (D, N) GEMM
+
+        Args:
+            embeddings: (M, D) query embeddings
+
+        Returns:
+            (employee_id, name, distance) or None per query
+        """
+        _, employee_ids, names, matrix = self._snapshot
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if matrix is None or not employee_ids or queries.ndim != 2 or queries.shape[1] != matrix.shape[1]:
+            return [None] * len(queries)
+
+        squared = (
+            np.sum(queries ** 2, axis=1)[:, np.newaxis]
+            + np.sum(matrix ** 2, axis=1)[np.newaxis, :]
+            - 2.0 * queries @ matrix.T
+        )
+        best = np.argmin(squared, axis=1)
+        distances = np.sqrt(np.maximum(squared[np.arange(len(queries)), best], 0.0))
+        return [(employee_ids[i], names[i], float(d)) for i, d in zip(best, distances)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gallery size and load info"""
+        matrix = self._snapshot[3]
+        return {
+            "loaded": self.loaded,
+            "size": self.size,
+            "dimension": int(matrix.shape[1]) if matrix is not None else None,
+            "failed": self.failed,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "last_load_ms": self.last_load_ms
+        }
+
+
+def mark_changed(db: Session):
+    """
+    Bump the gallery version in the caller's transaction
+
+    Call from every write that changes enrolled embeddings (enroll,
+    re-enroll, template attach, re-embedding switch) right before
+    committing: the counter row stays locked until the commit, so calling
+    it earlier (e.g. before waiting for the embedding fsync) would
+    serialize enrollments on every worker
+    """
+    id_allocator.bump(db, id_allocator.GALLERY_VERSION)
+
+
+# Global gallery instance
+gallery = EmbeddingGallery()
@@ -0,0 +1,162 @@
+"""
+Health prober
+Checks DB, camera, model and gallery on an interval in a background thread
+so health endpoints answer from memory
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.db.base import SessionLocal
+from app.services import face_service
+from app.services.camera_worker import camera_worker
+from app.services.gallery import gallery
+
+# 마지막 결과가 이 주기 수보다 오래되면 프로버가 멈춘 것으로 보고 not ready
+PROBE_STALE_INTERVALS = 3
+
+
+class HealthProber:
+    """
+    헬스 체크 백그라운드 프로버
+
+    - HEALTH_PROBE_INTERVAL_SEC마다 1회: DB 연결 1개로 갤러리 지문 조회(= DB 체크)
+      + 변경 시 갤러리 재로드, 카메라 상태/프레임 지연, 모델 준비 여부
+    - /health, /health/ready는 마지막 결과만 읽음 (요청마다 DB 연결 없음)
+    """
+
+    def __init__(self):
+        self.interval = max(0.5, settings.HEALTH_PROBE_INTERVAL_SEC)
+
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+
+        self.probe_count = 0
+
+    def start(self) -> bool:
+        """Run one probe now and start the probe thread"""
+        if self.running:
+            return True
+        self.probe()
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="health-prober")
+        self.thread.start()
+        app_logger.info(f"Health prober started (interval={self.interval}s)")
+        return True
+
+    def stop(self):
+        """Stop the probe thread"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+        app_logger.info("Health prober stopped")
+
+    def is_alive(self) -> bool:
+        """프로버 스레드 정상 동작 확인"""
+        return bool(self.running and self.thread and self.thread.is_alive())
+
+    def _loop(self):
+        """Probe loop (runs in background thread)"""
+        while not self._stop_event.wait(self.interval):
+            self.probe()
+
+    def probe(self) -> Dict[str, Any]:
+        """
+        Run every check once and cache the result
+
+        Returns:
+            Probe result
+        """
+        start = time.perf_counter()
+
+        # DB + 갤러리: 지문 쿼리 하나로 연결 확인과 변경 감지
+        db_ok = False
+        db_error = None
+        db = SessionLocal()
+        try:
+            gallery.refresh(db)
+            db_ok = True
+        except Exception as e:
+            db_error = str(e)
+            app_logger.error(f"Health probe: database check failed: {e}")
+        finally:
+            db.close()
+
+        frame_age = camera_worker.get_frame_age()
+        gallery_stats = gallery.get_stats()
+        model_ready = face_service.ensure_model()
+
+        result = {
+            "db_ok": db_ok,
+            "db_error": db_error,
+            "camera_alive": bool(camera_worker.is_alive()),
+            "frame_age_ms": round(frame_age * 1000, 1) if frame_age is not None else None,
+            "model_ready": model_ready,
+            "gallery_loaded": gallery_stats["loaded"],
+            "gallery_size": gallery_stats["size"],
+            "gallery_failed": gallery_stats["failed"],
+            "checked_at": datetime.utcnow().isoformat() + "Z",
+            "probe_ms": round((time.perf_counter() - start) * 1000, 2),
+            "_checked_mono": time.monotonic()
+        }
+
+        with self._lock:
+            self._result = result
+            self.probe_count += 1
+        return result
+
+    def get_result(self) -> Dict[str, Any]:
+        """
+        Latest cached probe result (probes inline only if none exists yet)
+
+        Returns:
+            Probe result with check_age_ms
+        """
+        with self._lock:
+            result = self._result
+        if result is None:
+            result = self.probe()
+
+        result = dict(result)
+        checked = result.pop("_checked_mono")
+        result["check_age_ms"] = round((time.monotonic() - checked) * 1000, 1)
+        return result
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Whether this instance should receive traffic
+
+        Ready = DB reachable at the last probe, embedding model loaded,
+        gallery loaded and the probe itself recent (thread alive, last result
+        younger than PROBE_STALE_INTERVALS intervals - a dead or hung prober
+        must not keep answering from an old snapshot). The camera is not
+        required (MODE_B upload works without it)
+
+        Returns:
+            {"ready": bool, "reasons": [...], **probe result}
+        """
+        result = self.get_result()
+        reasons = []
+        if not self.is_alive() or result["check_age_ms"] > self.interval * PROBE_STALE_INTERVALS * 1000:
+            reasons.append("probe_stale")
+        if not result["db_ok"]:
+            reasons.append("db_unavailable")
+        if not result["model_ready"]:
+            reasons.append("model_not_loaded")
+        if not result["gallery_loaded"]:
+            reasons.append("gallery_not_loaded")
+        return {"ready": not reasons, "reasons": reasons, **result}
+
+
+# Global health prober instance
+health_prober = HealthProber()
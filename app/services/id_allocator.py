@@ -0,0 +1,155 @@
+"""
+ID allocator
+Hands out sequential numbers from the id_sequences table with one atomic
+UPDATE, in a short transaction of its own. The same table holds change
+counters (bump) that are incremented inside the caller's transaction
+"""
+from typing import List, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+
+from app.core.logging import app_logger
+from app.db.dialect import dialect_name, insert_ignore
+from app.db.models import IdSequence, User
+
+EMPLOYEE_SEQUENCE = "employee"
+EMPLOYEE_ID_PREFIX = "EMP"
+EMPLOYEE_ID_WIDTH = 3  # EMP001 ... EMP999, 이후 EMP1000 (자릿수만 늘어남)
+
+# 등록 임베딩이 바뀔 때마다 증가 (다른 워커의 갤러리가 변경을 감지)
+GALLERY_VERSION = "gallery_version"
+
+
+def allocate(db: Session, name: str, count: int = 1) -> int:
+    """
+    Reserve `count` consecutive numbers from a sequence
+
+    Runs on its own connection and commits immediately, so the row lock is
+    held for one statement and not for the caller's whole transaction.
+    Numbers are not returned if the caller later fails (gaps are expected)
+
+    - MySQL: UPDATE ... SET next_value = LAST_INSERT_ID(next_value + n)
+      then SELECT LAST_INSERT_ID() (per-connection, no extra lock)
+    - SQLite / PostgreSQL: UPDATE ... RETURNING next_value
+
+    Args:
+        db: Database session (only its bind is used)
+        name: Sequence name
+        count: Block size
+
+    Returns:
+        First number of the reserved block (block is first .. first + count - 1)
+    """
+    if count < 1:
+        raise ValueError("count must be >= 1")
+
+    seq = Session(bind=db.get_bind())
+    try:
+        new_next = _increment(seq, name, count)
+        if new_next is None:
+            # 첫 사용: 기존 데이터 기준으로 시작 번호를 만든 뒤 다시 시도
+            seq.execute(insert_ignore(seq, IdSequence.__table__).values(
+                name=name, next_value=seed_value(seq, name)
+            ))
+            new_next = _increment(seq, name, count)
+        seq.commit()
+    except Exception:
+        seq.rollback()
+        raise
+    finally:
+        seq.close()
+
+    return new_next - count
+
+
+def _increment(seq: Session, name: str, count: int):
+    """Bump next_value by count, returning the new value (None if the row is missing)"""
+    params = {"name": name, "count": count}
+    if dialect_name(seq) in ("mysql", "mariadb"):
+        result = seq.execute(text(
+            "UPDATE id_sequences SET next_value = LAST_INSERT_ID(next_value + :count) "
+            "WHERE name = :name"
+        ), params)
+        if result.rowcount == 0:
+            return None
+        return seq.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+
+    return seq.execute(text(
+        "UPDATE id_sequences SET next_value = next_value + :count "
+        "WHERE name = :name RETURNING next_value"
+    ), params).scalar()
+
+
+def bump(db: Session, name: str):
+    """
+    Increment a change counter in the caller's transaction (caller commits)
+
+    Unlike allocate(), the row stays locked until the caller commits, so the
+    new value becomes visible together with the change it marks
+
+    Args:
+        db: Database session
+        name: Counter name (created at 1 on first use)
+    """
+    table = IdSequence.__table__
+    stmt = update(table).where(table.c.name == name).values(next_value=table.c.next_value + 1)
+    if db.execute(stmt).rowcount:
+        return
+    if not db.execute(insert_ignore(db, table).values(name=name, next_value=1)).rowcount:
+        db.execute(stmt)  # 다른 트랜잭션이 먼저 만든 경우
+
+
+def current_value(db: Session, name: str) -> Optional[int]:
+    """Current value of a counter (None if never bumped)"""
+    return db.query(IdSequence.next_value).filter(IdSequence.name == name).scalar()
+
+
+def seed_value(seq: Session, name: str) -> int:
+    """Starting number for a new sequence (one scan, only on first use)"""
+    if name != EMPLOYEE_SEQUENCE:
+        return 1
+
+    # 문자열 정렬이 아닌 숫자로 비교 (EMP999 < EMP1000)
+    highest = 0
+    rows = seq.query(User.employee_id).filter(User.employee_id.like(f"{EMPLOYEE_ID_PREFIX}%"))
+    for (employee_id,) in rows:
+        suffix = employee_id[len(EMPLOYEE_ID_PREFIX):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+
+    app_logger.info(f"Seeding id sequence '{name}' at {highest + 1}")
+    return highest + 1
+
+
+def format_employee_id(number: int) -> str:
+    """123 -> EMP123"""
+    return f"{EMPLOYEE_ID_PREFIX}{number:0{EMPLOYEE_ID_WIDTH}d}"
+
+
+def next_employee_id(db: Session) -> str:
+    """
+    Allocate one employee_id
+
+    Args:
+        db: Database session
+
+    Returns:
+        New employee_id (EMP001, EMP002, ...)
+    """
+    return format_employee_id(allocate(db, EMPLOYEE_SEQUENCE))
+
+
+def reserve_employee_ids(db: Session, count: int) -> List[str]:
+    """
+    Allocate a block of employee_ids at once (batch enrollment)
+
+    Args:
+        db: Database session
+        count: Number of IDs
+
+    Returns:
+        Consecutive employee_ids
+    """
+    first = allocate(db, EMPLOYEE_SEQUENCE, count)
+    return [format_employee_id(n) for n in range(first, first + count)]
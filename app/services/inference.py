@@ -3,16 +3,23 @@ Inference service
 High-level logic for identify and enroll operations
 """
 from typing import Optional, Dict, Any, List
+import time
 import numpy as np
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import app_logger
-from app.services import face_service
+from app.services import artifact_store, face_service, id_allocator
+from app.services import face_dedup
+from app.services.gallery import gallery, mark_changed as mark_gallery_changed
+from app.services.artifact_writer import artifact_writer
 from app.services.camera_worker import camera_worker
-from app.db.models import User
-from app.utils.image_io import validate_image_size, resize_image
+from app.db.models import FaceTemplate, User
+from app.utils.image_io import check_image_header, validate_image_size, resize_image
+
+# 다른 카메라 프레임으로 재시도할 만한 실패 사유 (best-of-N 다음 후보 시도)
+RETRYABLE_FRAME_REASONS = ("no_face", "bad_quality", "unknown")
 
 
 class IdentifyResult:
@@ -24,7 +31,8 @@ class IdentifyResult:
         name: Optional[str] = None,
         distance: Optional[float] = None,
         message: str = "",
-        reason: Optional[str] = None
+        reason: Optional[str] = None,
+        frame_age_ms: Optional[float] = None
     ):
         self.success = success
         self.employee_id = employee_id
@@ -32,6 +40,7 @@ class IdentifyResult:
         self.distance = distance
         self.message = message
         self.reason = reason
+        self.frame_age_ms = frame_age_ms  # MODE_A 카메라 프레임 지연
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for API response"""
@@ -52,6 +61,9 @@ class IdentifyResult:
             if self.distance is not None:
                 result["min_distance"] = self.distance
         
+        if self.frame_age_ms is not None:
+            result["frame_age_ms"] = self.frame_age_ms
+        
         return result
 
 
@@ -62,12 +74,16 @@ class EnrollResult:
         success: bool,
         employee_id: Optional[str] = None,
         message: str = "",
-        reason: Optional[str] = None
+        reason: Optional[str] = None,
+        matched_employee_id: Optional[str] = None,
+        attached: bool = False
     ):
         self.success = success
         self.employee_id = employee_id
         self.message = message
         self.reason = reason
+        self.matched_employee_id = matched_employee_id  # 중복 얼굴로 판정된 기존 직원
+        self.attached = attached                        # 기존 직원의 추가 템플릿으로 저장됨
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for API response"""
@@ -82,12 +98,21 @@ class EnrollResult:
             if self.reason:
                 result["reason"] = self.reason
         
+        if self.matched_employee_id:
+            result["matched_employee_id"] = self.matched_employee_id
+        if self.attached:
+            result["attached"] = True
+        
         return result
 
 
-def identify_from_camera(db: Session) -> IdentifyResult:
+def identify_from_camera(db: Session, max_frame_age_ms: Optional[float] = None) -> IdentifyResult:
     """
     카메라에서 실시간으로 얼굴을 찍어서 인증하는 모드
+    
+    Args:
+        db: Database session
+        max_frame_age_ms: Reject frames older than this (None -> CAMERA_MAX_FRAME_AGE_MS, 0 -> no limit)
     """
     try:
         # 카메라 캡처 스레드가 돌지 않을 때
@@ -98,18 +123,49 @@ def identify_from_camera(db: Session) -> IdentifyResult:
                 reason="camera_unavailable"
             )
         
-        # Get latest frame
-        frame = camera_worker.get_latest_frame()
+        # 최근 프레임 버퍼 (최신순)
+        candidates = camera_worker.get_recent_frames()
         
-        if frame is None:
+        if not candidates:
             return IdentifyResult(
                 success=False,
                 message="카메라 프레임을 가져올 수 없습니다",
                 reason="camera_unavailable"
             )
         
-        # Process frame
-        return identify_from_image(db, frame)
+        # 프레임 지연 체크 (end-to-end capture age)
+        now = time.time()
+        if max_frame_age_ms is None:
+            max_frame_age_ms = settings.CAMERA_MAX_FRAME_AGE_MS
+        
+        if max_frame_age_ms:
+            fresh = [c for c in candidates if (now - c[2]) * 1000 <= max_frame_age_ms]
+            if not fresh:
+                frame_age_ms = round((now - candidates[0][2]) * 1000, 1)
+                app_logger.warning(f"Stale camera frame rejected: age={frame_age_ms}ms, limit={max_frame_age_ms}ms")
+                return IdentifyResult(
+                    success=False,
+                    message="카메라 프레임이 너무 오래되었습니다",
+                    reason="stale_frame",
+                    frame_age_ms=frame_age_ms
+                )
+            candidates = fresh
+        
+        # Best-of-N: 저렴한 품질 점수로 순위를 매기고 상위 프레임만 임베딩
+        # 동점이면 최신 프레임 우선 (sorted는 stable)
+        ranked = sorted(candidates, key=lambda c: face_service.score_frame_quality(c[0]), reverse=True)
+        top_k = max(1, settings.CAMERA_IDENTIFY_TOP_K)
+        
+        result = None
+        for frame, seq, captured_at in ranked[:top_k]:
+            # 버퍼 프레임은 캡처 스레드와 공유되므로 복사본으로 처리
+            result = identify_from_image(db, frame.copy())
+            result.frame_age_ms = round((time.time() - captured_at) * 1000, 1)
+            if result.success or result.reason not in RETRYABLE_FRAME_REASONS:
+                break
+            app_logger.debug(f"Camera frame {seq} failed ({result.reason}), trying next best frame")
+        
+        return result
         
     except Exception as e:
         app_logger.error(f"Error in identify_from_camera: {e}")
@@ -125,6 +181,15 @@ def identify_from_upload(db: Session, file_bytes: bytes) -> IdentifyResult:
     
     """
     try:
+        # 헤더 크기만으로 먼저 거부 (픽셀 디코딩 전)
+        rejection = check_image_header(file_bytes)
+        if rejection:
+            return IdentifyResult(
+                success=False,
+                message=rejection,
+                reason="bad_quality"
+            )
+        
         # Decode image
         image = face_service.decode_image(file_bytes)
         
@@ -254,57 +319,20 @@ def identify_from_image(db: Session, image: np.ndarray) -> IdentifyResult:
 
 def find_best_match(db: Session, embedding: np.ndarray) -> Optional[tuple]:
     """
-    db 매칭
+    db 매칭 (메모리 갤러리에서 전체 사용자와 한 번에 거리 계산)
     """
     try:
-        # profile_image가 있는 모든 사용자 조회 (임베딩 경로로 사용)
-        users_with_embeddings = db.query(User).filter(User.profile_image.isnot(None)).all()
-        
-        app_logger.info(f"Total users with embeddings in DB: {len(users_with_embeddings)}")
-        
-        if not users_with_embeddings:
-            app_logger.warning("No users with embeddings found in database")
+        # 시작 시 로드되지 않았으면 (스크립트 등) 여기서 1회 로드
+        if not gallery.loaded and not gallery.load(db):
             return None
         
-        best_employee_id = None
-        best_name = None
-        best_distance = float('inf')
-        
-        # 각 등록된 임베딩과 비교 (인덱스/총량 로그 포함)
-        total = len(users_with_embeddings)
-        for idx, user in enumerate(users_with_embeddings, start=1):
-            app_logger.debug(f"Checking user [{idx}/{total}]: {user.employee_id}, path: {user.profile_image}")
-
-            # 임베딩 로드
-            stored_embedding = face_service.load_embedding(user.profile_image)
-
-            if stored_embedding is None:
-                app_logger.warning(f"Failed to load embedding from {user.profile_image} for user {user.employee_id}")
-                continue
-
-            # 로그: 로드된 임베딩 형태
-            try:
-                emb_shape = getattr(stored_embedding, 'shape', None)
-                app_logger.debug(f"Loaded embedding for {user.employee_id}, shape={emb_shape}")
-            except Exception:
-                app_logger.debug(f"Loaded embedding for {user.employee_id}, type={type(stored_embedding)}")
-
-            # 거리 계산
-            distance = face_service.l2_distance(embedding, stored_embedding)
-            app_logger.debug(f"[{idx}/{total}] Distance for {user.employee_id}: {distance:.4f}, {user.name}")
-
-            # 최고 매칭 업데이트
-            if distance < best_distance:
-                best_distance = distance
-                best_employee_id = user.employee_id
-                best_name = user.name
-        
-        if best_employee_id is None:
-            app_logger.warning("No valid embeddings could be loaded")
+        match = gallery.search(embedding)
+        if match is None:
             return None
         
+        best_employee_id, best_name, best_distance = match
         app_logger.info(f"Best match: {best_employee_id} ({best_name}), distance: {best_distance:.4f}")
-        return (best_employee_id, best_name, best_distance)
+        return match
         
     except Exception as e:
         app_logger.error(f"Error finding best match: {e}", exc_info=True)
@@ -314,22 +342,66 @@ def find_best_match(db: Session, embedding: np.ndarray) -> Optional[tuple]:
 def generate_employee_id(db: Session) -> str:
     """
     Generate new employee_id in format EMP001, EMP002, ...
+    (atomic allocation from the id_sequences table, safe for concurrent enrollments)
     """
-    # Get last employee_id
-    last_user = db.query(User).filter(
-        User.employee_id.like('EMP%')
-    ).order_by(User.employee_id.desc()).first()
-    
-    if last_user is None:
-        return "EMP001"
-    
-    # Extract number from last employee_id
+    return id_allocator.next_employee_id(db)
+
+
+def _attach_template(
+    db: Session,
+    employee_id: str,
+    name: str,
+    image: np.ndarray,
+    embedding: np.ndarray
+) -> EnrollResult:
+    """
+    Store a new photo of an already enrolled face as an extra template
+
+    Args:
+        db: Database session
+        employee_id: Matched employee
+        name: Matched employee's name
+        image: Resized source image (for the thumbnail)
+        embedding: New embedding
+
+    Returns:
+        EnrollResult for the existing employee
+    """
+    embedding_artifact = artifact_store.prepare_embedding(embedding)
+    thumbnail_artifact = artifact_store.prepare_thumbnail(image)
+    embedding_written = artifact_writer.write_embedding(embedding_artifact)
+
+    embedding_path = embedding_artifact.relative_path
+    db.add(FaceTemplate(
+        employee_id=employee_id,
+        embedding_path=embedding_path,
+        thumbnail_path=thumbnail_artifact.relative_path if thumbnail_artifact else None
+    ))
+    artifact_store.register(db, [embedding_artifact, thumbnail_artifact])
+    db.flush()
+
+    if not _wait_written(embedding_written):
+        db.rollback()
+        return EnrollResult(False, None, "임베딩 저장 실패", "internal_error")
+    mark_gallery_changed(db)
+    db.commit()
+    gallery.add(employee_id, name, embedding, key=embedding_path)
+    artifact_writer.write_thumbnail(thumbnail_artifact)
+
+    app_logger.info(f"Attached face template to {employee_id}: {embedding_path}")
+    return EnrollResult(
+        True, employee_id, f"이미 등록된 직원({employee_id})에 얼굴을 추가했습니다",
+        matched_employee_id=employee_id, attached=True
+    )
+
+
+def _wait_written(future) -> bool:
+    """Wait for an artifact write (bounded by ARTIFACT_WRITE_TIMEOUT_SEC)"""
     try:
-        last_num = int(last_user.employee_id[3:])
-        new_num = last_num + 1
-        return f"EMP{new_num:03d}"
-    except:
-        return "EMP001"
+        return bool(future.result(timeout=settings.ARTIFACT_WRITE_TIMEOUT_SEC))
+    except Exception as e:
+        app_logger.error(f"Artifact write did not complete: {e}")
+        return False
 
 
 def enroll_user_simple(
@@ -377,50 +449,75 @@ def enroll_user_simple(
 
 def enroll_user_with_image(db: Session, name: str, file_bytes: bytes) -> EnrollResult:
     try:
-        # 1) employee_id 자동 생성
-        employee_id = generate_employee_id(db)
-
-        # 2) 이미지 디코딩
+        # 1) 헤더 크기 검사 후 이미지 디코딩 (큰 JPEG는 축소 스케일로 바로 디코딩)
+        rejection = check_image_header(file_bytes)
+        if rejection:
+            return EnrollResult(False, None, rejection, "bad_quality")
         image = face_service.decode_image(file_bytes)
         if image is None:
             return EnrollResult(False, None, "이미지를 디코딩할 수 없습니다", "bad_quality")
 
-        # 3) 이미지 크기 validation
+        # 2) 이미지 크기 validation
         if not validate_image_size(image):
             return EnrollResult(False, None, "이미지가 너무 작습니다", "bad_quality")
 
         image = resize_image(image)
 
-        # 4) 썸네일 저장
-        profile_image_path = face_service.save_thumbnail(image, employee_id)
-        if profile_image_path is None:
-            return EnrollResult(False, None, "프로필 이미지 저장 실패", "internal_error")
-
-        # 5) 얼굴 감지
+        # 3) 얼굴 감지
         face_result = face_service.detect_single_face(image)
         if face_result is None:
             return EnrollResult(False, None, "얼굴을 감지할 수 없습니다. 정면 사진을 사용해주세요.", "no_face")
 
         bbox, face_image = face_result
 
-        # 6) 임베딩 생성
+        # 4) 임베딩 생성
         embedding = face_service.embed(face_image)
         if embedding is None:
             return EnrollResult(False, None, "얼굴 임베딩 생성 실패", "bad_quality")
 
-        # 7) 임베딩 저장
-        embedding_path = face_service.save_embedding(employee_id, embedding)
-        if embedding_path is None:
-            return EnrollResult(False, None, "임베딩 저장 실패", "internal_error")
+        # 5) 이미 등록된 얼굴인지 갤러리 검색 (ENROLL_DUPLICATE_TOLERANCE)
+        duplicate = face_dedup.find_duplicate(db, embedding)
+        if duplicate is not None:
+            matched_id, matched_name, distance = duplicate
+            app_logger.warning(f"Duplicate face at enrollment: matches {matched_id} (distance={distance:.4f})")
+            if face_dedup.duplicate_action() == "attach":
+                return _attach_template(db, matched_id, matched_name, image, embedding)
+            return EnrollResult(
+                False, None, f"이미 등록된 얼굴입니다 ({matched_id})", "duplicate_face",
+                matched_employee_id=matched_id
+            )
+
+        # 6) employee_id 자동 생성 (검증을 통과한 경우에만 번호 사용)
+        employee_id = generate_employee_id(db)
 
-        # 8) DB에 user 생성
+        # 썸네일은 인코딩만 해서 경로(콘텐츠 해시)를 정함 (파일은 커밋 후 백그라운드에서 기록)
+        thumbnail_artifact = artifact_store.prepare_thumbnail(image)
+
+        # 7) 임베딩 파일 기록 시작 (임시 파일 + fsync + rename, I/O 스레드)
+        embedding_artifact = artifact_store.prepare_embedding(embedding)
+        embedding_written = artifact_writer.write_embedding(embedding_artifact)
+
+        # 8) DB에 user 생성 + 파일 목록 등록 (INSERT는 파일 기록과 동시에 진행)
         user = User(
             employee_id=employee_id,
             name=name,
-            profile_image=embedding_path
+            profile_image=embedding_artifact.relative_path,
+            thumbnail_path=thumbnail_artifact.relative_path if thumbnail_artifact else None
         )
         db.add(user)
+        artifact_store.register(db, [embedding_artifact, thumbnail_artifact])
+        db.flush()
+
+        # 임베딩 파일이 디스크에 남은 뒤에만 커밋
+        if not _wait_written(embedding_written):
+            db.rollback()
+            return EnrollResult(False, None, "임베딩 저장 실패", "internal_error")
+        mark_gallery_changed(db)
         db.commit()
+        gallery.add(employee_id, name, embedding)
+
+        # 썸네일은 응답 경로 밖에서 기록
+        artifact_writer.write_thumbnail(thumbnail_artifact)
 
         # 9) 성공 반환
         return EnrollResult(True, employee_id, "등록 완료")
@@ -450,6 +547,15 @@ def enroll_user(
         EnrollResult
     """
     try:
+        # 헤더 크기만으로 먼저 거부 (픽셀 디코딩 전)
+        rejection = check_image_header(file_bytes)
+        if rejection:
+            return EnrollResult(
+                success=False,
+                message=rejection,
+                reason="bad_quality"
+            )
+        
         # Decode image
         image = face_service.decode_image(file_bytes)
         
@@ -492,6 +598,20 @@ def enroll_user(
                 reason="bad_quality"
             )
         
+        # 다른 직원으로 이미 등록된 얼굴인지 확인
+        duplicate = face_dedup.find_duplicate(db, embedding)
+        if duplicate is not None and duplicate[0] != employee_id:
+            matched_id, matched_name, distance = duplicate
+            app_logger.warning(f"Duplicate face at enrollment of {employee_id}: matches {matched_id} (distance={distance:.4f})")
+            if face_dedup.duplicate_action() == "attach":
+                return _attach_template(db, matched_id, matched_name, image, embedding)
+            return EnrollResult(
+                success=False,
+                message=f"이미 등록된 얼굴입니다 ({matched_id})",
+                reason="duplicate_face",
+                matched_employee_id=matched_id
+            )
+        
         # Check if user exists
         user = db.query(User).filter(User.employee_id == employee_id).first()
         
@@ -511,13 +631,18 @@ def enroll_user(
             
             app_logger.info(f"Created new user: {employee_id} ({name})")
         
-        # Save thumbnail (나중에 사용할 수도 있음)
-        thumbnail_path = face_service.save_thumbnail(image, employee_id)
+        # Save embedding (I/O 스레드에서 원자적 기록, 경로는 콘텐츠 해시)
+        embedding_artifact = artifact_store.prepare_embedding(embedding)
+        embedding_written = artifact_writer.write_embedding(embedding_artifact)
+        thumbnail_artifact = artifact_store.prepare_thumbnail(image)
         
-        # Save embedding
-        embedding_path = face_service.save_embedding(employee_id, embedding)
+        # User의 profile_image에 embedding_path 저장 (.npy 파일)
+        user.profile_image = embedding_artifact.relative_path
+        user.thumbnail_path = thumbnail_artifact.relative_path if thumbnail_artifact else None
+        artifact_store.register(db, [embedding_artifact, thumbnail_artifact])
+        db.flush()
         
-        if embedding_path is None:
+        if not _wait_written(embedding_written):
             db.rollback()
             return EnrollResult(
                 success=False,
@@ -525,13 +650,15 @@ def enroll_user(
                 reason="internal_error"
             )
         
-        # User의 profile_image에 embedding_path 저장 (.npy 파일)
-        user.profile_image = embedding_path
-        
-        # Commit
+        # Commit (임베딩 파일이 디스크에 남은 뒤)
+        mark_gallery_changed(db)
         db.commit()
+        gallery.add(employee_id, user.name, embedding)
+        
+        # Save thumbnail (응답 후 백그라운드)
+        artifact_writer.write_thumbnail(thumbnail_artifact)
         
-        app_logger.info(f"Enrolled embedding for {employee_id} at {embedding_path}")
+        app_logger.info(f"Enrolled embedding for {employee_id} at {embedding_artifact.relative_path}")
         
         return EnrollResult(
             success=True,
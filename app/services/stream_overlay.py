@@ -0,0 +1,249 @@
+"""
+Stream overlay service
+Face guide analysis and overlay rendering for the MJPEG stream (MODE_A)
+"""
+import cv2
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+from app.core.logging import app_logger
+from app.services.face_service import get_haar_cascade
+
+# MTCNN 임포트
+try:
+    from mtcnn import MTCNN
+    mtcnn_stream_detector = MTCNN()
+    MTCNN_STREAM_AVAILABLE = True
+    app_logger.info("MTCNN loaded for stream")
+except:
+    MTCNN_STREAM_AVAILABLE = False
+    app_logger.warning("MTCNN not available for stream, using OpenCV")
+
+# 타원 영역 (화면 대비 비율)
+GUIDE_ELLIPSE_W_RATIO = 0.35  # 화면 너비의 35%
+GUIDE_ELLIPSE_H_RATIO = 0.55  # 화면 높이의 55%
+
+# 얼굴 크기 비율 (얼굴 면적 / 프레임 면적)
+MIN_FACE_RATIO = 0.05
+MAX_FACE_RATIO = 0.4
+
+STREAM_JPEG_QUALITY = 80
+
+# 프레임 일련번호별 분석 결과 캐시 (스트림 렌더링과 자동 인식이 같은 프레임을 두 번 분석하지 않도록)
+_analysis_lock = threading.Lock()
+_analysis_cache: Tuple[int, Optional["GuideAnalysis"]] = (-1, None)
+
+
+class GuideAnalysis:
+    """타원 가이드 기준 얼굴 분석 결과"""
+    def __init__(
+        self,
+        ellipse_center: Tuple[int, int],
+        ellipse_axes: Tuple[int, int],
+        valid_faces: List[Tuple[int, int, int, int]],
+        face_ratio: Optional[float] = None
+    ):
+        self.ellipse_center = ellipse_center
+        self.ellipse_axes = ellipse_axes
+        self.valid_faces = valid_faces  # (x, y, w, h) inside the guide ellipse
+        self.face_ratio = face_ratio    # only set when exactly one valid face
+
+    @property
+    def status(self) -> str:
+        """no_face | multi_face | too_small | too_close | good"""
+        if len(self.valid_faces) == 0:
+            return "no_face"
+        if len(self.valid_faces) > 1:
+            return "multi_face"
+        if self.face_ratio < MIN_FACE_RATIO:
+            return "too_small"
+        if self.face_ratio > MAX_FACE_RATIO:
+            return "too_close"
+        return "good"
+
+
+def detect_stream_faces(frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    Fast face detection for stream frames
+
+    Args:
+        frame: BGR frame
+
+    Returns:
+        List of (x, y, w, h) boxes
+    """
+    if MTCNN_STREAM_AVAILABLE:
+        # MTCNN 사용 (정확한 얼굴만 감지)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        detections = mtcnn_stream_detector.detect_faces(rgb_frame)
+
+        # confidence 0.90 이상만 사용
+        return [tuple(det['box']) for det in detections if det['confidence'] >= 0.90]
+
+    # OpenCV Fallback
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    detected = get_haar_cascade().detectMultiScale(gray, scaleFactor=1.05, minNeighbors=3, minSize=(20, 20))
+    return [(x, y, w, h) for x, y, w, h in detected]
+
+
+def analyze_guide(frame: np.ndarray) -> GuideAnalysis:
+    """
+    Detect faces and keep only those centered inside the guide ellipse
+
+    Args:
+        frame: BGR frame
+
+    Returns:
+        GuideAnalysis
+    """
+    h, w = frame.shape[:2]
+    center_x, center_y = w // 2, h // 2
+    ellipse_width = int(w * GUIDE_ELLIPSE_W_RATIO)
+    ellipse_height = int(h * GUIDE_ELLIPSE_H_RATIO)
+
+    # 타원 영역 내의 얼굴만 필터링
+    valid_faces = []
+    for (x, y, w_face, h_face) in detect_stream_faces(frame):
+        face_center_x = x + w_face // 2
+        face_center_y = y + h_face // 2
+
+        # 타원 내부 체크 (타원 방정식 사용)
+        normalized_x = (face_center_x - center_x) / (ellipse_width / 2)
+        normalized_y = (face_center_y - center_y) / (ellipse_height / 2)
+        if (normalized_x ** 2 + normalized_y ** 2) <= 1:
+            valid_faces.append((x, y, w_face, h_face))
+
+    face_ratio = None
+    if len(valid_faces) == 1:
+        _, _, w_face, h_face = valid_faces[0]
+        face_ratio = (w_face * h_face) / (h * w)
+
+    return GuideAnalysis(
+        ellipse_center=(center_x, center_y),
+        ellipse_axes=(ellipse_width // 2, ellipse_height // 2),
+        valid_faces=valid_faces,
+        face_ratio=face_ratio
+    )
+
+
+def analyze_guide_cached(frame: np.ndarray, seq: int) -> GuideAnalysis:
+    """
+    analyze_guide() memoized on the camera frame sequence number
+
+    Args:
+        frame: BGR frame for camera frame seq
+        seq: CameraWorker frame_seq of the frame
+
+    Returns:
+        GuideAnalysis
+    """
+    global _analysis_cache
+    with _analysis_lock:
+        cached_seq, cached = _analysis_cache
+        if cached_seq == seq and cached is not None:
+            return cached
+
+    analysis = analyze_guide(frame)
+
+    with _analysis_lock:
+        if seq > _analysis_cache[0]:
+            _analysis_cache = (seq, analysis)
+    return analysis
+
+
+def draw_overlay(frame: np.ndarray, analysis: Optional[GuideAnalysis]) -> None:
+    """
+    Draw guide ellipse, face boxes and hints onto the frame (in place)
+
+    Args:
+        frame: BGR frame (modified in place)
+        analysis: Guide analysis, or None if detection failed
+    """
+    h, w = frame.shape[:2]
+    center = (w // 2, h // 2)
+    axes = (int(w * GUIDE_ELLIPSE_W_RATIO) // 2, int(h * GUIDE_ELLIPSE_H_RATIO) // 2)
+
+    # 타원 그리기 (굵은 선)
+    cv2.ellipse(frame, center, axes, 0, 0, 360, (100, 100, 100), 3)  # 회색, 굵은 선
+
+    if analysis is None:
+        return
+
+    status = analysis.status
+    if status == "no_face":
+        # 타원 영역 내 얼굴 없음
+        cv2.putText(frame, "No face in guide area", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        cv2.putText(frame, "Move to center circle", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        return
+
+    if status == "multi_face":
+        # 여러 얼굴 - 경고
+        for (x, y, w_face, h_face) in analysis.valid_faces:
+            cv2.rectangle(frame, (x, y), (x+w_face, y+h_face), (0, 165, 255), 2)  # 주황색
+        cv2.putText(frame, "Multiple faces in area", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+        cv2.putText(frame, "Only one person allowed", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+        return
+
+    # 타원 내 얼굴 1개 감지됨
+    x, y, w_face, h_face = analysis.valid_faces[0]
+    if status == "too_small":
+        cv2.rectangle(frame, (x, y), (x+w_face, y+h_face), (0, 255, 255), 2)  # 노란색
+        cv2.putText(frame, "Face too small", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        cv2.putText(frame, "Please move closer", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    elif status == "too_close":
+        cv2.rectangle(frame, (x, y), (x+w_face, y+h_face), (0, 255, 255), 2)  # 노란색
+        cv2.putText(frame, "Too close", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        cv2.putText(frame, "Please move back", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    else:
+        # 적절한 크기 - 초록색 박스
+        cv2.rectangle(frame, (x, y), (x+w_face, y+h_face), (0, 255, 0), 3)  # 초록색, 두꺼운 선
+        cv2.putText(frame, "Good! Face detected", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(frame, "Look straight ahead", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    # 얼굴 크기 정보 표시
+    cv2.putText(frame, f"Face size: {analysis.face_ratio*100:.1f}%", (10, h - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+
+def render_overlay_jpeg(
+    frame: np.ndarray,
+    quality: int = STREAM_JPEG_QUALITY,
+    seq: Optional[int] = None
+) -> Optional[bytes]:
+    """
+    Analyze, draw overlay and encode a frame as JPEG (CPU-bound, run off the event loop)
+
+    Args:
+        frame: BGR frame (modified in place)
+        quality: JPEG quality
+        seq: Camera frame_seq, enables sharing the analysis with other consumers
+
+    Returns:
+        JPEG bytes, or None if encoding failed
+    """
+    # 얼굴 감지 시도
+    try:
+        analysis = analyze_guide(frame) if seq is None else analyze_guide_cached(frame, seq)
+    except Exception as e:
+        app_logger.debug(f"Face detection overlay error: {e}")
+        analysis = None
+
+    draw_overlay(frame, analysis)
+
+    # Encode frame as JPEG
+    success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        app_logger.warning("Failed to encode frame")
+        return None
+
+    return buffer.tobytes()
@@ -0,0 +1,275 @@
+"""
+Summary service
+Maintains per-day attendance summaries incrementally and rebuilds them from
+the raw attendance / recognition_attempts tables on demand
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from app.core.logging import app_logger
+from app.db.dialect import upsert
+from app.db.models import Attendance, DailyAttendanceSummary, DailyDeviceSummary, RecognitionAttempt
+from app.utils.dates import work_date as to_work_date
+
+# 요약 조회 최대 기간 (일)
+SUMMARY_MAX_DAYS = 366
+
+# 재계산 시 삽입 배치 크기
+REBUILD_BATCH_SIZE = 1000
+
+_emp = DailyAttendanceSummary.__table__
+_dev = DailyDeviceSummary.__table__
+
+
+def _earliest(column, new_value):
+    """Earlier of existing and new, ignoring NULLs (idempotent)"""
+    return case(
+        (column.is_(None), new_value),
+        (new_value.is_(None), column),
+        (new_value < column, new_value),
+        else_=column
+    )
+
+
+def _latest(column, new_value):
+    """Later of existing and new, ignoring NULLs (idempotent)"""
+    return case(
+        (column.is_(None), new_value),
+        (new_value.is_(None), column),
+        (new_value > column, new_value),
+        else_=column
+    )
+
+
+def apply_success(
+    db: Session,
+    employee_id: str,
+    type: str,
+    device_id: Optional[str],
+    ts: datetime,
+    day: date
+):
+    """
+    Fold one newly inserted IN/OUT record into the summaries
+    (runs in the caller's transaction, caller commits)
+
+    Args:
+        db: Database session
+        employee_id: Employee ID
+        type: 'IN' or 'OUT'
+        device_id: Device identifier
+        ts: ts_server of the record
+        day: work_date of the record
+    """
+    is_in = type.upper() == 'IN'
+    db.execute(upsert(
+        db, _emp,
+        values={
+            "work_date": day,
+            "employee_id": employee_id,
+            "first_in": ts if is_in else None,
+            "last_out": None if is_in else ts
+        },
+        key_columns=["work_date", "employee_id"],
+        set_=lambda new: {
+            "first_in": _earliest(_emp.c.first_in, new.first_in),
+            "last_out": _latest(_emp.c.last_out, new.last_out),
+            "updated_at": datetime.now()
+        }
+    ))
+    _bump_device(db, day, device_id, "success_count")
+
+
+def apply_attempt(
+    db: Session,
+    device_id: Optional[str],
+    kind: str,
+    day: Optional[date] = None,
+    amount: int = 1
+):
+    """
+    Count unknown/failed attempts for a device (caller commits)
+
+    Args:
+        db: Database session
+        device_id: Device identifier
+        kind: 'unknown' or 'failed'
+        day: Work date of the attempts (None -> today)
+        amount: Number of attempts
+    """
+    _bump_device(db, day or to_work_date(), device_id, f"{kind}_count", amount)
+
+
+def _bump_device(db: Session, day: date, device_id: Optional[str], counter: str, amount: int = 1):
+    """Increment one device counter"""
+    values = {"work_date": day, "device_id": device_id or "", "success_count": 0, "unknown_count": 0, "failed_count": 0}
+    values[counter] = amount
+    db.execute(upsert(
+        db, _dev,
+        values=values,
+        key_columns=["work_date", "device_id"],
+        set_=lambda new: {
+            counter: _dev.c[counter] + new[counter],
+            "updated_at": datetime.now()
+        }
+    ))
+
+
+def rebuild(db: Session, date_from: date, date_to: date) -> Dict[str, int]:
+    """
+    Recompute summaries for a date range from the raw tables
+
+    Raw attendance and recognition_attempts rows are streamed and
+    aggregated in Python, so attempts (which have no work_date) are dated
+    with the same time zone rules as the live path
+
+    Args:
+        db: Database session
+        date_from: First work date (inclusive)
+        date_to: Last work date (inclusive)
+
+    Returns:
+        Row counts written per table
+    """
+    employees: Dict[Tuple[date, str], Dict[str, Any]] = {}
+    devices: Dict[Tuple[date, str], Dict[str, int]] = {}
+
+    def device_counters(day: date, device_id: Optional[str]) -> Dict[str, int]:
+        return devices.setdefault((day, device_id or ""), {"success_count": 0, "unknown_count": 0, "failed_count": 0})
+
+    # 출퇴근 기록은 work_date로 바로 거름
+    rows = db.query(
+        Attendance.employee_id, Attendance.type, Attendance.device_id, Attendance.ts_server, Attendance.work_date
+    ).filter(
+        Attendance.work_date >= date_from,
+        Attendance.work_date <= date_to
+    ).execution_options(stream_results=True, yield_per=5000)
+
+    scanned = 0
+    for employee_id, attendance_type, device_id, ts, day in rows:
+        scanned += 1
+        device_counters(day, device_id)["success_count"] += 1
+        summary = employees.setdefault((day, employee_id), {"first_in": None, "last_out": None})
+        if attendance_type == 'IN' and (summary["first_in"] is None or ts < summary["first_in"]):
+            summary["first_in"] = ts
+        elif attendance_type == 'OUT' and (summary["last_out"] is None or ts > summary["last_out"]):
+            summary["last_out"] = ts
+
+    # 시도 로그는 시간대 차이를 감안해 하루씩 넓게 읽고 근무일로 다시 거름
+    start = datetime.combine(date_from - timedelta(days=1), datetime.min.time())
+    end = datetime.combine(date_to + timedelta(days=2), datetime.min.time())
+    attempts = db.query(
+        RecognitionAttempt.device_id, RecognitionAttempt.outcome, RecognitionAttempt.ts_server
+    ).filter(
+        RecognitionAttempt.ts_server >= start,
+        RecognitionAttempt.ts_server < end
+    ).execution_options(stream_results=True, yield_per=5000)
+
+    for device_id, outcome, ts in attempts:
+        scanned += 1
+        day = to_work_date(ts)
+        if day < date_from or day > date_to:
+            continue
+        device_counters(day, device_id)[f"{outcome}_count"] += 1
+
+    try:
+        db.query(DailyAttendanceSummary).filter(
+            DailyAttendanceSummary.work_date >= date_from,
+            DailyAttendanceSummary.work_date <= date_to
+        ).delete(synchronize_session=False)
+        db.query(DailyDeviceSummary).filter(
+            DailyDeviceSummary.work_date >= date_from,
+            DailyDeviceSummary.work_date <= date_to
+        ).delete(synchronize_session=False)
+
+        now = datetime.now()
+        _insert_batches(db, _emp, [
+            {"work_date": day, "employee_id": emp, "updated_at": now, **summary}
+            for (day, emp), summary in employees.items()
+        ])
+        _insert_batches(db, _dev, [
+            {"work_date": day, "device_id": dev, "updated_at": now, **counters}
+            for (day, dev), counters in devices.items()
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    app_logger.info(
+        f"Summaries rebuilt for {date_from}..{date_to}: scanned={scanned}, "
+        f"employees={len(employees)}, devices={len(devices)}"
+    )
+    return {"scanned": scanned, "employee_rows": len(employees), "device_rows": len(devices)}
+
+
+def _insert_batches(db: Session, table, rows: List[Dict[str, Any]]):
+    for i in range(0, len(rows), REBUILD_BATCH_SIZE):
+        db.execute(table.insert(), rows[i:i + REBUILD_BATCH_SIZE])
+
+
+def get_employee_summaries(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    employee_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Per-employee daily summaries (reads only the summary table)
+
+    Returns:
+        List of {work_date, employee_id, first_in, last_out, worked_seconds}
+    """
+    query = db.query(DailyAttendanceSummary).filter(
+        DailyAttendanceSummary.work_date >= date_from,
+        DailyAttendanceSummary.work_date <= date_to
+    )
+    if employee_id:
+        query = query.filter(DailyAttendanceSummary.employee_id == employee_id)
+
+    result = []
+    for row in query.order_by(DailyAttendanceSummary.work_date, DailyAttendanceSummary.employee_id):
+        worked = None
+        if row.first_in and row.last_out and row.last_out > row.first_in:
+            worked = int((row.last_out - row.first_in).total_seconds())
+        result.append({
+            "work_date": row.work_date.isoformat(),
+            "employee_id": row.employee_id,
+            "first_in": row.first_in.isoformat() if row.first_in else None,
+            "last_out": row.last_out.isoformat() if row.last_out else None,
+            "worked_seconds": worked
+        })
+    return result
+
+
+def get_device_summaries(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    device_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Per-device daily attempt counts (reads only the summary table)
+
+    Returns:
+        List of {work_date, device_id, success_count, unknown_count, failed_count}
+    """
+    query = db.query(DailyDeviceSummary).filter(
+        DailyDeviceSummary.work_date >= date_from,
+        DailyDeviceSummary.work_date <= date_to
+    )
+    if device_id is not None:
+        query = query.filter(DailyDeviceSummary.device_id == device_id)
+
+    return [
+        {
+            "work_date": row.work_date.isoformat(),
+            "device_id": row.device_id or None,
+            "success_count": row.success_count,
+            "unknown_count": row.unknown_count,
+            "failed_count": row.failed_count
+        }
+        for row in query.order_by(DailyDeviceSummary.work_date, DailyDeviceSummary.device_id)
+    ]
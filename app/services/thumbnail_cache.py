@@ -0,0 +1,138 @@
+"""
+Thumbnail cache
+In-memory LRU of encoded thumbnail bytes, keyed by (file path, size).
+Smaller sizes (avatars) are generated from the cached original on demand
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import app_logger
+from app.utils.image_io import create_thumbnail, encode_jpeg
+
+# 요청 크기는 이 중 같거나 큰 값으로 올림 (임의 크기로 캐시가 쪼개지지 않게)
+THUMBNAIL_SIZES = (32, 48, 64, 96, 128, 192, 256)
+
+
+def normalize_size(size: Optional[int]) -> Optional[int]:
+    """Requested edge length -> cached size (None = original thumbnail)"""
+    if size is None:
+        return None
+    for allowed in THUMBNAIL_SIZES:
+        if size <= allowed:
+            return allowed
+    return None
+
+
+def thumbnail_version(path: str) -> str:
+    """
+    Version token of a thumbnail file
+
+    Thumbnail files are named by their content hash (artifact_store) and
+    never rewritten, so the stored path identifies the content
+    """
+    return hashlib.blake2b(path.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def thumbnail_etag(path: str, size: Optional[int]) -> str:
+    """Strong ETag for one size of a thumbnail"""
+    return f'"{thumbnail_version(path)}-{size or "orig"}"'
+
+
+class ThumbnailCache:
+    """
+    썸네일 인코딩 바이트 LRU
+
+    - 키: (DB에 저장된 상대 경로, 크기) - 파일 이름이 바뀌지 않으므로 무효화 불필요
+    - 원본은 디스크에서 1회 읽고, 작은 크기는 캐시된 원본에서 리사이즈 + JPEG 인코딩 후 캐시
+    - 전체 크기가 THUMBNAIL_CACHE_MAX_BYTES를 넘으면 오래 안 쓴 항목부터 제거
+    """
+
+    def __init__(self):
+        self.max_bytes = max(0, settings.THUMBNAIL_CACHE_MAX_BYTES)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], bytes]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, size: Optional[int] = None) -> Optional[bytes]:
+        """
+        Encoded JPEG for a thumbnail at a size
+
+        Args:
+            path: Thumbnail path (users.thumbnail_path)
+            size: Normalized size from normalize_size (None = original)
+
+        Returns:
+            JPEG bytes or None if the file is missing / unreadable
+        """
+        key = (path, size)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self._load(path) if size is None else self._resize(path, size)
+        if data is not None:
+            self._put(key, data)
+        return data
+
+    def _load(self, path: str) -> Optional[bytes]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            app_logger.error(f"Failed to read thumbnail {path}: {e}")
+            return None
+
+    def _resize(self, path: str, size: int) -> Optional[bytes]:
+        original = self.get(path, None)
+        if original is None:
+            return None
+        img = cv2.imdecode(np.frombuffer(original, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            app_logger.error(f"Failed to decode thumbnail {path}")
+            return None
+        return encode_jpeg(create_thumbnail(img, (size, size)))
+
+    def _put(self, key: Tuple[str, Optional[int]], data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count, memory use and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+# Global thumbnail cache instance
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,42 @@
+"""
+Atomic file writes
+Writes go to a temp file in the target directory, are fsync'd, then renamed
+over the target, so readers see either the old file or the complete new one
+"""
+import os
+import uuid
+
+
+def atomic_write_bytes(filepath: str, data: bytes) -> None:
+    """
+    Durably replace a file with new content
+    
+    Args:
+        filepath: Target path
+        data: File content
+        
+    Raises:
+        OSError: If the write or rename fails (the temp file is removed)
+    """
+    directory = os.path.dirname(filepath) or "."
+    tmp_path = os.path.join(directory, f".{os.path.basename(filepath)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    # rename 자체도 디렉터리 fsync 후에 영구 반영 (Windows는 디렉터리 open 불가)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
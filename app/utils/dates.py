@@ -0,0 +1,65 @@
+"""
+Date utilities
+Work date calculation in the company time zone
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+# 회사 기준 시간대 (근무일 계산 기준)
+COMPANY_TZ = ZoneInfo(settings.TIMEZONE)
+
+
+def company_now() -> datetime:
+    """
+    Current time in the company time zone
+    
+    Returns:
+        Timezone-aware datetime
+    """
+    return datetime.now(COMPANY_TZ)
+
+
+def work_date(ts: Optional[datetime] = None) -> date:
+    """
+    Work date (company-local calendar date) of a timestamp
+    
+    Args:
+        ts: Timestamp (naive values are treated as server local time), None -> now
+        
+    Returns:
+        Work date in the company time zone
+    """
+    if ts is None:
+        return company_now().date()
+    if ts.tzinfo is None:
+        ts = ts.astimezone()  # naive -> server local time
+    return ts.astimezone(COMPANY_TZ).date()
+
+
+def to_server_local(ts: datetime) -> datetime:
+    """
+    Timestamp as naive server local time (the form ts_server is stored in)
+    
+    Args:
+        ts: Timestamp (naive values are already server local time)
+        
+    Returns:
+        Naive datetime
+    """
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone().replace(tzinfo=None)
+
+
+def company_utc_offset_minutes() -> int:
+    """
+    Current UTC offset of the company time zone in minutes
+    
+    Returns:
+        Offset in minutes (e.g. 540 for Asia/Seoul)
+    """
+    offset = company_now().utcoffset() or timedelta(0)
+    return int(offset.total_seconds() // 60)
@@ -2,6 +2,7 @@
 Image I/O utilities
 Handles image validation, resizing, encoding, and format conversion
 """
+import os
 import cv2
 import numpy as np
 from typing import Tuple, Optional
@@ -13,8 +14,21 @@ SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
 # Image size constraints
 MAX_IMAGE_SIZE = (1280, 720)  # 720p max
 MIN_IMAGE_SIZE = (160, 120)    # Minimum for face detection
+MAX_DECODE_PIXELS = 50_000_000  # 헤더 기준 이보다 크면 디코딩하지 않음 (압축 폭탄 방지)
 JPEG_QUALITY = 75               # JPEG compression quality
 
+# JPEG는 libjpeg의 DCT 스케일링으로 1/2, 1/4, 1/8 크기로 바로 디코딩 가능
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 길이 필드가 없는 JPEG 마커 (TEM, RST0-7)
+_JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+# SOF 마커 (DHT=C4, JPG=C8, DAC=CC 제외)
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
 
 def validate_image_extension(filename: str) -> bool:
     """
@@ -25,16 +39,136 @@ def validate_image_extension(filename: str) -> bool:
     return ext in SUPPORTED_FORMATS
 
 
-def decode_image(file_bytes: bytes) -> Optional[np.ndarray]:
+def sniff_image_format(head: bytes) -> Optional[str]:
     """
-    
+    Image format from the leading magic bytes (the extension is not trusted)
+
+    Args:
+        head: First bytes of the file (12 bytes are enough)
+
+    Returns:
+        Extension in SUPPORTED_FORMATS (e.g. '.jpg') or None
+    """
+    head = bytes(head[:12])
+    if head.startswith(b"\xff\xd8\xff"):
+        ext = ".jpg"
+    elif head.startswith(_PNG_SIGNATURE):
+        ext = ".png"
+    elif head.startswith(b"BM"):
+        ext = ".bmp"
+    elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        ext = ".webp"
+    else:
+        return None
+    return ext if ext in SUPPORTED_FORMATS else None
+
+
+def read_image_size(file_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Image (width, height) from the JPEG / PNG header, without decoding pixels
+
+    Args:
+        file_bytes: Encoded image
+
+    Returns:
+        (width, height) or None for other formats / unreadable headers
+    """
+    data = memoryview(file_bytes)
+    if len(data) >= 24 and data[:8] == _PNG_SIGNATURE and data[12:16] == b"IHDR":
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    # 세그먼트 길이만 따라 건너뛰며 SOF 마커 탐색 (EXIF 등은 읽지 않음)
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if marker == 0xDA:  # SOS: 이후는 압축 데이터
+            return None
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None
+            height = int.from_bytes(data[pos + 5:pos + 7], "big")
+            width = int.from_bytes(data[pos + 7:pos + 9], "big")
+            return width, height
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+    return None
+
+
+def check_image_header(file_bytes: bytes) -> Optional[str]:
+    """
+    Reject an upload from its header dimensions alone
+
+    EXIF 회전을 모르므로 가로/세로 어느 방향으로도 기준을 못 맞출 때만 거부
+
+    Args:
+        file_bytes: Encoded image
+
+    Returns:
+        Rejection message, or None if acceptable (or the size is unknown)
+    """
+    size = read_image_size(file_bytes)
+    if size is None:
+        return None
+
+    w, h = size
+    min_w, min_h = MIN_IMAGE_SIZE
+    if (w < min_w or h < min_h) and (h < min_w or w < min_h):
+        app_logger.warning(f"Image too small (header): {w}x{h} (min: {min_w}x{min_h})")
+        return "이미지가 너무 작습니다"
+    if w * h > MAX_DECODE_PIXELS:
+        app_logger.warning(f"Image too large (header): {w}x{h} (max: {MAX_DECODE_PIXELS} pixels)")
+        return "이미지가 너무 큽니다"
+    return None
+
+
+def _reduced_decode_flag(file_bytes: bytes, size: Optional[Tuple[int, int]], max_size: Tuple[int, int]) -> int:
+    """Smallest JPEG decode scale whose output still covers max_size"""
+    if size is None or bytes(file_bytes[:2]) != b"\xff\xd8":
+        return cv2.IMREAD_COLOR  # PNG 등은 전체 디코딩 후 축소하므로 이득 없음
+
+    w, h = size
+    max_w, max_h = max_size
+    # 회전(EXIF) 전후 중 더 큰 배율 기준 → 어느 방향이든 resize_image 결과 해상도 유지
+    scale = max(min(max_w / w, max_h / h), min(max_w / h, max_h / w))
+    for factor, flag in _REDUCED_FLAGS:
+        if factor * scale <= 1.0:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(file_bytes: bytes, max_size: Tuple[int, int] = MAX_IMAGE_SIZE) -> Optional[np.ndarray]:
+    """
+    Decode an upload, directly at a reduced JPEG scale when the image is
+    much larger than max_size (resize_image then does the final resize)
+
+    Args:
+        file_bytes: Encoded image
+        max_size: Size the caller resizes to afterwards
+
+    Returns:
+        BGR image or None
     """
     try:
-        # byte -> numpy array
+        size = read_image_size(file_bytes)
+        if size is not None and size[0] * size[1] > MAX_DECODE_PIXELS:
+            app_logger.warning(f"Refusing to decode {size[0]}x{size[1]} image")
+            return None
+
+        # byte -> numpy array (복사 없음)
         nparr = np.frombuffer(file_bytes, np.uint8)
 
         # numpy -> bgr 복원
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        img = cv2.imdecode(nparr, _reduced_decode_flag(file_bytes, size, max_size))
         
         if img is None:
             app_logger.error("Failed to decode image")
@@ -97,28 +231,6 @@ def encode_jpeg(img: np.ndarray, quality: int = JPEG_QUALITY) -> Optional[bytes]
         return None
 
 
-def save_image(img: np.ndarray, filepath: str, quality: int = JPEG_QUALITY) -> bool:
-    """
-
-    """
-    try:
-        if filepath.lower().endswith(('.jpg', '.jpeg')):
-            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
-            success = cv2.imwrite(filepath, img, encode_param)
-        else:
-            success = cv2.imwrite(filepath, img)
-        
-        if success:
-            app_logger.debug(f"Saved image to {filepath}")
-        else:
-            app_logger.error(f"Failed to save image to {filepath}")
-        
-        return success
-    except Exception as e:
-        app_logger.error(f"Error saving image: {e}")
-        return False
-
-
 def create_thumbnail(img: np.ndarray, max_size: Tuple[int, int] = (300, 300)) -> np.ndarray:
     """
 
@@ -2,8 +2,6 @@
 Path utilities for managing storage locations
 """
 import os
-from datetime import datetime
-from typing import Optional
 from app.core.config import settings
 
 
@@ -31,69 +29,27 @@ def get_encodings_dir() -> str:
     return path
 
 
-def generate_timestamp_filename(prefix: str, extension: str) -> str:
+def get_content_path(base_dir: str, digest: str, extension: str) -> str:
     """
-    Generate filename with timestamp
+    Sharded path for content-addressed storage
+    
+    Two directory levels from the hash prefix keep each directory small
+    (e.g. encodings/3f/9a/3f9a...c2.npy, 65,536 shards)
     
     Args:
-        prefix: Filename prefix
+        base_dir: IMAGE_DIR or ENCODING_DIR
+        digest: SHA-256 hex digest of the file content
         extension: File extension (with or without dot)
         
     Returns:
-        Filename in format: prefix_YYYYMMDD_HHMMSS_microseconds.ext
+        Full path to the file (shard directories are created)
     """
     if not extension.startswith('.'):
         extension = f'.{extension}'
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    return f"{prefix}_{timestamp}{extension}"
-
-
-def get_image_path(employee_id: str, suffix: str = "") -> str:
-    """
-    Get path for saving employee image
-    
-    Args:
-        employee_id: Employee ID
-        suffix: Optional suffix to add to filename
-        
-    Returns:
-        Full path to image file
-    """
-    images_dir = get_images_dir()
-    suffix_str = f"_{suffix}" if suffix else ""
-    filename = generate_timestamp_filename(f"{employee_id}{suffix_str}", "jpg")
-    return os.path.join(images_dir, filename)
-
-
-def get_encoding_path(employee_id: str, index: Optional[int] = None) -> str:
-    """
-    Get path for saving employee face encoding
-    
-    Args:
-        employee_id: Employee ID
-        index: Optional index for multiple encodings
-        
-    Returns:
-        Full path to .npy file
-    """
-    encodings_dir = get_encodings_dir()
-    index_str = f"_{index}" if index is not None else ""
-    filename = generate_timestamp_filename(f"{employee_id}{index_str}", "npy")
-    return os.path.join(encodings_dir, filename)
-
-
-def get_thumbnail_path(employee_id: str) -> str:
-    """
-    Get path for saving employee thumbnail
-    
-    Args:
-        employee_id: Employee ID
-        
-    Returns:
-        Full path to thumbnail file
-    """
-    return get_image_path(employee_id, suffix="thumb")
+    shard_dir = os.path.join(base_dir, digest[:2], digest[2:4])
+    ensure_dir(shard_dir)
+    return os.path.join(shard_dir, f"{digest}{extension}")
 
 
 def get_relative_path(full_path: str) -> str:
@@ -0,0 +1,68 @@
+"""
+Upload reading
+Reads an UploadFile in chunks with a byte cap and checks the image magic
+bytes on the first chunk, so bad uploads are rejected without reading them
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.core.logging import app_logger
+from app.utils.image_io import sniff_image_format
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def upload_error(reason: str, message: str) -> Dict[str, Any]:
+    """Standard failure dict for upload problems"""
+    return {"success": False, "message": message, "reason": reason}
+
+
+def too_large_message(max_bytes: int) -> str:
+    return f"파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB)"
+
+
+async def read_upload(
+    upload: UploadFile,
+    max_bytes: int,
+    check_image: bool = True
+) -> Tuple[Optional[bytearray], Optional[Dict[str, Any]]]:
+    """
+    Read an upload into one buffer, stopping as soon as a limit is hit
+
+    The buffer is a bytearray that np.frombuffer / cv2.imdecode can use
+    without another copy
+
+    Args:
+        upload: Uploaded file
+        max_bytes: Maximum size
+        check_image: Require JPEG/PNG/BMP/WEBP magic bytes (SUPPORTED_FORMATS)
+
+    Returns:
+        (data, None) or (None, error dict)
+    """
+    # 파서가 기록한 크기를 알면 읽기 전에 거부, 버퍼도 한 번에 확보
+    size = getattr(upload, "size", None)
+    if size is not None and size > max_bytes:
+        app_logger.warning(f"Upload rejected: {upload.filename} is {size} bytes (max {max_bytes})")
+        return None, upload_error("too_large", too_large_message(max_bytes))
+
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if not buffer and check_image and sniff_image_format(chunk) is None:
+            app_logger.warning(f"Upload rejected: {upload.filename} is not a supported image")
+            return None, upload_error(
+                "invalid_format",
+                "지원하지 않는 이미지 형식입니다. JPG, PNG, BMP, WEBP 형식을 사용해주세요."
+            )
+        if len(buffer) + len(chunk) > max_bytes:
+            app_logger.warning(f"Upload rejected: {upload.filename} exceeds {max_bytes} bytes")
+            return None, upload_error("too_large", too_large_message(max_bytes))
+        buffer += chunk
+
+    if not buffer:
+        return None, upload_error("empty_file", "이미지 파일이 비어있습니다")
+    return buffer, None
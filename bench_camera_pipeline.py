@@ -0,0 +1,102 @@
+"""
+카메라 파이프라인 벤치마크 (capture -> overlay -> identify)
+
+카메라 없는 CI/벤치마크 장비에서 녹화 영상, 이미지 폴더, 합성 프레임을
+서버와 동일한 CameraWorker 경로로 재생하여 처리량을 측정합니다.
+
+예시:
+    python bench_camera_pipeline.py --source synthetic --duration 10
+    python bench_camera_pipeline.py --source video --path entrance.mp4 --fast --identify
+    python bench_camera_pipeline.py --source images --path samples/ --identify
+"""
+import argparse
+import json
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Camera pipeline benchmark")
+    parser.add_argument("--source", default="synthetic", choices=["device", "video", "images", "synthetic"])
+    parser.add_argument("--path", default="", help="video file / image directory / face image for synthetic")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per stage")
+    parser.add_argument("--fast", action="store_true", help="read as fast as possible instead of realtime pacing")
+    parser.add_argument("--no-loop", action="store_true", help="stop file sources at the end")
+    parser.add_argument("--identify", action="store_true", help="also run camera identify (needs database)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # 서버와 동일한 설정 경로를 쓰도록 앱 import 전에 환경 변수 지정
+    os.environ["CAMERA_SOURCE"] = args.source
+    os.environ["CAMERA_SOURCE_PATH"] = args.path
+    os.environ["CAMERA_SOURCE_REALTIME"] = "False" if args.fast else "True"
+    os.environ["CAMERA_SOURCE_LOOP"] = "False" if args.no_loop else "True"
+
+    from app.services.camera_worker import camera_worker
+    from app.services import stream_overlay
+
+    if not camera_worker.start():
+        print(f"❌ 프레임 소스 시작 실패: {camera_worker.get_last_error()}")
+        return
+
+    results = {}
+    try:
+        # 1) capture
+        time.sleep(args.duration)
+        results["capture"] = camera_worker.get_stats()
+        print(f"📷 capture: {results['capture']['capture_fps']} fps ({results['capture']['frames_captured']} frames)")
+
+        # 2) overlay (스트림과 동일한 분석 + 그리기 + JPEG 인코딩)
+        rendered, last_seq = 0, -1
+        started = time.time()
+        while time.time() - started < args.duration and camera_worker.is_alive():
+            frame, seq, _ = camera_worker.get_latest_frame_with_meta()
+            if frame is None or seq == last_seq:
+                time.sleep(0.001)
+                continue
+            last_seq = seq
+            if stream_overlay.render_overlay_jpeg(frame) is not None:
+                rendered += 1
+        elapsed = time.time() - started
+        results["overlay"] = {"frames": rendered, "fps": round(rendered / elapsed, 2) if elapsed else 0.0}
+        print(f"🖼️  overlay: {results['overlay']['fps']} fps")
+
+        # 3) identify (POST /identify JSON 모드와 동일한 경로)
+        if args.identify:
+            from app.db.base import SessionLocal
+            from app.services import inference
+
+            db = SessionLocal()
+            try:
+                attempts, successes, reasons = 0, 0, {}
+                started = time.time()
+                while time.time() - started < args.duration and camera_worker.is_alive():
+                    result = inference.identify_from_camera(db)
+                    attempts += 1
+                    if result.success:
+                        successes += 1
+                    else:
+                        reasons[result.reason] = reasons.get(result.reason, 0) + 1
+                elapsed = time.time() - started
+            finally:
+                db.close()
+
+            results["identify"] = {
+                "attempts": attempts,
+                "successes": successes,
+                "per_sec": round(attempts / elapsed, 2) if elapsed else 0.0,
+                "avg_ms": round(elapsed * 1000 / attempts, 1) if attempts else None,
+                "failures": reasons
+            }
+            print(f"🔍 identify: {results['identify']['per_sec']} req/s, avg {results['identify']['avg_ms']} ms")
+    finally:
+        camera_worker.stop()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
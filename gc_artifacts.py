@@ -0,0 +1,67 @@
+"""
+저장소 정리 (GC): 어떤 사용자 / 얼굴 템플릿도 참조하지 않는 썸네일·임베딩 삭제
+
+- stored_artifacts 목록 중 users / face_templates가 가리키지 않는 파일과 행 삭제
+- --include-untracked: 목록에 없는 파일(이전 평면 구조 파일, 중단된 기록의 임시 파일)도 삭제
+- 유예 시간(--grace-hours)보다 최근에 만들어지거나 재사용된 파일은 남김 (커밋 전 등록 보호)
+- 진행 중인 임베딩 재생성의 체크포인트에 있는 파일은 남김
+
+사용법:
+    python gc_artifacts.py --dry-run
+    python gc_artifacts.py
+    python gc_artifacts.py --include-untracked --grace-hours 48
+"""
+import argparse
+import json
+import os
+from datetime import timedelta
+
+from app.core.config import settings
+from app.db.base import SessionLocal, engine
+from app.db.models import Base, StoredArtifact
+from app.services import artifact_store
+
+
+def protected_paths(checkpoint_path: str) -> set:
+    """전환 전인 임베딩 재생성 결과 (reembed_users.py 체크포인트)"""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return set(json.load(f).get("done", {}).values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove unreferenced thumbnails and embeddings")
+    parser.add_argument("--grace-hours", type=float, default=settings.ARTIFACT_GC_GRACE_HOURS, help="keep files newer than this")
+    parser.add_argument("--include-untracked", action="store_true", help="also remove files missing from stored_artifacts")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    parser.add_argument("--checkpoint", default="data/reembed_checkpoint.json", help="re-embedding checkpoint to protect")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[StoredArtifact.__table__])
+    protected = protected_paths(args.checkpoint)
+    if protected:
+        print(f"ℹ️  임베딩 재생성 체크포인트의 파일 {len(protected)}개 보호")
+
+    db = SessionLocal()
+    try:
+        stats = artifact_store.collect_garbage(
+            db,
+            grace=timedelta(hours=args.grace_hours),
+            dry_run=args.dry_run,
+            include_untracked=args.include_untracked,
+            protected=protected
+        )
+    finally:
+        db.close()
+
+    label = "삭제 예정" if args.dry_run else "삭제"
+    print(f"✅ 목록 파일 {label}: {stats['manifest_removed']}개 (참조 중 {stats['kept']}개 유지)")
+    if args.include_untracked:
+        print(f"✅ 목록 밖 파일 {label}: {stats['untracked_removed']}개")
+    print(f"✅ 확보 용량: {stats['bytes_freed'] / (1024 * 1024):.1f}MB")
+    print("\n🎉 정리 완료!" if not args.dry_run else "\nℹ️  --dry-run: 아무것도 삭제하지 않음")
+
+
+if __name__ == "__main__":
+    main()
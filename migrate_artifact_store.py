@@ -0,0 +1,81 @@
+"""
+데이터베이스 스키마 마이그레이션: 콘텐츠 주소 저장소 (stored_artifacts)
+
+- 파일 목록 테이블 생성
+- 기존 평면 구조 파일(IMAGE_DIR/EMP001_thumb_*.jpg, ENCODING_DIR/EMP001_*.npy)을
+  내용 해시 경로(xx/yy/<sha256>.ext)로 복사하고 users / face_templates 경로를 갱신
+- 원본 파일은 지우지 않음: 확인 후 `python gc_artifacts.py --include-untracked`로 정리
+
+사용법:
+    python migrate_artifact_store.py
+    python migrate_artifact_store.py --no-relocate   # 테이블만 생성
+"""
+import argparse
+import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import Base, FaceTemplate, StoredArtifact, User
+from app.services import artifact_store
+
+# 커밋 단위 (행)
+BATCH_ROWS = 500
+
+# 모델별 (경로 컬럼 속성, 종류)
+PATH_COLUMNS = [
+    (User, [("profile_image", artifact_store.KIND_EMBEDDING), ("thumbnail_path", artifact_store.KIND_THUMBNAIL)]),
+    (FaceTemplate, [("embedding_path", artifact_store.KIND_EMBEDDING), ("thumbnail_path", artifact_store.KIND_THUMBNAIL)]),
+]
+
+
+def relocate(db: Session):
+    """기존 파일을 콘텐츠 주소 경로로 옮기고 DB 경로 갱신"""
+    for model, columns in PATH_COLUMNS:
+        moved = registered = missing = 0
+        rows = db.query(model).all()
+        for i, row in enumerate(rows, start=1):
+            for attr, kind in columns:
+                path = getattr(row, attr)
+                if not path:
+                    continue
+                if not os.path.exists(path):
+                    missing += 1
+                    print(f"⚠️  {model.__tablename__}.{attr}: 파일 없음 {path}")
+                    continue
+                artifact = artifact_store.prepare_file(path, kind)
+                if artifact.relative_path != os.path.normpath(path):
+                    if not artifact_store.write(artifact):
+                        print(f"⚠️  {path}: 복사 실패")
+                        continue
+                    setattr(row, attr, artifact.relative_path)
+                    moved += 1
+                artifact_store.register(db, [artifact])
+                registered += 1
+            if i % BATCH_ROWS == 0:
+                db.commit()
+        db.commit()
+        print(
+            f"✅ {model.__tablename__}: {len(rows)}행, 이동 {moved}개, "
+            f"목록 등록 {registered}개, 파일 없음 {missing}개"
+        )
+
+
+def migrate(relocate_files: bool = True):
+    engine = create_engine(settings.DATABASE_URL)
+    
+    # stored_artifacts 테이블 생성 (이미 있으면 무시)
+    Base.metadata.create_all(bind=engine, tables=[StoredArtifact.__table__])
+    print("✅ stored_artifacts 테이블 준비 완료")
+    
+    if relocate_files:
+        with Session(bind=engine) as db:
+            relocate(db)
+        print("ℹ️  이전 파일 정리: python gc_artifacts.py --include-untracked --dry-run 으로 확인 후 실행")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create stored_artifacts and move files to content-addressed paths")
+    parser.add_argument("--no-relocate", action="store_true", help="only create the table")
+    args = parser.parse_args()
+    migrate(relocate_files=not args.no_relocate)
@@ -0,0 +1,47 @@
+"""
+데이터베이스 스키마 마이그레이션: attendance 조회용 인덱스 추가
+
+models.py의 Attendance 인덱스 중 기존 DB에 없는 것을 추가 (이미 있으면 무시)
+대체된 인덱스는 제거
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+# (인덱스 이름, 컬럼)
+INDEXES = [
+    ("idx_attendance_date_type_emp", "work_date, type, employee_id"),  # 오늘 상태 캐시 로드
+    ("idx_attendance_ts_id", "ts_server, id"),                         # 기간 조회
+    ("idx_attendance_emp_ts_id", "employee_id, ts_server, id"),        # 직원별 조회
+    ("idx_attendance_device_ts_id", "device_id, ts_server, id"),       # 디바이스별 조회
+]
+
+# 위 인덱스로 대체되어 쓰기 비용만 늘리는 인덱스
+DROP_INDEXES = [
+    "idx_attendance_ts_server",  # -> idx_attendance_ts_id
+]
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        for name, columns in INDEXES:
+            try:
+                conn.execute(text(f"CREATE INDEX {name} ON attendance ({columns})"))
+                print(f"✅ {name} 인덱스 추가 완료")
+            except Exception as e:
+                print(f"⚠️  {name} 인덱스: {e}")
+        
+        for name in DROP_INDEXES:
+            try:
+                conn.execute(text(f"DROP INDEX {name} ON attendance"))
+                print(f"✅ {name} 인덱스 제거 완료")
+            except Exception as e:
+                print(f"⚠️  {name} 인덱스: {e}")
+        
+        conn.commit()
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
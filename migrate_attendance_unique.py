@@ -0,0 +1,64 @@
+"""
+데이터베이스 스키마 마이그레이션: attendance (employee_id, work_date, type) 유니크 제약
+
+- UNKNOWN / FAILED_* 감사 기록은 work_date를 NULL로 (유니크 대상에서 제외)
+- 같은 직원/근무일/타입 중복 행은 가장 이른 행만 work_date를 유지하고 나머지는 NULL
+  (행은 삭제하지 않음)
+- idx_attendance_emp_date_type 인덱스를 uq_attendance_emp_date_type 유니크 키로 교체
+
+migrate_work_date.py 이후에 실행
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        # 감사 기록은 근무일 없음
+        result = conn.execute(text(
+            "UPDATE attendance SET work_date = NULL "
+            "WHERE work_date IS NOT NULL "
+            "AND (employee_id IS NULL OR employee_id = 'UNKNOWN' OR employee_id LIKE 'FAILED\\\\_%')"
+        ))
+        conn.commit()
+        print(f"✅ 감사 기록 work_date 초기화: {result.rowcount}행")
+        
+        # 중복 출퇴근 기록 정리 (가장 이른 id만 유지)
+        result = conn.execute(text(
+            "UPDATE attendance a "
+            "JOIN ("
+            "  SELECT employee_id, work_date, type, MIN(id) AS keep_id "
+            "  FROM attendance WHERE work_date IS NOT NULL "
+            "  GROUP BY employee_id, work_date, type HAVING COUNT(*) > 1"
+            ") d ON a.employee_id = d.employee_id AND a.work_date = d.work_date AND a.type = d.type "
+            "SET a.work_date = NULL "
+            "WHERE a.id <> d.keep_id"
+        ))
+        conn.commit()
+        print(f"✅ 중복 기록 정리: {result.rowcount}행")
+        
+        # 유니크 키 추가 (이미 있으면 무시)
+        try:
+            conn.execute(text(
+                "ALTER TABLE attendance ADD CONSTRAINT uq_attendance_emp_date_type "
+                "UNIQUE (employee_id, work_date, type)"
+            ))
+            print("✅ uq_attendance_emp_date_type 추가 완료")
+        except Exception as e:
+            print(f"⚠️  uq_attendance_emp_date_type: {e}")
+        
+        # 기존 일반 인덱스 제거 (유니크 키가 대체)
+        try:
+            conn.execute(text("DROP INDEX idx_attendance_emp_date_type ON attendance"))
+            print("✅ idx_attendance_emp_date_type 제거 완료")
+        except Exception as e:
+            print(f"⚠️  idx_attendance_emp_date_type: {e}")
+        
+        conn.commit()
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
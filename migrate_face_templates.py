@@ -0,0 +1,24 @@
+"""
+데이터베이스 스키마 마이그레이션: face_templates 테이블 추가
+
+- 중복 얼굴 attach 모드(ENROLL_DUPLICATE_ACTION=attach)에서 기존 직원의
+  추가 얼굴 임베딩을 저장하는 테이블 생성 (이미 있으면 그대로 둠)
+"""
+from sqlalchemy import create_engine, inspect
+from app.core.config import settings
+from app.db.models import Base, FaceTemplate
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    if inspect(engine).has_table(FaceTemplate.__tablename__):
+        print("⚠️  face_templates 테이블이 이미 있습니다")
+    else:
+        Base.metadata.create_all(bind=engine, tables=[FaceTemplate.__table__])
+        print("✅ face_templates 테이블 생성 완료")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
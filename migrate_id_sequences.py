@@ -0,0 +1,35 @@
+"""
+데이터베이스 스키마 마이그레이션: id_sequences 테이블 추가
+
+- 직원 ID 순번 테이블 생성
+- 기존 users의 EMP 번호 중 가장 큰 값(숫자 기준) 다음 번호로 'employee' 시퀀스 초기화
+  (이미 있으면 그대로 둠)
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import Base, IdSequence
+from app.services import id_allocator
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    # id_sequences 테이블 생성 (이미 있으면 무시)
+    Base.metadata.create_all(bind=engine, tables=[IdSequence.__table__])
+    print("✅ id_sequences 테이블 준비 완료")
+    
+    with Session(bind=engine) as db:
+        existing = db.get(IdSequence, id_allocator.EMPLOYEE_SEQUENCE)
+        if existing is not None:
+            print(f"⚠️  'employee' 시퀀스가 이미 있습니다 (next_value={existing.next_value})")
+        else:
+            seed = id_allocator.seed_value(db, id_allocator.EMPLOYEE_SEQUENCE)
+            db.add(IdSequence(name=id_allocator.EMPLOYEE_SEQUENCE, next_value=seed))
+            db.commit()
+            print(f"✅ 'employee' 시퀀스 초기화: 다음 ID {id_allocator.format_employee_id(seed)}")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
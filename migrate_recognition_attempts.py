@@ -0,0 +1,62 @@
+"""
+데이터베이스 스키마 마이그레이션: 미등록/실패 시도를 recognition_attempts로 이동
+
+- recognition_attempts 테이블 생성
+- attendance의 employee_id='UNKNOWN' / 'FAILED_*' 행을 id 구간 단위로 복사 후 삭제
+  (구간마다 커밋하므로 중간에 중단해도 다시 실행하면 이어서 진행)
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.db.models import Base, RecognitionAttempt
+
+# 한 번에 처리할 attendance id 구간
+BATCH_SIZE = 10000
+
+AUDIT_ROW_FILTER = "(employee_id = 'UNKNOWN' OR employee_id LIKE 'FAILED\\\\_%')"
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    # recognition_attempts 테이블 생성 (이미 있으면 무시)
+    Base.metadata.create_all(bind=engine, tables=[RecognitionAttempt.__table__])
+    print("✅ recognition_attempts 테이블 준비 완료")
+    
+    with engine.connect() as conn:
+        bounds = conn.execute(text(
+            f"SELECT MIN(id), MAX(id) FROM attendance WHERE {AUDIT_ROW_FILTER}"
+        )).fetchone()
+        if bounds[0] is None:
+            print("ℹ️  이동할 행이 없습니다")
+            print("\n🎉 마이그레이션 완료!")
+            return
+        
+        low, high = bounds
+        moved = 0
+        while low <= high:
+            params = {"low": low, "high": low + BATCH_SIZE}
+            conn.execute(text(
+                "INSERT INTO recognition_attempts "
+                "(ts_server, outcome, reason, type, device_id, min_distance, image_ref, ts_client) "
+                "SELECT ts_server, "
+                "CASE WHEN employee_id = 'UNKNOWN' THEN 'unknown' ELSE 'failed' END, "
+                "CASE WHEN employee_id = 'UNKNOWN' THEN 'unknown' ELSE LOWER(SUBSTRING(employee_id, 8)) END, "
+                "type, device_id, distance, image_ref, ts_client "
+                f"FROM attendance WHERE id >= :low AND id < :high AND {AUDIT_ROW_FILTER} "
+                "ORDER BY id"
+            ), params)
+            result = conn.execute(text(
+                f"DELETE FROM attendance WHERE id >= :low AND id < :high AND {AUDIT_ROW_FILTER}"
+            ), params)
+            conn.commit()
+            
+            moved += result.rowcount
+            low += BATCH_SIZE
+            print(f"  ... {moved}행 이동")
+        
+        print(f"✅ attendance → recognition_attempts 이동 완료: {moved}행")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,51 @@
+"""
+데이터베이스 스키마 마이그레이션: users.thumbnail_path 컬럼 추가 및 백필
+
+- 등록 사진 썸네일 경로 컬럼 추가 (임베딩 재생성 시 원본으로 사용)
+- 기존 사용자는 IMAGE_DIR의 {employee_id}_thumb_*.jpg 중 가장 최근 파일로 채움
+"""
+import glob
+import os
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.utils.paths import get_relative_path
+
+
+def find_thumbnail(employee_id: str):
+    """가장 최근 썸네일 (파일명 타임스탬프 기준)"""
+    candidates = sorted(glob.glob(os.path.join(settings.IMAGE_DIR, f"{employee_id}_thumb_*.jpg")))
+    return get_relative_path(candidates[-1]) if candidates else None
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        # thumbnail_path 컬럼 추가 (이미 있으면 무시)
+        try:
+            conn.execute(text("ALTER TABLE users ADD COLUMN thumbnail_path VARCHAR(255) NULL"))
+            conn.commit()
+            print("✅ thumbnail_path 컬럼 추가 완료")
+        except Exception as e:
+            conn.rollback()
+            print(f"⚠️  thumbnail_path 컬럼: {e}")
+        
+        users = conn.execute(text("SELECT employee_id FROM users WHERE thumbnail_path IS NULL")).fetchall()
+        found = 0
+        for (employee_id,) in users:
+            path = find_thumbnail(employee_id)
+            if path is None:
+                print(f"⚠️  {employee_id}: 썸네일 없음")
+                continue
+            conn.execute(
+                text("UPDATE users SET thumbnail_path = :path WHERE employee_id = :emp_id"),
+                {"path": path, "emp_id": employee_id}
+            )
+            found += 1
+        conn.commit()
+        print(f"✅ thumbnail_path 백필 완료: {found}/{len(users)}명")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
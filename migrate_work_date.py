@@ -0,0 +1,65 @@
+"""
+데이터베이스 스키마 마이그레이션: attendance.work_date 컬럼 추가 및 백필
+
+- work_date DATE 컬럼 + (employee_id, work_date, type) 복합 인덱스 추가
+- 기존 행은 ts_server를 회사 시간대(TIMEZONE) 기준 날짜로 변환해 채움
+  (ts_server는 DB 세션 시간대 기준 NOW()로 저장되어 있으므로 두 시간대 차이만큼 보정)
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.utils.dates import company_utc_offset_minutes
+
+# 한 번에 갱신할 행 수 (긴 잠금 방지)
+BATCH_SIZE = 5000
+
+
+def migrate():
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        # work_date 컬럼 추가 (이미 있으면 무시)
+        try:
+            conn.execute(text("ALTER TABLE attendance ADD COLUMN work_date DATE NULL"))
+            print("✅ work_date 컬럼 추가 완료")
+        except Exception as e:
+            print(f"⚠️  work_date 컬럼: {e}")
+        
+        # 복합 인덱스 추가 (이미 있으면 무시)
+        try:
+            conn.execute(text(
+                "CREATE INDEX idx_attendance_emp_date_type ON attendance (employee_id, work_date, type)"
+            ))
+            print("✅ idx_attendance_emp_date_type 인덱스 추가 완료")
+        except Exception as e:
+            print(f"⚠️  idx_attendance_emp_date_type 인덱스: {e}")
+        
+        conn.commit()
+        
+        # DB 세션 시간대 -> 회사 시간대 보정값 (분)
+        db_offset = conn.execute(text("SELECT TIMESTAMPDIFF(MINUTE, UTC_TIMESTAMP(), NOW())")).scalar() or 0
+        shift = company_utc_offset_minutes() - int(db_offset)
+        print(f"ℹ️  ts_server 보정: {shift:+d}분 (DB {int(db_offset):+d}분 -> {settings.TIMEZONE})")
+        
+        # 기존 행 백필 (배치 단위)
+        total = 0
+        while True:
+            result = conn.execute(
+                text(
+                    "UPDATE attendance "
+                    "SET work_date = DATE(DATE_ADD(ts_server, INTERVAL :shift MINUTE)) "
+                    "WHERE work_date IS NULL "
+                    "LIMIT :batch"
+                ),
+                {"shift": shift, "batch": BATCH_SIZE}
+            )
+            conn.commit()
+            total += result.rowcount
+            if result.rowcount < BATCH_SIZE:
+                break
+        
+        print(f"✅ work_date 백필 완료: {total}행")
+    
+    print("\n🎉 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    migrate()
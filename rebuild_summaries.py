@@ -0,0 +1,56 @@
+"""
+일간 요약 테이블 재계산 (daily_attendance_summary, daily_device_summary)
+
+원본 attendance 테이블에서 기간 내 요약을 다시 계산해 덮어씀
+- 요약 테이블 도입 전 데이터 채우기
+- 수동 DB 수정 후 요약 보정
+
+사용법:
+    python rebuild_summaries.py --from 2025-01-01 --to 2025-01-31
+    python rebuild_summaries.py            # 오늘만
+"""
+import argparse
+from datetime import date, timedelta
+
+from app.db.base import SessionLocal, engine
+from app.db.models import Base, DailyAttendanceSummary, DailyDeviceSummary
+from app.services import summary_service
+from app.utils.dates import work_date
+
+# 한 번에 재계산할 기간 (일) - 긴 트랜잭션 방지
+CHUNK_DAYS = 7
+
+
+def rebuild(date_from: date, date_to: date):
+    # 요약 테이블이 없으면 생성
+    Base.metadata.create_all(bind=engine, tables=[DailyAttendanceSummary.__table__, DailyDeviceSummary.__table__])
+    
+    db = SessionLocal()
+    try:
+        start = date_from
+        while start <= date_to:
+            end = min(start + timedelta(days=CHUNK_DAYS - 1), date_to)
+            stats = summary_service.rebuild(db, start, end)
+            print(
+                f"✅ {start} ~ {end}: 원본 {stats['scanned']}행 → "
+                f"직원 {stats['employee_rows']}행, 디바이스 {stats['device_rows']}행"
+            )
+            start = end + timedelta(days=1)
+    finally:
+        db.close()
+    
+    print("\n🎉 요약 재계산 완료!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily attendance summaries")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="First work date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Last work date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    
+    date_to = args.date_to or work_date()
+    date_from = args.date_from or date_to
+    if date_from > date_to:
+        parser.error("--from must not be after --to")
+    
+    rebuild(date_from, date_to)
@@ -0,0 +1,287 @@
+"""
+전체 사용자 임베딩 재생성 (임베딩 모델 변경 / 정렬 방식 수정 후)
+
+등록 사진 썸네일(users.thumbnail_path, 중복 등록으로 붙은 추가 템플릿은
+face_templates.thumbnail_path)에서 얼굴을 다시 감지/임베딩하여
+콘텐츠 주소 저장소(ENCODING_DIR/xx/yy/<sha256>.npy)에 .npy를 쓰고,
+모두 끝나면 users.profile_image와 face_templates.embedding_path를
+한 트랜잭션으로 새 세대로 전환합니다.
+(이전 세대 파일은 참조가 없어지므로 gc_artifacts.py가 정리)
+
+- multiprocessing 풀: 워커 프로세스마다 모델을 1회 로드, 사용자 묶음 단위 배치 임베딩
+- 체크포인트 파일로 중단 후 재실행 시 이어서 진행 (전환 전 파일은 gc_artifacts.py가 보호)
+- 실행 중인 서버는 헬스 프로버가 갤러리 버전(id_sequences.gallery_version) 변경을 감지해 갤러리를 다시 로드
+
+사용법:
+    python reembed_users.py                      # 새 세대 생성 후 전환
+    python reembed_users.py --workers 8 --batch 64
+    python reembed_users.py --allow-partial      # 실패한 사용자가 있어도 나머지는 전환
+    python reembed_users.py --no-switch          # 파일만 생성 (전환은 다음 실행에서)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+# 워커 프로세스에서 initializer가 채움
+_face_service = None
+
+# 체크포인트 키: 사용자는 employee_id, 추가 템플릿은 "template:<id>"
+TEMPLATE_KEY_PREFIX = "template:"
+
+
+def template_key(template_id: int) -> str:
+    return f"{TEMPLATE_KEY_PREFIX}{template_id}"
+
+
+def _init_worker():
+    """워커 프로세스 시작 시 1회: 모델 로드"""
+    global _face_service
+    from app.services import face_service
+    face_service.ensure_model()
+    _face_service = face_service
+
+
+def _embed_chunk(users):
+    """
+    사용자/템플릿 묶음 1개 처리 (워커 프로세스)
+
+    Args:
+        users: [(key, thumbnail_path), ...] (key: employee_id 또는 template_key)
+
+    Returns:
+        [(key, relative_path or None, reason or None), ...]
+    """
+    import cv2
+    from app.services import artifact_store
+    from app.utils.image_io import resize_image
+
+    results = []
+    faces = []
+    for employee_id, thumbnail_path in users:
+        image = cv2.imread(thumbnail_path) if thumbnail_path and os.path.exists(thumbnail_path) else None
+        if image is None:
+            results.append((employee_id, None, "missing_source"))
+            continue
+        face_result = _face_service.detect_single_face(resize_image(image))
+        if face_result is None:
+            results.append((employee_id, None, "no_face"))
+            continue
+        faces.append((employee_id, face_result[1]))
+
+    embeddings = _face_service.embed_batch([face for _, face in faces])
+    for (employee_id, _), embedding in zip(faces, embeddings):
+        if embedding is None:
+            results.append((employee_id, None, "embed_failed"))
+            continue
+        artifact = artifact_store.prepare_embedding(embedding)
+        if not artifact_store.write(artifact):
+            results.append((employee_id, None, "write_failed"))
+            continue
+        results.append((employee_id, artifact.relative_path, None))
+    return results
+
+
+def load_checkpoint(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """임시 파일에 쓰고 교체 (중단되어도 이전 체크포인트 유지)"""
+    checkpoint_dir = os.path.dirname(path)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def switch_generation(engine, checkpoint: dict, snapshot: set, allow_partial: bool) -> dict:
+    """
+    users.profile_image와 face_templates.embedding_path를 새 세대 경로로 전환
+    + 파일 목록 등록 (한 트랜잭션)
+
+    각 UPDATE는 임베딩을 만든 원본 썸네일이 그대로인 행만 바꿈
+    (실행 중 / 재개 전 재등록된 사용자에게 이전 사진의 임베딩이 들어가지 않게).
+    원본이 바뀌어 건너뛴 행이나 시작 후 새로 생긴 사용자/템플릿이 있으면
+    allow_partial이 아닌 한 롤백
+
+    Args:
+        engine: DB 엔진
+        checkpoint: done(key -> 새 경로), sources(key -> 원본 썸네일 경로)
+        snapshot: 이번 실행 시작 시점의 대상 키
+        allow_partial: 건너뛴 / 새 항목이 있어도 나머지는 전환
+
+    Returns:
+        {"users", "templates", "skipped", "new", "switched"}
+    """
+    from sqlalchemy import bindparam, update
+    from sqlalchemy.orm import Session
+    from app.db.models import FaceTemplate, User
+    from app.services import artifact_store, id_allocator
+
+    users_t, templates_t = User.__table__, FaceTemplate.__table__
+    user_stmt = update(users_t)\
+        .where(users_t.c.employee_id == bindparam("key_value"), users_t.c.thumbnail_path == bindparam("source"))\
+        .values(profile_image=bindparam("path"))
+    template_stmt = update(templates_t)\
+        .where(templates_t.c.id == bindparam("key_value"), templates_t.c.thumbnail_path == bindparam("source"))\
+        .values(embedding_path=bindparam("path"))
+
+    stats = {"users": 0, "templates": 0, "skipped": [], "new": [], "switched": False}
+    with Session(bind=engine) as db:
+        for key, path in checkpoint["done"].items():
+            params = {"path": path, "source": checkpoint["sources"][key]}
+            if key.startswith(TEMPLATE_KEY_PREFIX):
+                params["key_value"] = int(key[len(TEMPLATE_KEY_PREFIX):])
+                counter, stmt = "templates", template_stmt
+            else:
+                params["key_value"] = key
+                counter, stmt = "users", user_stmt
+            if db.execute(stmt, params).rowcount:
+                stats[counter] += 1
+            else:
+                stats["skipped"].append(key)
+
+        # 시작 후 생긴 사용자/템플릿 (이번 세대로 임베딩되지 않음)
+        current = {emp for (emp,) in db.query(User.employee_id).filter(User.profile_image.isnot(None))}
+        current |= {template_key(template_id) for (template_id,) in db.query(FaceTemplate.id)}
+        stats["new"] = sorted(current - snapshot)
+
+        if (stats["skipped"] or stats["new"]) and not allow_partial:
+            db.rollback()
+            return stats
+
+        rows = [artifact_store.stored_manifest_row(path, artifact_store.KIND_EMBEDDING) for path in checkpoint["done"].values()]
+        artifact_store.register_rows(db, rows)
+        # 실행 중인 서버의 갤러리가 경로 변경을 감지하도록 버전 증가 (gallery.mark_changed와 동일)
+        id_allocator.bump(db, id_allocator.GALLERY_VERSION)
+        db.commit()
+    stats["switched"] = True
+    return stats
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed all users into a new embedding generation")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="worker processes")
+    parser.add_argument("--batch", type=int, default=32, help="users per task (batched inference)")
+    parser.add_argument("--generation", default=None, help="generation name (default: timestamp)")
+    parser.add_argument("--checkpoint", default="data/reembed_checkpoint.json", help="checkpoint file")
+    parser.add_argument("--allow-partial", action="store_true", help="switch even if some users failed")
+    parser.add_argument("--no-switch", action="store_true", help="only write files, do not switch users")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from app.core.config import settings
+    from app.db.models import FaceTemplate, User
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(settings.DATABASE_URL)
+    with Session(bind=engine) as db:
+        users = [tuple(row) for row in db.query(User.employee_id, User.thumbnail_path).order_by(User.employee_id)]
+        # 추가 템플릿도 같은 세대로 다시 임베딩 (이전 모델 공간에 남으면 오인식/중복 판정 오류)
+        templates = [
+            (template_key(template_id), path)
+            for template_id, path in db.query(FaceTemplate.id, FaceTemplate.thumbnail_path).order_by(FaceTemplate.id)
+        ]
+    items = users + templates
+    sources = dict(items)
+
+    # 체크포인트가 있으면 같은 세대로 이어서 진행
+    checkpoint = load_checkpoint(args.checkpoint)
+    if checkpoint and (args.generation is None or args.generation == checkpoint["generation"]):
+        print(f"♻️  체크포인트에서 재개: 세대 {checkpoint['generation']}, 완료 {len(checkpoint['done'])}건")
+    else:
+        checkpoint = {
+            "generation": args.generation or datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "done": {},
+            "failed": {}
+        }
+    checkpoint.setdefault("sources", {})
+    # 원본 썸네일이 바뀌었거나(재등록) 기록이 없거나 삭제된 항목은 다시 임베딩 대상
+    stale = [
+        key for key in checkpoint["done"]
+        if key not in sources or checkpoint["sources"].get(key) != sources[key]
+    ]
+    for key in stale:
+        checkpoint["done"].pop(key)
+        checkpoint["sources"].pop(key, None)
+    if stale:
+        print(f"♻️  원본이 바뀌었거나 없어진 {len(stale)}건은 다시 처리")
+    # 이전 실행의 실패 항목은 다시 시도
+    checkpoint["failed"] = {}
+    pending = [(key, path) for key, path in items if key not in checkpoint["done"]]
+    total = len(items)
+    print(f"📦 대상 {total}건 (사용자 {len(users)}, 추가 템플릿 {len(templates)}), 남은 {len(pending)}건 → 세대 {checkpoint['generation']} (워커 {args.workers}, 배치 {args.batch})")
+
+    if pending:
+        tasks = [pending[i:i + args.batch] for i in range(0, len(pending), args.batch)]
+        start = time.perf_counter()
+        processed = 0
+        with multiprocessing.Pool(args.workers, initializer=_init_worker) as pool:
+            for results in pool.imap_unordered(_embed_chunk, tasks):
+                for key, path, reason in results:
+                    if path:
+                        checkpoint["done"][key] = path
+                        checkpoint["sources"][key] = sources[key]
+                    else:
+                        checkpoint["failed"][key] = reason
+                processed += len(results)
+                save_checkpoint(args.checkpoint, checkpoint)
+
+                elapsed = time.perf_counter() - start
+                rate = processed / elapsed if elapsed > 0 else 0.0
+                eta = (len(pending) - processed) / rate if rate > 0 else 0.0
+                print(
+                    f"  ... {len(checkpoint['done'])}/{total} 완료, 실패 {len(checkpoint['failed'])} "
+                    f"({rate:.1f}건/s, ETA {format_eta(eta)})"
+                )
+
+    failed = checkpoint["failed"]
+    if failed:
+        print(f"⚠️  실패 {len(failed)}건:")
+        for key, reason in sorted(failed.items())[:50]:
+            print(f"    {key}: {reason}")
+
+    if args.no_switch:
+        print("\nℹ️  --no-switch: 전환하지 않음 (다시 실행하면 체크포인트에서 전환)")
+        return
+    if failed and not args.allow_partial:
+        print("\n⚠️  실패한 항목이 있어 전환하지 않았습니다 (--allow-partial로 나머지만 전환 가능)")
+        return
+
+    stats = switch_generation(engine, checkpoint, set(sources), args.allow_partial)
+    if stats["skipped"]:
+        print(f"⚠️  실행 중 원본이 바뀐(재등록) {len(stats['skipped'])}건: {stats['skipped'][:20]}")
+    if stats["new"]:
+        print(f"⚠️  시작 후 새로 등록된 {len(stats['new'])}건: {stats['new'][:20]}")
+    if not stats["switched"]:
+        print("\n⚠️  전환하지 않았습니다 - 다시 실행하면 해당 항목만 처리 후 전환 (--allow-partial로 나머지만 전환 가능)")
+        return
+    if stats["skipped"] or stats["new"]:
+        print("ℹ️  --allow-partial: 위 항목은 전환하지 않음 (현재 임베딩 유지)")
+
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(
+        f"✅ 사용자 {stats['users']}명 profile_image, 추가 템플릿 {stats['templates']}건 embedding_path 전환 완료 "
+        f"(세대 {checkpoint['generation']})"
+    )
+    print("\n🎉 임베딩 재생성 완료!")
+
+
+if __name__ == "__main__":
+    main()